@@ -0,0 +1,293 @@
+from datetime import date
+
+import orjson
+from flask import Blueprint, current_app, jsonify, request
+from flask.json.provider import JSONProvider
+from models import db, Book, book_columns, delete_books, get_author, link_authors, update_books, utcnow
+from forms import validate_book, validate_book_fields
+
+api = Blueprint('api', __name__)
+
+API_FIELDS = ('title', 'author', 'description', 'published_date')
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 1000
+# Books one batch edit or delete may select; the statements are chunked to
+# MAX_BOUND_PARAMETERS, the transaction is one
+MAX_BATCH_IDS = 10000
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Serializes ``jsonify`` responses with orjson, which also handles dates.
+    """
+    options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.options), mimetype='application/json')
+
+
+def book_json(book):
+    """
+    Converts a book to the JSON API representation.
+
+    Args:
+        book (Book): The book.
+
+    Returns:
+        dict: The id and fields of the book.
+    """
+    return {
+        'id': book.id, 'title': book.title, 'author': book.author.name,
+        'description': book.description, 'published_date': book.published_date,
+    }
+
+
+def as_form_data(payload, book=None):
+    """
+    Merges a JSON payload over a book's current values as form strings.
+
+    Args:
+        payload (dict): The fields sent by the client.
+        book (Book | None): The book being updated, if any.
+
+    Returns:
+        dict: String values of every book field.
+    """
+    record = {field: getattr(book, field) if book else None for field in API_FIELDS}
+    record.update((field, payload[field]) for field in API_FIELDS if field in payload)
+    return {
+        field: value.isoformat() if isinstance(value, date) else ('' if value is None else str(value))
+        for field, value in record.items()
+    }
+
+
+def batch_ids(payload):
+    """
+    Reads the ``ids`` of a batch edit or delete.
+
+    Args:
+        payload: The JSON body.
+
+    Returns:
+        list[int] | None: The distinct IDs, sorted, or None if they are
+        not a non-empty list of at most MAX_BATCH_IDS integers.
+    """
+    ids = payload.get('ids') if isinstance(payload, dict) else None
+    if not isinstance(ids, list) or not 1 <= len(ids) <= MAX_BATCH_IDS:
+        return None
+    if not all(isinstance(book_id, int) and not isinstance(book_id, bool) for book_id in ids):
+        return None
+    return sorted(set(ids))
+
+
+def conditional(response):
+    """
+    Adds a strong ETag to a GET response and answers a matching
+    If-None-Match with 304.
+
+    Args:
+        response (Response): The JSON response.
+
+    Returns:
+        Response: The response, possibly turned into a 304.
+    """
+    response.add_etag()
+    return response.make_conditional(request)
+
+
+@api.get('/books')
+def book_list():
+    """
+    Lists books a keyset page at a time.
+
+    Query parameters: ``after`` (the id of the last book on the previous
+    page), ``limit`` and ``fields`` (comma-separated fields to return
+    besides id; all by default).
+
+    Returns:
+        The page of books and the cursor of the next one.
+    """
+    after = request.args.get('after', type=int)
+    limit = request.args.get('limit', PAGE_SIZE, type=int)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify(error=f'limit must be between 1 and {MAX_PAGE_SIZE}'), 400
+    fields = request.args.get('fields')
+    selected = API_FIELDS if not fields else tuple(field.strip() for field in fields.split(','))
+    unknown = set(selected) - set(API_FIELDS)
+    if unknown:
+        return jsonify(error=f"Unknown fields: {', '.join(sorted(unknown))}"), 400
+    query = db.select(Book.id, *book_columns(selected)).order_by(Book.id)
+    if 'author' in selected:
+        query = query.join(Book.author)
+    if after is not None:
+        query = query.where(Book.id > after)
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return conditional(jsonify(items=[row._asdict() for row in rows[:limit]], next_cursor=next_cursor))
+
+
+@api.post('/books')
+def book_create():
+    """
+    Creates a book from a JSON object validated with ``BookForm`` rules.
+
+    Returns:
+        The created book with status 201, or the field errors with 400.
+    """
+    payload = request.get_json()
+    if not isinstance(payload, dict):
+        return jsonify(error='Expected a JSON object'), 400
+    values, errors = validate_book(as_form_data(payload))
+    if errors:
+        return jsonify(errors=errors), 400
+    values['author'] = get_author(values['author'])
+    book = Book(**values)
+    db.session.add(book)
+    db.session.commit()
+    return jsonify(book_json(book)), 201
+
+
+@api.post('/books/batch')
+def book_batch_create():
+    """
+    Creates many books with a single multi-row INSERT in one transaction.
+    Nothing is inserted if any book is invalid.
+
+    Returns:
+        The created books with status 201, or the errors by list index with 400.
+    """
+    payload = request.get_json()
+    if not isinstance(payload, list) or len(payload) > MAX_BATCH_SIZE:
+        return jsonify(error=f'Expected a list of at most {MAX_BATCH_SIZE} books'), 400
+    rows = []
+    errors = {}
+    for index, item in enumerate(payload):
+        values, item_errors = validate_book(as_form_data(item if isinstance(item, dict) else {}))
+        if item_errors:
+            errors[index] = item_errors
+        rows.append(values)
+    if errors:
+        return jsonify(errors=errors), 400
+    if not rows:
+        return jsonify([]), 201
+    statement = db.insert(Book).returning(Book.id, sort_by_parameter_order=True)
+    ids = db.session.scalars(statement, link_authors(rows)).all()
+    db.session.commit()
+    return jsonify([{'id': book_id, **values} for book_id, values in zip(ids, rows)]), 201
+
+
+@api.patch('/books/batch')
+def book_batch_update():
+    """
+    Applies the same partial update to many books with set-based UPDATEs
+    in one transaction, e.g. to reassign their author. The JSON body holds
+    the ``ids`` of the books and the ``values`` of the fields to change.
+
+    Returns:
+        The number of books updated, unknown IDs are skipped; or the errors
+        with 400.
+    """
+    payload = request.get_json()
+    book_ids = batch_ids(payload)
+    if book_ids is None:
+        return jsonify(error=f'Expected a list of 1 to {MAX_BATCH_IDS} book ids'), 400
+    fields = payload.get('values')
+    if not isinstance(fields, dict):
+        return jsonify(error='Expected the values to set'), 400
+    record = {
+        field: '' if fields[field] is None else str(fields[field]) for field in API_FIELDS if field in fields
+    }
+    values, errors = validate_book_fields(record)
+    if errors:
+        return jsonify(errors=errors), 400
+    updated = 0
+    if values:
+        updated = update_books(book_ids, values)
+        db.session.commit()
+        current_app.extensions['book_cache'].delete_many(f'book_detail:{book_id}' for book_id in book_ids)
+    return jsonify(updated=updated)
+
+
+@api.post('/books/batch/delete')
+def book_batch_delete():
+    """
+    Deletes many books, marking them with set-based UPDATEs in one
+    transaction. The JSON body holds the ``ids`` of the books.
+
+    Returns:
+        The number of books deleted, unknown IDs are skipped; or the error
+        with 400.
+    """
+    book_ids = batch_ids(request.get_json())
+    if book_ids is None:
+        return jsonify(error=f'Expected a list of 1 to {MAX_BATCH_IDS} book ids'), 400
+    deleted = delete_books(book_ids)
+    db.session.commit()
+    current_app.extensions['book_cache'].delete_many(f'book_detail:{book_id}' for book_id in book_ids)
+    return jsonify(deleted=deleted)
+
+
+@api.get('/books/<int:id>')
+def book_detail(id):
+    """
+    Returns one book.
+
+    Args:
+        id (int): The ID of the book.
+
+    Returns:
+        The book.
+    """
+    return conditional(jsonify(book_json(Book.query.options(db.joinedload(Book.author)).get_or_404(id))))
+
+
+@api.patch('/books/<int:id>')
+def book_update(id):
+    """
+    Updates the fields of a book present in the JSON body.
+
+    Args:
+        id (int): The ID of the book.
+
+    Returns:
+        The updated book, or the field errors with 400.
+    """
+    payload = request.get_json()
+    if not isinstance(payload, dict):
+        return jsonify(error='Expected a JSON object'), 400
+    book = Book.query.options(db.joinedload(Book.author)).get_or_404(id)
+    values, errors = validate_book(as_form_data(payload, book))
+    if errors:
+        return jsonify(errors=errors), 400
+    values['author'] = book.author if values['author'] == book.author.name else get_author(values['author'])
+    for field, value in values.items():
+        setattr(book, field, value)
+    db.session.commit()
+    current_app.extensions['book_cache'].delete(f'book_detail:{id}')
+    return jsonify(book_json(book))
+
+
+@api.delete('/books/<int:id>')
+def book_delete(id):
+    """
+    Deletes a book.
+
+    Args:
+        id (int): The ID of the book.
+
+    Returns:
+        An empty response with status 204.
+    """
+    book = db.get_or_404(Book, id)
+    book.deleted_at = utcnow()
+    db.session.commit()
+    current_app.extensions['book_cache'].delete(f'book_detail:{id}')
+    return '', 204
@@ -1,12 +1,139 @@
-from flask import Flask, render_template, request, redirect, url_for
-from models import db, Book
-from forms import BookForm
+import io
+import os
+import time
+
+import click
+from jinja2 import FileSystemBytecodeCache
+from flask import Flask, Response, abort, render_template, request, redirect, stream_with_context, url_for
+from flask_wtf import FlaskForm
+from models import db, Author, Book, book_columns, delete_books, get_author, link_authors, update_books, utcnow
+from api import MAX_BATCH_IDS, api, OrjsonProvider
+from assets import brotli, build_assets, init_assets
+from forms import BookBatchForm, BookFilterForm, BookForm, ImportForm, validate_book
+from book_cache import create_cache
+from compression import COMPRESSIBLE_TYPES, MinifyExtension, init_compression
+from book_io import (
+    EXPORT_FIELDS, FORMATS, IMPORT_BATCH_SIZE, ImportReport, detect_format, export_filename, iter_export,
+    iter_records, iter_valid_batches
+)
+from conditional import (
+    LIST_VERSION_SQL, book_validators, create_list_version, list_validators, not_modified, set_validators
+)
+from database import engine_options
+from maintenance import (
+    PURGE_AFTER_DAYS, PURGE_BATCH_SIZE, PURGE_PAUSE, VACUUM_STEP_PAGES, purge_cutoff, purge_deleted, vacuum_database
+)
+from migrations import upgrade_database
+from replicas import copy_sqlite_database, init_replicas, use_primary
+from search_index import create_search_index, match_expression, search_statement
+from sqlite_profile import install_sqlite_profile
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///books.db'
+app.json = OrjsonProvider(app)
+# An SQLite URL, see database.py; relative paths are inside the instance folder
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///books.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Connection pool, see database.py: 'queue', 'static' or 'null', 'static' for in-memory SQLite
+pool_settings = dict(
+    pool=os.getenv('DB_POOL') or None,
+    pool_size=int(os.getenv('DB_POOL_SIZE', '5')),
+    max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '10')),
+    pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+    pool_recycle=int(os.getenv('DB_POOL_RECYCLE', '-1')),  # seconds, -1 never
+    pool_pre_ping=os.getenv('DB_POOL_PRE_PING') == '1',
+)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], **pool_settings)
+# Read replicas, comma-separated URLs of copies of the database (see `flask copy-replicas`).
+# SELECTs of GET requests go to one of them; writes, and a client's requests for
+# REPLICA_PIN_SECONDS after it wrote, use the primary. See replicas.py
+app.config['SQLALCHEMY_BINDS'] = {
+    f'replica{i}': {'url': url, **engine_options(url, **pool_settings)}
+    for i, url in enumerate(url for url in os.getenv('REPLICA_URLS', '').split(',') if url)
+}
+app.config['REPLICA_BINDS'] = list(app.config['SQLALCHEMY_BINDS'])
+app.config['REPLICA_PIN_SECONDS'] = int(os.getenv('REPLICA_PIN_SECONDS', '10'))
+app.config['SQLITE_PROFILE'] = os.getenv('SQLITE_PROFILE', 'production')  # See sqlite_profile.py
+app.config['BOOK_CACHE_URL'] = os.getenv('BOOK_CACHE_URL', 'local')  # 'local' or a redis:// URL
+app.config['BOOK_CACHE_SIZE'] = 1024
+app.config['BOOK_CACHE_TTL'] = 300
+app.config['SEARCH_PAGE_SIZE'] = 20
+app.config['EXPORT_CHUNK_SIZE'] = 1000
+app.config['INSTRUMENTATION'] = os.getenv('INSTRUMENTATION') == '1'  # Request timings and /metrics
+app.config['SLOW_REQUEST_MS'] = int(os.getenv('SLOW_REQUEST_MS', '500'))
+app.config['QUERY_CHECKS'] = os.getenv('QUERY_CHECKS') == '1'  # Log N+1 queries and requests over budget
+app.config['QUERY_BUDGET'] = int(os.getenv('QUERY_BUDGET', '20'))
+# Off when the schema was created beforehand, see create_schema
+app.config['MIGRATE_ON_STARTUP'] = os.getenv('MIGRATE_ON_STARTUP', '1') == '1'
+# Built static assets, see `flask build-assets`
+app.config['STATIC_BUILD_DIR'] = os.getenv('STATIC_BUILD_DIR', os.path.join(app.root_path, 'static_build'))
+# Opt-in response compression (brotli if installed, or gzip) and HTML
+# minification of the templates when they are compiled, see compression.py
+app.config['COMPRESSION'] = os.getenv('COMPRESSION') == '1'
+app.config['COMPRESSION_MIN_SIZE'] = int(os.getenv('COMPRESSION_MIN_SIZE', '500'))
+app.config['COMPRESSION_TYPES'] = os.getenv('COMPRESSION_TYPES', ','.join(COMPRESSIBLE_TYPES)).split(',')
+app.config['GZIP_LEVEL'] = int(os.getenv('GZIP_LEVEL', '6'))
+app.config['BROTLI_QUALITY'] = int(os.getenv('BROTLI_QUALITY', '4'))
+app.config['MINIFY_HTML'] = os.getenv('MINIFY_HTML') == '1'
+app.config['TEMPLATE_CACHE_DIR'] = os.getenv('TEMPLATE_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+if app.config['MINIFY_HTML']:
+    # The bytecode cache does not tell templates compiled with and without the extension apart
+    app.config['TEMPLATE_CACHE_DIR'] = os.path.join(app.config['TEMPLATE_CACHE_DIR'], 'minified')
 app.secret_key = 'your_secret_key'  # For CSRF protection
+# Compiled templates are kept on disk for fast cold starts
+os.makedirs(app.config['TEMPLATE_CACHE_DIR'], exist_ok=True)
+app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_DIR'])}
+if app.config['MINIFY_HTML']:
+    app.jinja_options['extensions'] = [*app.jinja_options.get('extensions', ()), MinifyExtension]
 db.init_app(app)
+book_cache = create_cache(
+    app.config['BOOK_CACHE_URL'], app.config['BOOK_CACHE_SIZE'], app.config['BOOK_CACHE_TTL']
+)
+app.extensions['book_cache'] = book_cache
+app.register_blueprint(api, url_prefix='/api')
+init_assets(app, app.config['STATIC_BUILD_DIR'])
+if app.config['COMPRESSION']:
+    init_compression(
+        app, app.config['COMPRESSION_MIN_SIZE'], app.config['COMPRESSION_TYPES'], app.config['GZIP_LEVEL'],
+        app.config['BROTLI_QUALITY'],
+    )
+
+if app.config['REPLICA_BINDS']:
+    init_replicas(app, app.config['REPLICA_PIN_SECONDS'])
+
+with app.app_context():
+    replica_engines = [db.engines[key] for key in app.config['REPLICA_BINDS']]
+    for engine in [db.engine, *replica_engines]:
+        install_sqlite_profile(engine, app.config['SQLITE_PROFILE'])
+    if app.config['INSTRUMENTATION'] or app.config['QUERY_CHECKS']:
+        # Only imported when enabled
+        from instrumentation import init_instrumentation, instrument_engine
+
+        init_instrumentation(
+            app, db.engine, app.config['SLOW_REQUEST_MS'] / 1000,
+            max_queries=app.config['QUERY_BUDGET'] if app.config['QUERY_CHECKS'] else None,
+            expose_metrics=app.config['INSTRUMENTATION'],
+        )
+        for engine in replica_engines:
+            instrument_engine(engine)
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+
+def create_schema():
+    """
+    Creates or migrates the tables, then the full-text search index and the
+    version counter of the book list. Runs when the app is imported unless
+    MIGRATE_ON_STARTUP=0, and once per deploy with `flask migrate`.
+    """
+    with app.app_context():
+        upgrade_database(db.engine, db.metadata, Book.__tablename__)
+        with db.engine.begin() as connection:
+            create_search_index(connection)
+            create_list_version(connection)
+
+
+if app.config['MIGRATE_ON_STARTUP']:
+    create_schema()
 
 
 @app.route('/')
@@ -14,11 +141,54 @@ def book_list():
     """
     Renders the list of all books in the database.
 
+    The ``title`` (prefix), ``author``, ``year_from``, ``year_to`` and
+    ``sort`` query parameters filter and order the list, see BookFilterForm.
+    The page carries an ETag and Last-Modified taken from the book version
+    counter; a client whose copy is still current gets a 304 without the
+    books being queried or the template rendered.
+
     Returns:
-        A rendered template displaying all books.
+        A rendered template displaying all books, or an empty 304 response.
+    """
+    etag, last_modified = list_validators(db.session.execute(LIST_VERSION_SQL).one())
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+    filter_form = BookFilterForm(request.args)
+    books = filter_form.filter(Book.query.join(Book.author).options(db.contains_eager(Book.author))).all()
+    html = render_template('book_list.html', books=books, filter_form=filter_form)
+    return set_validators(app.make_response(html), etag, last_modified)
+
+
+@app.route('/search')
+def book_search():
     """
-    books = Book.query.all()
-    return render_template('book_list.html', books=books)
+    Searches title, author and description through the FTS5 index.
+
+    Every word of the ``q`` query parameter matches as a prefix and results
+    are ordered by relevance; ``page`` selects the page of results.
+
+    Returns:
+        A rendered template displaying the matching books.
+    """
+    q = request.args.get('q', '')
+    page = max(request.args.get('page', 1, type=int), 1)
+    page_size = app.config['SEARCH_PAGE_SIZE']
+    books = []
+    has_next = False
+    expression = match_expression(q)
+    if expression:
+        hits = search_statement(expression, page_size + 1, (page - 1) * page_size).subquery()
+        query = (
+            db.select(Book)
+            .join(hits, hits.c.rowid == Book.id)
+            .options(db.joinedload(Book.author))
+            .order_by(hits.c.rank)
+        )
+        books = db.session.scalars(query).all()
+        has_next = len(books) > page_size
+        books = books[:page_size]
+    return render_template('search.html', q=q, books=books, page=page, has_next=has_next)
 
 
 @app.route('/book/create', methods=['GET', 'POST'])
@@ -37,7 +207,7 @@ def book_create():
     if form.validate_on_submit():
         new_book = Book(
             title=form.title.data,
-            author=form.author.data,
+            author=get_author(form.author.data.strip()),
             description=form.description.data,
             published_date=form.published_date.data
         )
@@ -47,19 +217,224 @@ def book_create():
     return render_template('book_form.html', form=form)
 
 
+def import_books(stream, fmt, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validates and inserts books from a text stream, one transaction per batch.
+
+    Args:
+        stream (TextIO): The opened CSV or JSON Lines file.
+        fmt (str): "csv" or "jsonl".
+        batch_size (int): The number of rows per transaction.
+
+    Returns:
+        ImportReport: The number of inserted and rejected rows and throughput.
+    """
+    report = ImportReport()
+    for batch in iter_valid_batches(iter_records(stream, fmt), validate_book, report, batch_size):
+        db.session.bulk_insert_mappings(Book, link_authors(batch))
+        db.session.commit()
+        report.inserted += len(batch)
+    return report.finish()
+
+
+@app.route('/book/import', methods=['GET', 'POST'])
+def book_import():
+    """
+    Handles importing books from an uploaded CSV or JSON Lines file.
+
+    - On GET request, displays the upload form.
+    - On POST request, parses the file line by line and inserts valid rows
+      in batched transactions.
+
+    Returns:
+        The upload form, with the import report after a POST.
+    """
+    form = ImportForm()
+    report = None
+    if form.validate_on_submit():
+        upload = form.file.data
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8', newline='')
+        report = import_books(stream, detect_format(upload.filename))
+        app.logger.info(report.summary())
+    return render_template('book_import.html', form=form, report=report)
+
+
+@app.cli.command('import-books')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--batch-size', default=IMPORT_BATCH_SIZE, show_default=True)
+def import_books_command(path, fmt, batch_size):
+    """
+    Imports books from a CSV or JSON Lines file.
+    """
+    # The authors are looked up where the books are inserted
+    with use_primary(), open(path, encoding='utf-8', newline='') as stream:
+        report = import_books(stream, fmt or detect_format(path), batch_size)
+    for line_number, errors in report.rejected:
+        click.echo(f'Line {line_number}: {errors}')
+    click.echo(report.summary())
+
+
+def iter_book_rows():
+    """
+    Reads every book as a tuple of ``EXPORT_FIELDS`` through a server-side
+    cursor, fetching ``EXPORT_CHUNK_SIZE`` rows at a time. The author's name
+    comes from a join, so the export stays one query.
+
+    Yields:
+        Row: The exported columns of one book, in id order.
+    """
+    query = (
+        db.select(*book_columns(EXPORT_FIELDS))
+        .join(Book.author)
+        .order_by(Book.id)
+        .execution_options(yield_per=app.config['EXPORT_CHUNK_SIZE'])
+    )
+    yield from db.session.execute(query)
+
+
+@app.route('/export')
+def book_export():
+    """
+    Streams every book as a CSV or JSON Lines download.
+
+    The ``format`` query parameter selects "csv" (default) or "jsonl" and
+    ``gzip=1`` compresses the file. Rows are read with a server-side cursor
+    and encoded chunk by chunk, so memory use does not depend on table size.
+
+    Returns:
+        A streamed response with the file as an attachment.
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        abort(400)
+    compress = request.args.get('gzip', '0') in ('1', 'true')
+    if compress:
+        mimetype = 'application/gzip'
+    else:
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(iter_export(iter_book_rows(), fmt, compress)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{export_filename(fmt, compress)}"'},
+    )
+
+
+@app.cli.command('export-books')
+@click.argument('path')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults to the file extension.')
+@click.option('--gzip', 'compress', is_flag=True, help='Defaults to true for .gz paths.')
+def export_books_command(path, fmt, compress):
+    """
+    Exports every book to a CSV or JSON Lines file, or "-" for stdout.
+    """
+    compress = compress or path.endswith('.gz')
+    fmt = fmt or detect_format(path.removesuffix('.gz'))
+    start = time.perf_counter()
+    written = 0
+    with click.open_file(path, 'wb') as output:
+        for chunk in iter_export(iter_book_rows(), fmt, compress):
+            output.write(chunk)
+            written += len(chunk)
+    click.echo(f'Wrote {written / 1e6:.1f} MB in {time.perf_counter() - start:.2f} s', err=True)
+
+
+@app.cli.command('migrate')
+def migrate_command():
+    """
+    Creates or migrates the database schema.
+    """
+    create_schema()
+    click.echo(f'Migrated {db.engine.url}')
+
+
+@app.cli.command('purge-books')
+@click.option('--older-than-days', default=PURGE_AFTER_DAYS, show_default=True, type=float)
+@click.option('--batch-size', default=PURGE_BATCH_SIZE, show_default=True)
+@click.option('--pause', default=PURGE_PAUSE, show_default=True, help='Seconds between batches.')
+def purge_books_command(older_than_days, batch_size, pause):
+    """
+    Removes the books deleted before, a small batch per transaction; run it off-peak.
+    """
+    start = time.perf_counter()
+    purged = purge_deleted(db.engine, Book.__table__, purge_cutoff(older_than_days), batch_size, pause)
+    click.echo(f'Purged {purged} books in {time.perf_counter() - start:.2f} s')
+
+
+@app.cli.command('vacuum-database')
+@click.option('--step-pages', default=VACUUM_STEP_PAGES, show_default=True, help='Pages freed per transaction.')
+@click.option('--pause', default=PURGE_PAUSE, show_default=True, help='Seconds between steps.')
+def vacuum_database_command(step_pages, pause):
+    """
+    Hands the free pages of the SQLite database back to the filesystem; run it off-peak.
+    """
+    start = time.perf_counter()
+    report = vacuum_database(db.engine, step_pages, pause)
+    if report['switched']:
+        click.echo(f'Switched {db.engine.url} to auto_vacuum=INCREMENTAL with a full VACUUM')
+    freed_mb = report['freed_pages'] * report['page_size'] / 1e6
+    click.echo(f"Freed {report['freed_pages']} pages ({freed_mb:.1f} MB) in {time.perf_counter() - start:.2f} s")
+
+
+@app.cli.command('copy-replicas')
+def copy_replicas_command():
+    """
+    Copies the SQLite database onto every replica of REPLICA_URLS.
+    """
+    if not app.config['REPLICA_BINDS']:
+        raise click.ClickException('No replicas configured, set REPLICA_URLS.')
+    for key in app.config['REPLICA_BINDS']:
+        replica = db.engines[key]
+        # Pooled connections would keep reading the replaced file
+        replica.dispose()
+        copy_sqlite_database(db.engine.url, replica.url)
+        click.echo(f'Copied {db.engine.url} to {replica.url}')
+
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """
+    Fingerprints and precompresses the static files; restart the app to serve them.
+    """
+    manifest = build_assets(app.static_folder, app.config['STATIC_BUILD_DIR'])
+    for name, fingerprinted in manifest.items():
+        click.echo(f'{name} -> {fingerprinted}')
+    if brotli is None:
+        click.echo('The brotli package is not installed, only gzip variants were built.')
+
+
 @app.route('/book/<int:id>', methods=['GET'])
 def book_detail(id):
     """
     Displays detailed information about a specific book.
 
+    Only ``updated_at`` is read before answering a conditional request with
+    304. Otherwise the rendered page is cached by book id until the book is
+    edited or deleted.
+
     Args:
         id (int): The ID of the book to display.
 
     Returns:
-        A rendered template displaying the book's details.
+        A rendered template displaying the book's details, or an empty 304
+        response.
     """
-    book = Book.query.get_or_404(id)
-    return render_template('book_detail.html', book=book)
+    updated_at = db.session.scalar(db.select(Book.updated_at).where(Book.id == id))
+    if updated_at is None:
+        abort(404)
+    etag, last_modified = book_validators(id, updated_at)
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+    # The page is cached behind its ETag and only served for the same one:
+    # a replica that has not caught up yet may have cached an older version
+    cache_key = f'book_detail:{id}'
+    cached_etag, _, html = (book_cache.get(cache_key) or '').partition('\n')
+    if cached_etag != etag:
+        book = Book.query.options(db.joinedload(Book.author)).get_or_404(id)
+        html = render_template('book_detail.html', book=book)
+        book_cache.set(cache_key, f'{etag}\n{html}')
+    return set_validators(app.make_response(html), etag, last_modified)
 
 
 @app.route('/book/<int:id>/edit', methods=['GET', 'POST'])
@@ -77,14 +452,15 @@ def book_edit(id):
         On success, redirects to the book list.
         Otherwise, re-renders the form with errors.
     """
-    book = Book.query.get_or_404(id)
+    book = Book.query.options(db.joinedload(Book.author)).get_or_404(id)
     form = BookForm(obj=book)
     if form.validate_on_submit():
         book.title = form.title.data
-        book.author = form.author.data
+        book.author = get_author(form.author.data.strip())
         book.description = form.description.data
         book.published_date = form.published_date.data
         db.session.commit()
+        book_cache.delete(f'book_detail:{id}')
         return redirect(url_for('book_list'))
     return render_template('book_form.html', form=form, book=book)
 
@@ -92,10 +468,12 @@ def book_edit(id):
 @app.route('/book/<int:id>/delete', methods=['GET', 'POST'])
 def book_delete(id):
     """
-    Handles deleting an existing book.
+    Handles deleting an existing book. The book is marked deleted and
+    disappears from every page; `flask purge-books` removes it later.
 
     - On GET request, displays a confirmation page.
-    - On POST request, deletes the book from the database.
+    - On POST request, marks the book deleted; the row stays in the
+      database until it is purged.
 
     Args:
         id (int): The ID of the book to delete.
@@ -106,12 +484,95 @@ def book_delete(id):
     """
     book = Book.query.get_or_404(id)
     if request.method == 'POST':
-        db.session.delete(book)
+        book.deleted_at = utcnow()
         db.session.commit()
+        book_cache.delete(f'book_detail:{id}')
         return redirect(url_for('book_list'))
     return render_template('book_confirm_delete.html', book=book)
 
 
+def selected_book_ids():
+    """
+    Reads the IDs of the books selected on the list page from the form.
+
+    Returns:
+        list[int]: The distinct IDs, sorted; values that are not integers
+        are skipped.
+    """
+    book_ids = sorted(set(request.form.getlist('ids', type=int)))
+    if len(book_ids) > MAX_BATCH_IDS:
+        abort(400, f'At most {MAX_BATCH_IDS} books can be changed at once')
+    return book_ids
+
+
+@app.route('/book/batch/edit', methods=['POST'])
+def book_batch_edit():
+    """
+    Reassigns the author and/or sets the publication date of the books
+    selected on the list page, with set-based UPDATEs in one transaction.
+
+    - A POST from the list page shows the change to confirm.
+    - A confirmed POST updates the books; blank fields are left unchanged.
+
+    Returns:
+        On success, redirects to the book list.
+        Otherwise, renders the confirmation form with errors.
+    """
+    book_ids = selected_book_ids()
+    if not book_ids:
+        return redirect(url_for('book_list'))
+    form = BookBatchForm()
+    if request.form.get('confirm') and form.validate_on_submit():
+        values = form.values()
+        if values:
+            update_books(book_ids, values)
+            db.session.commit()
+            book_cache.delete_many(f'book_detail:{book_id}' for book_id in book_ids)
+        return redirect(url_for('book_list'))
+    return render_template('book_batch_form.html', form=form, book_ids=book_ids)
+
+
+@app.route('/book/batch/delete', methods=['POST'])
+def book_batch_delete():
+    """
+    Deletes the books selected on the list page, marking them with
+    set-based UPDATEs in one transaction.
+
+    - A POST from the list page displays a confirmation page.
+    - A confirmed POST deletes the books.
+
+    Returns:
+        On success, redirects to the book list.
+        Otherwise, renders the confirmation page.
+    """
+    book_ids = selected_book_ids()
+    if not book_ids:
+        return redirect(url_for('book_list'))
+    form = FlaskForm()
+    if request.form.get('confirm') and form.validate_on_submit():
+        delete_books(book_ids)
+        db.session.commit()
+        book_cache.delete_many(f'book_detail:{book_id}' for book_id in book_ids)
+        return redirect(url_for('book_list'))
+    return render_template('book_batch_confirm_delete.html', form=form, book_ids=book_ids)
+
+
+@app.route('/author/<int:id>')
+def author_detail(id):
+    """
+    Displays an author and the list of their books.
+
+    Args:
+        id (int): The ID of the author.
+
+    Returns:
+        A rendered template displaying the author's books.
+    """
+    author = db.get_or_404(Author, id)
+    books = db.session.scalars(db.select(Book).where(Book.author_id == id).order_by(Book.title)).all()
+    return render_template('author_detail.html', author=author, books=books)
+
+
 if __name__ == '__main__':
     """
     Starts the Flask application in debug mode for development purposes.
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCache:
+    """
+    An in-process LRU cache whose entries expire after ``ttl`` seconds.
+
+    Each worker process holds its own copy, so an edit handled by one worker
+    only invalidates that worker's entries; use ``RedisCache`` when several
+    workers serve the same database.
+
+    Attributes:
+        maxsize (int): The maximum number of entries kept.
+        ttl (float): The lifetime of an entry in seconds.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class RedisCache:
+    """
+    A cache shared by all workers, stored in Redis or a Redis-compatible
+    server. Eviction is left to the server's ``maxmemory-policy``
+    (e.g. ``allkeys-lru``); entries expire after ``ttl`` seconds.
+
+    Attributes:
+        ttl (int): The lifetime of an entry in seconds.
+    """
+
+    def __init__(self, url, ttl=300, prefix="library:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RedisCache requires the 'redis' package") from e
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self._prefix = prefix
+
+    def get(self, key):
+        value = self._client.get(self._prefix + key)
+        return value.decode() if value is not None else None
+
+    def set(self, key, value):
+        self._client.set(self._prefix + key, value, ex=self.ttl)
+
+    def delete(self, key):
+        self._client.delete(self._prefix + key)
+
+    def delete_many(self, keys):
+        keys = [self._prefix + key for key in keys]
+        if keys:
+            self._client.delete(*keys)
+
+
+def create_cache(url, maxsize=1024, ttl=300):
+    """
+    Creates the cache backend named by ``url``.
+
+    Args:
+        url (str): "local" for the in-process cache, or a ``redis://`` URL.
+        maxsize (int): The maximum number of entries of the local cache.
+        ttl (int): The lifetime of an entry in seconds.
+
+    Returns:
+        LocalCache | RedisCache: The cache backend.
+    """
+    if url == "local":
+        return LocalCache(maxsize, ttl)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url, ttl)
+    raise ValueError(f"Unsupported cache URL: {url}")
@@ -0,0 +1,114 @@
+from datetime import datetime, timezone
+
+from flask import Response, request
+from sqlalchemy import column, select, table, text
+from werkzeug.http import is_resource_modified
+
+# A single-row counter that triggers bump on every INSERT, UPDATE and DELETE
+# of books, so list pages are validated without scanning the table.
+LIST_VERSION_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS book_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO book_version (id, version, updated_at)
+    VALUES (1, 1, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+    """,
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS book_version_{event.lower()} AFTER {event} ON book{condition} BEGIN
+        UPDATE book_version
+        SET version = version + 1, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+        WHERE id = 1;
+    END
+    """
+    for event, condition in (
+        ('INSERT', ''),
+        ('UPDATE', ''),
+        # Purging soft deleted books changes no page
+        ('DELETE', ' WHEN old.deleted_at IS NULL'),
+    )
+]
+
+# A SELECT rather than text(), so sessions routing reads send it to the
+# same replica as the list itself, see replicas.py
+book_version = table('book_version', column('id'), column('version'), column('updated_at'))
+LIST_VERSION_SQL = select(book_version.c.version, book_version.c.updated_at).where(book_version.c.id == 1)
+
+
+def create_list_version(connection):
+    """
+    Creates the book version counter and its triggers if they do not exist yet.
+
+    Args:
+        connection (Connection): A connection inside a transaction.
+    """
+    for statement in LIST_VERSION_DDL:
+        connection.execute(text(statement))
+
+
+def list_validators(row):
+    """
+    Builds the validators of the book list from the version counter.
+
+    Args:
+        row (Row): The result of ``LIST_VERSION_SQL``.
+
+    Returns:
+        tuple: The (unquoted) strong ETag and the Last-Modified time.
+    """
+    updated_at = datetime.fromisoformat(row.updated_at)
+    return f'list-{row.version}-{updated_at:%Y%m%d%H%M%S%f}', updated_at
+
+
+def book_validators(book_id, updated_at):
+    """
+    Builds the validators of a book's detail page.
+
+    Args:
+        book_id (int): The ID of the book.
+        updated_at (datetime): When the book was last changed (naive UTC).
+
+    Returns:
+        tuple: The (unquoted) strong ETag and the Last-Modified time.
+    """
+    return f'book-{book_id}-{updated_at:%Y%m%d%H%M%S%f}', updated_at
+
+
+def set_validators(response, etag, last_modified):
+    """
+    Adds the ETag and Last-Modified headers to a response.
+
+    Args:
+        response (Response): The response.
+        etag (str): The unquoted strong ETag.
+        last_modified (datetime): When the resource last changed (naive UTC).
+
+    Returns:
+        Response: The same response.
+    """
+    response.set_etag(etag)
+    response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return response
+
+
+def not_modified(etag, last_modified):
+    """
+    Evaluates If-None-Match and If-Modified-Since of the current request.
+
+    Args:
+        etag (str): The unquoted strong ETag of the current representation.
+        last_modified (datetime): When it last changed (naive UTC).
+
+    Returns:
+        Response | None: An empty 304 response when the client's copy is
+        current, otherwise None.
+    """
+    last_modified = last_modified.replace(tzinfo=timezone.utc)
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    return set_validators(Response(status=304), etag, last_modified)
@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+import pytest
+from werkzeug.test import Client
+
+from book_cache import create_cache
+from instrumentation import REPEAT_THRESHOLD, query_budget as watch_queries
+
+# The tests use a database of their own; app reads the URL when imported
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'books.db'))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    A client of the app without CSRF checks, on empty tables and an empty
+    book cache.
+
+    Yields:
+        Client: The client.
+    """
+    import app as flask_app
+    from models import Author, Book, db
+
+    cache = create_cache('local')
+    monkeypatch.setattr(flask_app, 'book_cache', cache)
+    monkeypatch.setitem(flask_app.app.extensions, 'book_cache', cache)
+    monkeypatch.setitem(flask_app.app.config, 'WTF_CSRF_ENABLED', False)
+    with flask_app.app.app_context():
+        db.session.execute(db.delete(Book))
+        db.session.execute(db.delete(Author))
+        db.session.commit()
+    # Flask 2.3's test_client() reads werkzeug.__version__, gone in Werkzeug 3.1
+    yield Client(flask_app.app, flask_app.app.response_class)
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fails a test when the code in the block runs more than ``max_queries``
+    statements or repeats one (an N+1 pattern)::
+
+        def test_book_list(query_budget):
+            with query_budget(max_queries=2):
+                client.get('/')
+
+    Returns:
+        Callable: Takes ``max_queries`` and ``repeat_threshold`` and returns
+        a context manager watching the app's engines.
+    """
+    from app import app, db
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    def budget(max_queries=None, repeat_threshold=REPEAT_THRESHOLD):
+        return watch_queries(*engines, max_queries=max_queries, repeat_threshold=repeat_threshold)
+
+    return budget
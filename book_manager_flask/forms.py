@@ -1,6 +1,13 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, TextAreaField, DateField
-from wtforms.validators import DataRequired
+from flask_wtf.file import FileField, FileAllowed, FileRequired
+from datetime import date
+
+from wtforms import StringField, TextAreaField, DateField, IntegerField, SelectField
+from wtforms.validators import DataRequired, Length, NumberRange, Optional
+from wtforms.widgets import HiddenInput
+from werkzeug.datastructures import MultiDict
+
+from models import Author, Book
 
 
 class BookForm(FlaskForm):
@@ -33,3 +40,177 @@ class BookForm(FlaskForm):
         validators=[DataRequired()],
         description="Enter the published date in YYYY-MM-DD format."
     )
+
+
+class BookBatchForm(FlaskForm):
+    """
+    The same change applied to the books selected on the list page; blank
+    fields are left unchanged. The IDs of the books are the ``ids`` values
+    of the request.
+
+    Fields:
+        author (StringField): The new author of the books (optional).
+        published_date (DateField): The new publication date (optional).
+    """
+    author = StringField(
+        'Author',
+        validators=[Optional(), Length(max=100)],
+        description="Enter the new author's name, or leave blank."
+    )
+    published_date = DateField(
+        'Published Date',
+        format='%Y-%m-%d',
+        validators=[Optional()],
+        description="Enter the new published date in YYYY-MM-DD format, or leave blank."
+    )
+
+    def values(self):
+        """
+        Returns the column values to set.
+
+        Returns:
+            dict: The filled in fields, with an ``author`` name.
+        """
+        values = {}
+        if self.author.data and self.author.data.strip():
+            values['author'] = self.author.data.strip()
+        if self.published_date.data is not None:
+            values['published_date'] = self.published_date.data
+        return values
+
+
+class ImportForm(FlaskForm):
+    """
+    A form for uploading a file of books to import.
+
+    Fields:
+        file (FileField): A CSV or JSON Lines file of books (required).
+    """
+    file = FileField(
+        'File',
+        validators=[FileRequired(), FileAllowed(['csv', 'jsonl', 'ndjson'], 'CSV or JSON Lines files only.')],
+        description="Upload a .csv or .jsonl file with title, author, description and published_date."
+    )
+
+
+# Sort orders of the book list. Each one ends with the primary key so equal
+# values keep a stable order, and each follows an index of Book.
+BOOK_SORTS = {
+    '': (Book.id,),
+    'title': (Book.title.collate('NOCASE'), Book.id),
+    'author': (Author.name, Book.published_date, Book.id),
+    'published': (Book.published_date, Book.id),
+    '-published': (Book.published_date.desc(), Book.id.desc()),
+}
+
+
+def like_prefix(prefix):
+    """
+    Builds a LIKE pattern matching values starting with ``prefix``, with
+    its own wildcards escaped by a backslash.
+
+    Args:
+        prefix (str): The literal prefix.
+
+    Returns:
+        str: The pattern.
+    """
+    return prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+class BookFilterForm(FlaskForm):
+    """
+    Filters and sort order of the book list, read from the query string.
+
+    Every filter is answered from an index: ``author`` and the year range
+    from (author_id, published_date) and published_date, ``title`` as a
+    case-insensitive prefix from the NOCASE index on title.
+
+    Fields:
+        title (StringField): The start of the titles to list.
+        author (IntegerField): The ID of the author whose books to list.
+        year_from (IntegerField): The first year of publication to list.
+        year_to (IntegerField): The last year of publication to list.
+        sort (SelectField): A key of BOOK_SORTS.
+    """
+    class Meta:
+        csrf = False
+
+    title = StringField('Title starts with', validators=[Optional(), Length(max=150)])
+    author = IntegerField('Author', widget=HiddenInput(), validators=[Optional()])
+    year_from = IntegerField('From year', validators=[Optional(), NumberRange(1, 9999)])
+    year_to = IntegerField('To year', validators=[Optional(), NumberRange(1, 9999)])
+    sort = SelectField('Sort', choices=[
+        ('', 'Added'), ('title', 'Title'), ('author', 'Author'),
+        ('published', 'Oldest first'), ('-published', 'Newest first'),
+    ], default='')
+
+    def filter(self, query):
+        """
+        Applies the filters to a query of books joined with their authors;
+        invalid values are ignored.
+
+        Args:
+            query (Query): The books to filter.
+
+        Returns:
+            Query: The filtered and sorted books.
+        """
+        self.validate()
+        data = {field.name: field.data for field in self if not field.errors}
+        if data.get('title'):
+            # SQLite's LIKE ignores ASCII case and reads the NOCASE index
+            query = query.filter(Book.title.like(like_prefix(data['title']), escape='\\'))
+        if data.get('author') is not None:
+            query = query.filter(Book.author_id == data['author'])
+        if data.get('year_from') is not None:
+            query = query.filter(Book.published_date >= date(data['year_from'], 1, 1))
+        if data.get('year_to') is not None:
+            query = query.filter(Book.published_date <= date(data['year_to'], 12, 31))
+        return query.order_by(*BOOK_SORTS[data.get('sort') or ''])
+
+
+def validate_book(record):
+    """
+    Validates an imported row or API payload with the rules of ``BookForm``.
+
+    Args:
+        record (dict): String values of title, author, description and
+            published_date.
+
+    Returns:
+        tuple: Column values and None if the record is valid,
+        otherwise None and the form errors.
+    """
+    form = BookForm(formdata=MultiDict(record), meta={'csrf': False})
+    if not form.validate():
+        return None, form.errors
+    return {
+        'title': form.title.data,
+        'author': form.author.data.strip(),
+        'description': form.description.data,
+        'published_date': form.published_date.data,
+    }, None
+
+
+def validate_book_fields(record):
+    """
+    Validates some fields of a book with the rules of ``BookForm``, for
+    partial updates.
+
+    Args:
+        record (dict): String values of any of title, author, description
+            and published_date.
+
+    Returns:
+        tuple: The column values of the fields and None if they are valid,
+        otherwise None and the errors of the invalid fields.
+    """
+    form = BookForm(formdata=MultiDict(record), meta={'csrf': False})
+    errors = {name: form[name].errors for name in record if not form[name].validate(form)}
+    if errors:
+        return None, errors
+    values = {name: form[name].data for name in record}
+    if 'author' in values:
+        values['author'] = values['author'].strip()
+    return values, None
@@ -0,0 +1,49 @@
+"""
+Production server: gunicorn with 2 * CPUs + 1 synchronous workers unless
+WEB_CONCURRENCY says otherwise. Run from this directory:
+
+    gunicorn -c gunicorn.conf.py
+
+The app is imported once, in the master process, before the workers are
+forked: the migrations run once and the workers share the compiled
+templates and the rest of the app copy-on-write. Debug mode and template
+reloading are off. `python app.py` stays the development server.
+"""
+import gc
+import os
+
+# Development paths are off whatever the environment says, and the
+# master migrates the database instead of every worker
+os.environ['FLASK_DEBUG'] = '0'
+os.environ['MIGRATE_ON_STARTUP'] = '0'
+
+wsgi_app = 'app:app'
+bind = os.getenv('BIND', '127.0.0.1:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', 2 * (os.cpu_count() or 1) + 1))
+preload_app = True
+
+# A collection in the master would only touch pages the workers are about
+# to share, see when_ready
+gc.disable()
+
+
+def when_ready(server):
+    """
+    Runs in the master once the app is loaded, before the first fork.
+    """
+    from app import app, create_schema
+    from models import db
+
+    create_schema()
+    # The workers open their own connections, those of the migrations
+    # must not be shared across processes
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    # The objects of the preloaded app are left out of every collection, so
+    # the workers' collections do not write to their pages and copy them
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
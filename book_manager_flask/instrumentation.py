@@ -0,0 +1,364 @@
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Response, before_render_template, g, request, template_rendered
+from sqlalchemy import event
+
+logger = logging.getLogger('library.instrumentation')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+MAX_LOGGED_QUERIES = 50
+# A statement run this many times in one request, with only its parameters
+# changing, is reported as a likely N+1 query
+REPEAT_THRESHOLD = 3
+
+_current_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """
+    Timings of one request, collected while it is handled.
+
+    Attributes:
+        db_time (float): Seconds spent executing SQL.
+        render_time (float): Seconds spent rendering templates.
+        queries (list): ``(statement, seconds)`` of every query, in order.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.queries = []
+        self.render_started = None
+        self.status = 500
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current_stats():
+    """
+    Returns the stats of the request being handled, or None outside of an
+    instrumented request.
+    """
+    return _current_stats.get()
+
+
+class Histogram:
+    """
+    A Prometheus histogram with one series per label combination.
+
+    Attributes:
+        name (str): The metric name.
+        help (str): The metric description.
+        label_names (tuple): The names of the labels of every series.
+        buckets (tuple): Upper bounds of the buckets, in increasing order.
+    """
+
+    def __init__(self, name, help, label_names, buckets):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def expose(self):
+        """
+        Formats the histogram in the Prometheus text exposition format.
+
+        Returns:
+            list[str]: The lines of the metric.
+        """
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                label_text = ','.join(
+                    f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels)
+                )
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+                lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+                lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """
+    Per-route request histograms: total time, SQL time, render time and
+    query count, labelled by method, route template and status code.
+    """
+
+    def __init__(self, prefix='library'):
+        labels = ('method', 'route', 'status')
+        self.histograms = [
+            Histogram(f'{prefix}_request_duration_seconds', 'Total request time.', labels, DURATION_BUCKETS),
+            Histogram(f'{prefix}_request_db_seconds', 'Time spent executing SQL.', labels, DURATION_BUCKETS),
+            Histogram(f'{prefix}_request_render_seconds', 'Time spent rendering templates.', labels, DURATION_BUCKETS),
+            Histogram(f'{prefix}_request_queries', 'SQL statements per request.', labels, QUERY_COUNT_BUCKETS),
+        ]
+
+    def observe(self, method, route, status, stats, total):
+        labels = (method, route, str(status))
+        values = (total, stats.db_time, stats.render_time, stats.query_count)
+        for histogram, value in zip(self.histograms, values):
+            histogram.observe(labels, value)
+
+    def expose(self):
+        """
+        Returns:
+            str: Every metric in the Prometheus text exposition format.
+        """
+        return '\n'.join(line for histogram in self.histograms for line in histogram.expose()) + '\n'
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised by ``query_budget`` when the checked code runs too many queries
+    or repeats a statement.
+    """
+
+
+def normalize_statement(statement):
+    """
+    Reduces a statement to its shape: literals and IN lists become ``?`` and
+    whitespace is collapsed, so statements differing only by their
+    parameters compare equal.
+
+    Args:
+        statement (str): The SQL statement.
+
+    Returns:
+        str: The normalized statement.
+    """
+    statement = re.sub(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b", '?', statement)
+    statement = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(?)', statement)
+    return ' '.join(statement.split())
+
+
+def repeated_statements(statements, threshold=REPEAT_THRESHOLD):
+    """
+    Finds statements run at least ``threshold`` times.
+
+    Args:
+        statements (Iterable[str]): The executed statements, in order.
+        threshold (int): The number of runs that counts as repeated.
+
+    Returns:
+        list: ``(normalized statement, count)``, most repeated first.
+    """
+    counts = Counter(normalize_statement(statement) for statement in statements)
+    return [(statement, count) for statement, count in counts.most_common() if count >= threshold]
+
+
+def query_problems(statements, max_queries=None, repeat_threshold=REPEAT_THRESHOLD):
+    """
+    Checks executed statements against a query budget.
+
+    Args:
+        statements (list[str]): The executed statements, in order.
+        max_queries (int | None): The number of statements allowed; None
+            does not limit it.
+        repeat_threshold (int | None): Runs of one statement that count as
+            an N+1 pattern; None allows any repetition.
+
+    Returns:
+        list[str]: A description of every problem found.
+    """
+    problems = []
+    if max_queries is not None and len(statements) > max_queries:
+        problems.append(f'{len(statements)} queries, budget is {max_queries}')
+    if repeat_threshold is not None:
+        for statement, count in repeated_statements(statements, repeat_threshold):
+            problems.append(f'{count} x {statement}')
+    return problems
+
+
+@contextmanager
+def query_budget(*engines, max_queries=None, repeat_threshold=REPEAT_THRESHOLD):
+    """
+    Records every statement run through ``engines`` inside the block and
+    fails if the block exceeds its budget or repeats a statement::
+
+        with query_budget(engine, max_queries=2):
+            client.get('/')
+
+    Args:
+        *engines (Engine): The engines to watch.
+        max_queries (int | None): The number of statements allowed.
+        repeat_threshold (int | None): Runs of one statement that count as
+            an N+1 pattern; None allows any repetition.
+
+    Yields:
+        list[str]: The statements executed so far.
+
+    Raises:
+        QueryBudgetExceeded: If the budget was exceeded.
+    """
+    statements = []
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for engine in engines:
+        event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, 'after_cursor_execute', after_cursor_execute)
+    problems = query_problems(statements, max_queries, repeat_threshold)
+    if problems:
+        raise QueryBudgetExceeded('Query budget exceeded:\n  ' + '\n  '.join(problems))
+
+
+def finish_request(metrics, slow_request_seconds, method, route, status, stats, max_queries=None):
+    """
+    Records a finished request and logs it with its SQL when it was slow.
+
+    Args:
+        metrics (Metrics): The histograms to update.
+        slow_request_seconds (float): Requests taking at least this long are logged.
+        method (str): The HTTP method.
+        route (str): The route rule, e.g. "/book/<int:id>".
+        status (int): The response status code.
+        stats (RequestStats): The timings of the request.
+        max_queries (int | None): When set, requests running more queries
+            or repeating a statement are logged as well.
+    """
+    total = stats.elapsed()
+    metrics.observe(method, route, status, stats, total)
+    if max_queries is not None:
+        problems = query_problems([statement for statement, _ in stats.queries], max_queries)
+        if problems:
+            logger.warning('Query problems in %s %s:\n  %s', method, route, '\n  '.join(problems))
+    if total < slow_request_seconds:
+        return
+    queries = ''.join(
+        f'\n  {seconds * 1000:8.2f} ms  {statement}' for statement, seconds in stats.queries[:MAX_LOGGED_QUERIES]
+    )
+    logger.warning(
+        'Slow request %s %s -> %s: %.1f ms total, %.1f ms SQL in %d queries, %.1f ms rendering%s',
+        method, route, status, total * 1000, stats.db_time * 1000, stats.query_count,
+        stats.render_time * 1000, queries,
+    )
+
+
+def instrument_engine(engine):
+    """
+    Times every statement executed through ``engine`` and adds it to the
+    stats of the current request.
+
+    Args:
+        engine (Engine): The engine of the database.
+    """
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['query_started'].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.db_time += seconds
+            stats.queries.append((statement, seconds))
+
+
+def init_instrumentation(app, engine, slow_request_seconds=0.5, max_queries=None, expose_metrics=True):
+    """
+    Records the timings of every request of ``app`` and exposes them on
+    ``/metrics``.
+
+    SQL is timed through engine events and rendering through Flask's
+    template signals. Streamed responses are measured until the view
+    returns, not until their last chunk is sent.
+
+    Args:
+        app (Flask): The application.
+        engine (Engine): The engine of the database.
+        slow_request_seconds (float): Requests taking at least this long are logged.
+        max_queries (int | None): When set, requests running more queries or
+            repeating a statement are logged.
+        expose_metrics (bool): Whether to add the ``/metrics`` endpoint.
+
+    Returns:
+        Metrics: The histograms.
+    """
+    metrics = Metrics()
+    instrument_engine(engine)
+
+    @app.before_request
+    def start_request():
+        g.request_stats_token = _current_stats.set(RequestStats())
+
+    @app.after_request
+    def record_status(response):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish(exception):
+        token = g.pop('request_stats_token', None)
+        if token is None:
+            return
+        stats = _current_stats.get()
+        _current_stats.reset(token)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        finish_request(metrics, slow_request_seconds, request.method, route, stats.status, stats, max_queries)
+
+    def render_started(sender, template, context, **extra):
+        stats = _current_stats.get()
+        if stats is not None and stats.render_started is None:
+            stats.render_started = (template, time.perf_counter())
+
+    def render_finished(sender, template, context, **extra):
+        stats = _current_stats.get()
+        if stats is not None and stats.render_started is not None and stats.render_started[0] is template:
+            stats.render_time += time.perf_counter() - stats.render_started[1]
+            stats.render_started = None
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+    if expose_metrics:
+        @app.route('/metrics')
+        def metrics_endpoint():
+            """
+            Exposes the request histograms in the Prometheus text format.
+
+            Returns:
+                The metrics as plain text.
+            """
+            return Response(metrics.expose(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
@@ -0,0 +1,36 @@
+"""
+Moves author names out of ``book`` into the new ``author`` table.
+
+Every distinct name, with surrounding whitespace stripped, becomes one
+author and books refer to it by ``author_id``; books without a name get an
+"Unknown" author. The full-text index read ``book.author``, so it is
+dropped first and built again over the author names at startup.
+"""
+from sqlalchemy import text
+
+UNKNOWN_AUTHOR = "Unknown"
+
+STATEMENTS = [
+    "DROP TRIGGER IF EXISTS book_fts_insert",
+    "DROP TRIGGER IF EXISTS book_fts_delete",
+    "DROP TRIGGER IF EXISTS book_fts_update",
+    "DROP TABLE IF EXISTS book_fts",
+    "CREATE TABLE author (id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, PRIMARY KEY (id), UNIQUE (name))",
+    """
+    INSERT INTO author (name)
+    SELECT DISTINCT coalesce(nullif(trim(author), ''), :unknown) FROM book ORDER BY 1
+    """,
+    "ALTER TABLE book ADD COLUMN author_id INTEGER REFERENCES author (id)",
+    """
+    UPDATE book SET author_id = (
+        SELECT id FROM author WHERE name = coalesce(nullif(trim(book.author), ''), :unknown)
+    )
+    """,
+    "CREATE INDEX ix_book_author_id ON book (author_id)",
+    "ALTER TABLE book DROP COLUMN author",
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS:
+        connection.execute(text(statement), {"unknown": UNKNOWN_AUTHOR})
@@ -0,0 +1,19 @@
+"""
+Adds the indexes behind the filters and sort orders of the book list.
+
+(author_id, published_date) also serves lookups by author alone, so it
+replaces ``ix_book_author_id``.
+"""
+from sqlalchemy import text
+
+STATEMENTS = [
+    "DROP INDEX IF EXISTS ix_book_author_id",
+    "CREATE INDEX ix_book_author_id_published_date ON book (author_id, published_date)",
+    "CREATE INDEX ix_book_published_date ON book (published_date)",
+    'CREATE INDEX ix_book_title_nocase ON book (title COLLATE "NOCASE")',
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS:
+        connection.execute(text(statement))
@@ -1,6 +1,33 @@
+from datetime import datetime, timezone
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from database import MAX_BOUND_PARAMETERS, chunked
+from replicas import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Author(db.Model):
+    """
+    Represents an author; books refer to it by ``author_id``.
 
-db = SQLAlchemy()
+    Attributes:
+        id (int): The unique identifier for the author.
+        name (str): The author's name (unique, max 100 characters).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+
+    def __str__(self):
+        return self.name
 
 
 class Book(db.Model):
@@ -10,15 +37,34 @@ class Book(db.Model):
     Attributes:
         id (int): The unique identifier for the book.
         title (str): The title of the book (required, max 150 characters).
-        author (str): The author of the book (required, max 100 characters).
+        author_id (int): The ID of the book's author.
+        author (Author): The book's author; load it with ``joinedload``
+            when listing books.
         description (str): A brief description of the book (optional).
         published_date (date): The publication date of the book (optional).
+        updated_at (datetime): When the book was last changed (UTC), the
+            Last-Modified time of its pages.
+        deleted_at (datetime): When the book was deleted (UTC), or None.
+            Deleted books are left out of every ORM query, see
+            exclude_deleted_books, until `flask purge-books` removes them.
     """
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
-    author = db.Column(db.String(100), nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('author.id'), nullable=False)
+    author = db.relationship(Author)
     description = db.Column(db.Text)
     published_date = db.Column(db.Date)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    deleted_at = db.Column(db.DateTime)
+
+    # Back the filters and sort orders of the book list, see BookFilterForm,
+    # and the purge of deleted books
+    __table_args__ = (
+        db.Index('ix_book_author_id_published_date', author_id, published_date),
+        db.Index('ix_book_published_date', published_date),
+        db.Index('ix_book_title_nocase', title.collate('NOCASE')),
+        db.Index('ix_book_deleted_at', deleted_at, sqlite_where=deleted_at.isnot(None)),
+    )
 
     def __repr__(self):
         """
@@ -28,3 +74,127 @@ class Book(db.Model):
             str: A string containing the book's title.
         """
         return f"<Book {self.title}>"
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def exclude_deleted_books(execute_state):
+    """
+    Adds ``deleted_at IS NULL`` to every ORM SELECT and UPDATE of books, so
+    deleted books are neither shown nor changed. Statements run with the
+    ``include_deleted`` execution option see them.
+
+    Args:
+        execute_state (ORMExecuteState): The statement about to run.
+    """
+    if (
+        (execute_state.is_select or execute_state.is_update)
+        and not execute_state.is_column_load
+        and not execute_state.execution_options.get('include_deleted', False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Book, Book.deleted_at.is_(None), include_aliases=True)
+        )
+
+
+def book_columns(fields):
+    """
+    Maps book fields to the columns selecting them; ``author`` is the
+    author's name, so queries using it must join ``Book.author``.
+
+    Args:
+        fields (Iterable[str]): Field names, e.g. ('id', 'title', 'author').
+
+    Returns:
+        list: The columns, labelled with the field names.
+    """
+    return [Author.name.label(field) if field == 'author' else getattr(Book, field) for field in fields]
+
+
+def get_authors(names):
+    """
+    Looks up authors by name, creating the missing ones with a single
+    INSERT OR IGNORE.
+
+    Args:
+        names (Iterable[str]): Author names, already stripped.
+
+    Returns:
+        dict: The Author of every name.
+    """
+    names = set(names)
+    db.session.execute(sqlite_insert(Author).on_conflict_do_nothing(), [{'name': name} for name in names])
+    return {author.name: author for author in db.session.scalars(db.select(Author).where(Author.name.in_(names)))}
+
+
+def get_author(name):
+    """
+    Returns the author with a name, creating it if needed.
+
+    Args:
+        name (str): The author's name, already stripped.
+
+    Returns:
+        Author: The author.
+    """
+    return get_authors([name])[name]
+
+
+def link_authors(rows):
+    """
+    Replaces the author name of validated book rows by its ``author_id``,
+    looking up the authors of the whole batch at once.
+
+    Args:
+        rows (list[dict]): Column values with an ``author`` name.
+
+    Returns:
+        list[dict]: The column values with ``author_id`` instead.
+    """
+    authors = get_authors(row['author'] for row in rows)
+    return [
+        {**{key: value for key, value in row.items() if key != 'author'}, 'author_id': authors[row['author']].id}
+        for row in rows
+    ]
+
+
+def update_books(book_ids, values, chunk_size=None):
+    """
+    Sets the same column values on many books with one
+    ``UPDATE ... WHERE id IN (...)`` per chunk of ids, in the session's
+    transaction.
+
+    Args:
+        book_ids (list[int]): The books to change.
+        values (dict): Column values, with an ``author`` name instead of
+            ``author_id``.
+        chunk_size (int | None): Ids per statement; by default as many as
+            the bound parameter limit leaves room for.
+
+    Returns:
+        int: The number of books changed.
+    """
+    if 'author' in values:
+        values = link_authors([values])[0]
+    # One more parameter sets updated_at
+    chunk_size = chunk_size or MAX_BOUND_PARAMETERS - len(values) - 1
+    statement = db.update(Book).values(**values).execution_options(synchronize_session=False)
+    return sum(
+        db.session.execute(statement.where(Book.id.in_(chunk))).rowcount for chunk in chunked(book_ids, chunk_size)
+    )
+
+
+def delete_books(book_ids, chunk_size=None):
+    """
+    Marks many books deleted with one ``UPDATE ... WHERE id IN (...)`` per
+    chunk of ids, in the session's transaction. `flask purge-books` removes
+    them later.
+
+    Args:
+        book_ids (list[int]): The books to delete.
+        chunk_size (int | None): Ids per statement; by default as many as
+            the bound parameter limit leaves room for.
+
+    Returns:
+        int: The number of books deleted.
+    """
+    return update_books(book_ids, {'deleted_at': utcnow()}, chunk_size)
@@ -0,0 +1,112 @@
+import contextvars
+import random
+import sqlite3
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+
+# Cookie marking a client that wrote recently; its reads stay on the primary
+# until the replicas have caught up
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_use_primary = contextvars.ContextVar('use_primary', default=False)
+
+
+@contextmanager
+def use_primary(pinned=True):
+    """
+    Makes sessions created inside the block read from the primary.
+
+    Args:
+        pinned (bool): Whether to pin; False leaves the routing as it is.
+    """
+    token = _use_primary.set(pinned or _use_primary.get())
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class RoutingSession(Session):
+    """
+    A session sending SELECT statements to a read replica and everything
+    else to the primary.
+
+    The replicas are the binds named by the ``REPLICA_BINDS`` setting. One
+    is picked when the session is created, so all reads of a request see
+    the same copy. Once the session ran anything but a SELECT (a flush, an
+    INSERT, raw SQL) it stays on the primary and reads its own writes.
+    Sessions created inside ``use_primary()`` never use a replica.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        replicas = current_app.config.get('REPLICA_BINDS', [])
+        self.replica = db.engines[random.choice(replicas)] if replicas and not _use_primary.get() else None
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.replica is not None:
+            if getattr(clause, 'is_select', False) and not self._flushing:
+                return self.replica
+            self.replica = None
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_replicas(app, pin_seconds=10):
+    """
+    Pins a client to the primary after it wrote.
+
+    Requests other than GET, HEAD and OPTIONS run inside ``use_primary()``
+    and set a cookie that keeps the client's following requests there for
+    ``pin_seconds``, while the replicas catch up.
+
+    Args:
+        app (Flask): The application.
+        pin_seconds (int): How long a client reads from the primary after a write.
+    """
+    @app.before_request
+    def pin_to_primary():
+        if request.method not in SAFE_METHODS or PIN_COOKIE in request.cookies:
+            g.primary_pin = use_primary()
+            g.primary_pin.__enter__()
+
+    @app.after_request
+    def set_pin_cookie(response):
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(PIN_COOKIE, '1', max_age=pin_seconds, httponly=True, samesite='Lax')
+        return response
+
+    @app.teardown_request
+    def unpin(exc):
+        pin = g.pop('primary_pin', None)
+        if pin is not None:
+            pin.__exit__(None, None, None)
+
+
+def copy_sqlite_database(source_url, target_url):
+    """
+    Copies an SQLite database onto a replica file with the backup API, which
+    takes a consistent snapshot even while the source is written in WAL mode.
+
+    Args:
+        source_url (str | URL): The URL of the primary.
+        target_url (str | URL): The URL of the replica.
+
+    Raises:
+        ValueError: If either URL is not an SQLite file.
+    """
+    paths = []
+    for url in (make_url(source_url), make_url(target_url)):
+        if url.get_backend_name() != 'sqlite' or not url.database:
+            raise ValueError(f'Not an SQLite file: {url}')
+        paths.append(url.database)
+    source = sqlite3.connect(paths[0])
+    target = sqlite3.connect(paths[1])
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
@@ -0,0 +1,109 @@
+import re
+
+from sqlalchemy import column, literal_column, select, table, text
+
+# Contentless FTS5 index over the book table and author names. The triggers
+# pass every indexed value, since the author name lives in another table,
+# and renaming an author reindexes its books. Searches join book on the rowid.
+# A soft deleted book is taken out of the index when it is marked, so the
+# purge that deletes its row later leaves the index alone.
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5(title, author, description, content='')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_insert AFTER INSERT ON book BEGIN
+        INSERT INTO book_fts (rowid, title, author, description)
+        SELECT new.id, new.title, name, new.description FROM author WHERE id = new.author_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_delete AFTER DELETE ON book WHEN old.deleted_at IS NULL BEGIN
+        INSERT INTO book_fts (book_fts, rowid, title, author, description)
+        SELECT 'delete', old.id, old.title, name, old.description FROM author WHERE id = old.author_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS book_fts_update AFTER UPDATE ON book BEGIN
+        INSERT INTO book_fts (book_fts, rowid, title, author, description)
+        SELECT 'delete', old.id, old.title, name, old.description FROM author
+        WHERE id = old.author_id AND old.deleted_at IS NULL;
+        INSERT INTO book_fts (rowid, title, author, description)
+        SELECT new.id, new.title, name, new.description FROM author
+        WHERE id = new.author_id AND new.deleted_at IS NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS author_fts_update AFTER UPDATE OF name ON author BEGIN
+        INSERT INTO book_fts (book_fts, rowid, title, author, description)
+        SELECT 'delete', id, title, old.name, description FROM book WHERE author_id = old.id AND deleted_at IS NULL;
+        INSERT INTO book_fts (rowid, title, author, description)
+        SELECT id, title, new.name, description FROM book WHERE author_id = new.id AND deleted_at IS NULL;
+    END
+    """,
+]
+
+INDEX_BOOKS_SQL = """
+    INSERT INTO book_fts (rowid, title, author, description)
+    SELECT book.id, book.title, author.name, book.description
+    FROM book JOIN author ON author.id = book.author_id
+    WHERE book.deleted_at IS NULL
+"""
+
+book_fts = table("book_fts", column("rowid"), column("rank"))
+
+
+def create_search_index(connection):
+    """
+    Creates the FTS5 table and its triggers if they do not exist yet, and
+    indexes the books already in the table when the index is new.
+
+    Args:
+        connection (Connection): A connection inside a transaction.
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'book_fts'")
+    ).first()
+    for statement in SEARCH_INDEX_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        connection.execute(text(INDEX_BOOKS_SQL))
+
+
+def match_expression(query):
+    """
+    Turns user input into an FTS5 query matching every word as a prefix.
+
+    Args:
+        query (str): The search text, e.g. "tolk ring".
+
+    Returns:
+        str | None: The MATCH expression, e.g. '"tolk"* "ring"*', or None
+        when the input has no searchable words.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_statement(expression, limit, offset):
+    """
+    Builds the ranked search query for one page of results.
+
+    Args:
+        expression (str): A MATCH expression from ``match_expression``.
+        limit (int): The number of rows to return.
+        offset (int): The number of best-ranked rows to skip.
+
+    Returns:
+        Select: ``rowid`` and ``rank`` of the matching books, best first;
+        join it to ``book`` as a subquery and order by ``rank``.
+    """
+    return (
+        select(book_fts.c.rowid, book_fts.c.rank)
+        .where(literal_column("book_fts").op("MATCH")(expression))
+        .order_by(book_fts.c.rank)
+        .limit(limit)
+        .offset(offset)
+    )
@@ -0,0 +1,180 @@
+import json
+import re
+
+import pytest
+from sqlalchemy import event
+
+from database import engine_options
+from instrumentation import QueryBudgetExceeded
+
+
+def add_books(client, *titles, author='Frank Herbert', published_date='1965-08-01'):
+    books = [{'title': title, 'author': author, 'published_date': published_date} for title in titles]
+    response = client.post('/api/books/batch', json=books)
+    assert response.status_code == 201
+    return [book['id'] for book in response.json]
+
+
+def add_library(client):
+    # Several authors, so loading each book's author lazily repeats a statement
+    ids = []
+    for author in ('Frank Herbert', 'Jane Austen', 'Ursula K. Le Guin'):
+        ids += add_books(client, f'{author} 1', f'{author} 2', author=author)
+    return ids
+
+
+def listed_titles(html):
+    return re.findall(r'<a href="/book/\d+">([^<]*)</a>', html)
+
+
+def test_api_keyset_pages_follow_each_other(client):
+    ids = add_books(client, 'Dune', 'Dune Messiah', 'Children of Dune')
+    page = client.get('/api/books', query_string={'limit': 2, 'fields': 'title'}).json
+    assert page['items'] == [{'id': ids[0], 'title': 'Dune'}, {'id': ids[1], 'title': 'Dune Messiah'}]
+    assert page['next_cursor'] == ids[1]
+    page = client.get('/api/books', query_string={'limit': 2, 'after': ids[1], 'fields': 'title'}).json
+    assert page == {'items': [{'id': ids[2], 'title': 'Children of Dune'}], 'next_cursor': None}
+    # A full last page has no next page either
+    page = client.get('/api/books', query_string={'limit': 3}).json
+    assert len(page['items']) == 3
+    assert page['next_cursor'] is None
+
+
+def test_tampered_cursor(client):
+    ids = add_books(client, 'Dune', 'Emma')
+    # An after that is not an id is ignored and the list starts over
+    page = client.get('/api/books', query_string={'after': '1 OR 1=1'}).json
+    assert [item['id'] for item in page['items']] == ids
+    page = client.get('/api/books', query_string={'after': ids[-1] + 100}).json
+    assert page == {'items': [], 'next_cursor': None}
+    response = client.get('/api/books', query_string={'limit': 0})
+    assert response.status_code == 400
+
+
+def test_book_must_be_a_json_object(client):
+    book_id, = add_books(client, 'Dune')
+    # json=None would send no body at all
+    for payload in ('null', '["Dune"]', '"Dune"'):
+        response = client.post('/api/books', data=payload, content_type='application/json')
+        assert response.status_code == 400
+        assert response.json == {'error': 'Expected a JSON object'}
+        response = client.patch(f'/api/books/{book_id}', data=payload, content_type='application/json')
+        assert response.status_code == 400
+    assert client.get(f'/api/books/{book_id}').json['title'] == 'Dune'
+
+
+def test_streamed_export(client):
+    ids = add_books(client, 'Dune', 'Emma')
+    response = client.get('/export', query_string={'format': 'jsonl'})
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'attachment' in response.headers['Content-Disposition']
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(row['id'], row['title'], row['author']) for row in rows] == [
+        (ids[0], 'Dune', 'Frank Herbert'), (ids[1], 'Emma', 'Frank Herbert')
+    ]
+
+
+def test_book_pages_within_budget(client, query_budget):
+    ids = add_library(client)
+    with query_budget(max_queries=2):
+        html = client.get('/').get_data(as_text=True)
+    assert len(listed_titles(html)) == 6
+    with query_budget(max_queries=2):
+        client.get('/', query_string={'sort': 'author'})
+    with query_budget(max_queries=2):
+        client.get(f'/book/{ids[0]}')
+    # Cached, only the validators are read
+    with query_budget(max_queries=1):
+        client.get(f'/book/{ids[0]}')
+    author_id = re.search(r'href="/author/(\d+)"', html).group(1)
+    with query_budget(max_queries=2):
+        html = client.get(f'/author/{author_id}').get_data(as_text=True)
+    assert len(listed_titles(html)) == 2
+    with query_budget(max_queries=1):
+        client.get('/api/books')
+
+
+def test_repeated_statement_fails(client, query_budget):
+    ids = add_library(client)
+    with pytest.raises(QueryBudgetExceeded, match='x SELECT'):
+        with query_budget():
+            for book_id in ids:
+                client.get(f'/api/books/{book_id}')
+
+
+def test_over_budget_fails(client, query_budget):
+    add_library(client)
+    with pytest.raises(QueryBudgetExceeded, match='2 queries, budget is 1'):
+        with query_budget(max_queries=1):
+            client.get('/')
+
+
+def query_plan(**params):
+    from flask import request
+
+    from app import app
+    from forms import BookFilterForm
+    from models import Book, db
+
+    executed = []
+
+    def capture(connection, cursor, sql, parameters, context, executemany):
+        executed.append((sql, parameters))
+
+    with app.test_request_context(query_string=params):
+        query = BookFilterForm(request.args).filter(Book.query.join(Book.author).options(db.contains_eager(Book.author)))
+        # The statement as sent, with the criteria leaving out deleted books
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            query.all()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+        sql, parameters = executed[-1]
+        rows = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', parameters).all()
+    return '\n'.join(row[3] for row in rows)
+
+
+@pytest.fixture
+def author_id(client):
+    from app import app
+    from models import Author, db
+
+    add_books(client, 'Dune', 'Dune Messiah', published_date='1965-08-01')
+    add_books(client, 'Emma', author='Jane Austen', published_date='1815-12-23')
+    with app.app_context():
+        return db.session.scalar(db.select(Author.id).where(Author.name == 'Frank Herbert'))
+
+
+def test_every_filter_searches_an_index(author_id):
+    for params in [
+        {'title': 'dune'},
+        {'author': author_id},
+        {'year_from': 1960, 'year_to': 1969},
+        {'author': author_id, 'year_from': 1960, 'year_to': 1969},
+        # In id order SQLite rather reads the table in order than sorts an open range
+        {'year_from': 1960, 'sort': 'published'},
+    ]:
+        plan = query_plan(**params)
+        assert 'SEARCH book USING INDEX' in plan, params
+        assert not re.search(r'(?m)^SCAN book$', plan), params
+
+
+def test_sorts_read_an_index_in_order(author_id):
+    for params in [
+        {'sort': 'title'},
+        {'sort': 'published'},
+        {'sort': '-published'},
+        {'sort': 'author'},
+        {'title': 'dune', 'sort': 'title'},
+        {'author': author_id, 'sort': 'published'},
+        {'year_from': 1960, 'sort': '-published'},
+    ]:
+        plan = query_plan(**params)
+        assert 'TEMP B-TREE' not in plan, params
+        assert not re.search(r'(?m)^SCAN book$', plan), params
+
+
+def test_only_sqlite_urls_are_accepted():
+    with pytest.raises(ValueError, match='only SQLite URLs are supported'):
+        engine_options('postgresql://library@localhost/library')
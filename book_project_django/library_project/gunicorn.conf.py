@@ -0,0 +1,47 @@
+"""
+Production server: gunicorn with 2 * CPUs + 1 synchronous workers unless
+WEB_CONCURRENCY says otherwise. Run from this directory, after
+``python manage.py migrate`` and ``python manage.py collectstatic``:
+
+    gunicorn -c gunicorn.conf.py
+
+The project is loaded and its templates compiled once, in the master
+process, before the workers are forked, so the workers share them
+copy-on-write. DEBUG is off, set ALLOWED_HOSTS for the host names served.
+`python manage.py runserver` stays the development server.
+"""
+import gc
+import os
+
+# Development paths are off whatever the environment says
+os.environ['DJANGO_DEBUG'] = '0'
+
+wsgi_app = 'library_project.wsgi:application'
+bind = os.getenv('BIND', '127.0.0.1:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', 2 * (os.cpu_count() or 1) + 1))
+preload_app = True
+
+# A collection in the master would only touch pages the workers are about
+# to share, see when_ready
+gc.disable()
+
+
+def when_ready(server):
+    """
+    Runs in the master once the app is loaded, before the first fork.
+    """
+    from django.db import connections
+
+    from library.preload import precompile_templates
+
+    precompile_templates()
+    # The workers open their own connections, none may be shared across
+    # processes
+    connections.close_all()
+    # The objects of the preloaded app are left out of every collection, so
+    # the workers' collections do not write to their pages and copy them
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
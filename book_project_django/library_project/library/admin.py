@@ -1,7 +1,8 @@
 # library/admin.py
 from django.contrib import admin
-from .models import Book
+from .models import Author, Book
 
 # Регистрация модели Book
 admin.site.register(Book)
+admin.site.register(Author)
     
\ No newline at end of file
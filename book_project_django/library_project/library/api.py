@@ -0,0 +1,280 @@
+# library/api.py
+import hashlib
+import json
+
+import orjson
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST
+
+from .book_io import link_authors
+from .forms import BookForm
+from .models import Author, Book
+from .views import MAX_BATCH_IDS, book_detail_cache_key
+
+API_FIELDS = ('title', 'author', 'description', 'published_date')
+# ORM lookups of API_FIELDS; the author is returned by name
+API_LOOKUPS = {field: 'author__name' if field == 'author' else field for field in API_FIELDS}
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 1000
+
+
+class OrjsonResponse(HttpResponse):
+    """
+    An HttpResponse that serializes its data with orjson, which also handles dates.
+    """
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS), **kwargs)
+
+
+def book_json(book):
+    """
+    Converts a book to the JSON API representation.
+
+    Args:
+        book (Book): The book.
+
+    Returns:
+        dict: The id and fields of the book.
+    """
+    return {
+        'id': book.pk, 'title': book.title, 'author': book.author.name,
+        'description': book.description, 'published_date': book.published_date,
+    }
+
+
+def conditional(request, response):
+    """
+    Adds a strong ETag computed from the body of a GET response and answers
+    a matching If-None-Match with 304.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        response (HttpResponse): The JSON response.
+
+    Returns:
+        HttpResponse: The response, or a 304 response.
+    """
+    etag = f'"{hashlib.md5(response.content).hexdigest()}"'
+    response['ETag'] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def parse_json(request):
+    try:
+        return json.loads(request.body)
+    except ValueError:
+        return None
+
+
+def form_errors(form):
+    return {field: list(messages) for field, messages in form.errors.items()}
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def book_collection(request):
+    """
+    Lists books a keyset page at a time (GET) or creates a book (POST).
+
+    GET query parameters: ``after`` (the id of the last book on the previous
+    page), ``limit`` and ``fields`` (comma-separated fields to return besides
+    id; all by default).
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        OrjsonResponse: The page of books and the cursor of the next one,
+        or the created book with status 201.
+    """
+    if request.method == 'POST':
+        form = BookForm(data=parse_json(request) or {})
+        if not form.is_valid():
+            return OrjsonResponse({'errors': form_errors(form)}, status=400)
+        return OrjsonResponse(book_json(form.save()), status=201)
+
+    try:
+        after = int(request.GET['after']) if 'after' in request.GET else None
+        limit = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        return OrjsonResponse({'error': 'after and limit must be integers'}, status=400)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return OrjsonResponse({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}, status=400)
+    fields = request.GET.get('fields')
+    selected = API_FIELDS if not fields else tuple(field.strip() for field in fields.split(','))
+    unknown = set(selected) - set(API_FIELDS)
+    if unknown:
+        return OrjsonResponse({'error': f"Unknown fields: {', '.join(sorted(unknown))}"}, status=400)
+    books = Book.objects.order_by('id')
+    if after is not None:
+        books = books.filter(id__gt=after)
+    rows = books.values_list('id', *(API_LOOKUPS[field] for field in selected))[:limit + 1]
+    rows = [dict(zip(('id',) + selected, row)) for row in rows]
+    next_cursor = rows[limit - 1]['id'] if len(rows) > limit else None
+    return conditional(request, OrjsonResponse({'items': rows[:limit], 'next_cursor': next_cursor}))
+
+
+@csrf_exempt
+@require_http_methods(['POST', 'PATCH'])
+def book_batch(request):
+    """
+    Creates many books (POST) or applies the same partial update to many
+    books (PATCH).
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        OrjsonResponse: See book_batch_create and book_batch_update.
+    """
+    if request.method == 'PATCH':
+        return book_batch_update(request)
+    return book_batch_create(request)
+
+
+def book_batch_create(request):
+    """
+    Creates many books with bulk_create in one transaction. Nothing is
+    inserted if any book is invalid.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        OrjsonResponse: The created books with status 201, or the errors by
+        list index with status 400.
+    """
+    payload = parse_json(request)
+    if not isinstance(payload, list) or len(payload) > MAX_BATCH_SIZE:
+        return OrjsonResponse({'error': f'Expected a list of at most {MAX_BATCH_SIZE} books'}, status=400)
+    books = []
+    errors = {}
+    for index, item in enumerate(payload):
+        form = BookForm(data=item if isinstance(item, dict) else {})
+        if form.is_valid():
+            books.append((form.instance, form.cleaned_data['author']))
+        else:
+            errors[index] = form_errors(form)
+    if errors:
+        return OrjsonResponse({'errors': errors}, status=400)
+    with transaction.atomic():
+        books = Book.objects.bulk_create(link_authors(books))
+    return OrjsonResponse([book_json(book) for book in books], status=201)
+
+
+def batch_ids(payload):
+    """
+    Reads the ``ids`` of a batch edit or delete.
+
+    Args:
+        payload: The JSON body.
+
+    Returns:
+        list[int] | None: The distinct IDs, sorted, or None if they are
+        not a non-empty list of at most MAX_BATCH_IDS integers.
+    """
+    ids = payload.get('ids') if isinstance(payload, dict) else None
+    if not isinstance(ids, list) or not 1 <= len(ids) <= MAX_BATCH_IDS:
+        return None
+    if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+        return None
+    return sorted(set(ids))
+
+
+def book_batch_update(request):
+    """
+    Applies the same partial update to many books with set-based UPDATEs
+    in one transaction, e.g. to reassign their author. The JSON body holds
+    the ``ids`` of the books and the ``values`` of the fields to change.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        OrjsonResponse: The number of books updated, unknown IDs are
+        skipped; or the errors with status 400.
+    """
+    payload = parse_json(request)
+    pks = batch_ids(payload)
+    if pks is None:
+        return OrjsonResponse({'error': f'Expected a list of 1 to {MAX_BATCH_IDS} book ids'}, status=400)
+    fields = payload.get('values')
+    if not isinstance(fields, dict):
+        return OrjsonResponse({'error': 'Expected the values to set'}, status=400)
+    # The rules of BookForm, for the fields sent only
+    form = BookForm(data={field: fields[field] for field in API_FIELDS if field in fields})
+    form.is_valid()
+    errors = {field: messages for field, messages in form_errors(form).items() if field in fields}
+    if errors:
+        return OrjsonResponse({'errors': errors}, status=400)
+    values = {field: form.cleaned_data[field] for field in API_FIELDS if field in fields}
+    if 'author' in values:
+        values['author'] = Author.objects.for_names([values['author']])[values['author']]
+    updated = 0
+    if values:
+        updated = Book.objects.update_many(pks, values)
+        cache.delete_many([book_detail_cache_key(pk) for pk in pks])
+    return OrjsonResponse({'updated': updated})
+
+
+@csrf_exempt
+@require_POST
+def book_batch_delete(request):
+    """
+    Deletes many books, marking them with set-based UPDATEs in one
+    transaction. The JSON body holds the ``ids`` of the books.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        OrjsonResponse: The number of books deleted, unknown IDs are
+        skipped; or the error with status 400.
+    """
+    pks = batch_ids(parse_json(request))
+    if pks is None:
+        return OrjsonResponse({'error': f'Expected a list of 1 to {MAX_BATCH_IDS} book ids'}, status=400)
+    deleted = Book.objects.delete_many(pks)
+    cache.delete_many([book_detail_cache_key(pk) for pk in pks])
+    return OrjsonResponse({'deleted': deleted})
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'PATCH', 'DELETE'])
+def book_item(request, pk):
+    """
+    Returns (GET), partially updates (PATCH) or deletes (DELETE) one book.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        pk (int): Primary key of the book.
+
+    Returns:
+        HttpResponse: The book, the updated book, or an empty 204 response.
+    """
+    book = get_object_or_404(Book.objects.select_related('author'), pk=pk)
+    if request.method == 'GET':
+        return conditional(request, OrjsonResponse(book_json(book)))
+    if request.method == 'DELETE':
+        book.soft_delete()
+        cache.delete(book_detail_cache_key(pk))
+        return HttpResponse(status=204)
+
+    payload = parse_json(request)
+    if not isinstance(payload, dict):
+        return OrjsonResponse({'error': 'Expected a JSON object'}, status=400)
+    data = {field: payload.get(field, getattr(book, field)) for field in API_FIELDS}
+    form = BookForm(data=data, instance=book)
+    if not form.is_valid():
+        return OrjsonResponse({'errors': form_errors(form)}, status=400)
+    book = form.save()
+    cache.delete(book_detail_cache_key(pk))
+    return OrjsonResponse(book_json(book))
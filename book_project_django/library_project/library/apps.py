@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class LibraryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'library'
+
+    def ready(self):
+        from .sqlite_profile import apply_sqlite_profile
+        connection_created.connect(apply_sqlite_profile, dispatch_uid='library.sqlite_profile')
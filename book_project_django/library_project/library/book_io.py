@@ -0,0 +1,282 @@
+# library/book_io.py
+import csv
+import io
+import json
+import os
+import time
+import zlib
+
+from django.db import transaction
+
+from .forms import BookForm
+from .models import Author, Book
+
+BOOK_FIELDS = ('title', 'author', 'description', 'published_date')
+EXPORT_FIELDS = ('id',) + BOOK_FIELDS
+# ORM lookups of EXPORT_FIELDS; the author is exported by name
+EXPORT_LOOKUPS = tuple('author__name' if field == 'author' else field for field in EXPORT_FIELDS)
+FORMATS = ('csv', 'jsonl')
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_REJECTIONS = 100
+EXPORT_CHUNK_SIZE = 1000
+
+
+def detect_format(filename):
+    """
+    Guesses the file format from its extension.
+
+    Args:
+        filename (str): The name of the file, e.g. 'books.jsonl'.
+
+    Returns:
+        str: 'csv' or 'jsonl'.
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    if extension == '.csv':
+        return 'csv'
+    raise ValueError(f'Cannot tell the format of {filename!r}, expected .csv or .jsonl')
+
+
+def export_filename(fmt, compress):
+    '''
+    Returns the download name of an export.
+
+    Args:
+        fmt (str): 'csv' or 'jsonl'.
+        compress (bool): Whether the export is gzip-compressed.
+
+    Returns:
+        str: E.g. 'books.csv' or 'books.jsonl.gz'.
+    '''
+    return f'books.{fmt}' + ('.gz' if compress else '')
+
+
+def iter_records(stream, fmt):
+    """
+    Parses books from a text stream one line at a time.
+
+    Only the book fields are kept and every value is turned into a string,
+    so CSV and JSON Lines records look the same to the validators.
+
+    Args:
+        stream (TextIO): The opened file; CSV files need a header row.
+        fmt (str): 'csv' or 'jsonl'.
+
+    Yields:
+        tuple: The line number, the record (or None) and a parse error (or None).
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, _normalize(record), None
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f'Invalid JSON: {e}'
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, 'Expected a JSON object'
+                continue
+            yield line_number, _normalize(record), None
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+
+def _normalize(record):
+    return {
+        field: '' if record.get(field) is None else str(record[field]).strip()
+        for field in BOOK_FIELDS
+    }
+
+
+
+def iter_export(rows, fmt, compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    '''
+    Encodes rows as CSV or JSON Lines, yielding bytes every ``chunk_size`` rows.
+
+    Only one chunk is held in memory, so the rows should come from a
+    server-side cursor for the whole export to run in constant memory.
+
+    Args:
+        rows (Iterable): Tuples of values in ``EXPORT_FIELDS`` order.
+        fmt (str): 'csv' or 'jsonl'.
+        compress (bool): Whether to gzip the output.
+        chunk_size (int): The number of rows encoded per yielded chunk.
+
+    Yields:
+        bytes: The next piece of the file.
+    '''
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        write_row = writer.writerow
+    elif fmt == 'jsonl':
+        def write_row(row):
+            buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, row)), default=str))
+            buffer.write('\n')
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def drain():
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    for count, row in enumerate(rows, start=1):
+        write_row(row)
+        if count % chunk_size == 0:
+            chunk = drain()
+            if chunk:
+                yield chunk
+    chunk = drain()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+def iter_valid_batches(records, validate, report, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validates parsed records and groups the valid ones into batches.
+
+    Args:
+        records (Iterable): Tuples produced by ``iter_records``.
+        validate (Callable): Takes a record and returns ``(values, errors)``.
+        report (ImportReport): Collects rejected rows.
+        batch_size (int): The number of rows per batch.
+
+    Yields:
+        list: Validated rows as returned by ``validate``, ready for a bulk insert.
+    """
+    batch = []
+    for line_number, record, error in records:
+        if error is None:
+            values, errors = validate(record)
+        else:
+            values, errors = None, {'row': [error]}
+        if values is None:
+            report.reject(line_number, errors)
+            continue
+        batch.append(values)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ImportReport:
+    """
+    Counts inserted and rejected rows of a bulk import and its throughput.
+
+    Attributes:
+        inserted (int): The number of rows inserted.
+        rejected_count (int): The number of rows rejected.
+        rejected (list): ``(line_number, errors)`` of the first rejected rows.
+        elapsed (float): Seconds from start to ``finish()``.
+    """
+
+    def __init__(self):
+        self.inserted = 0
+        self.rejected_count = 0
+        self.rejected = []
+        self.elapsed = 0.0
+        self._started = time.perf_counter()
+
+    def reject(self, line_number, errors):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REPORTED_REJECTIONS:
+            self.rejected.append((line_number, errors))
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self._started
+        return self
+
+    @property
+    def rows_per_second(self):
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f'Inserted {self.inserted} books, rejected {self.rejected_count} rows '
+            f'in {self.elapsed:.2f} s ({self.rows_per_second:.0f} rows/s)'
+        )
+
+
+def validate_book(record):
+    """
+    Validates an imported record with ``BookForm``.
+
+    Args:
+        record (dict): String values of title, author, description and
+            published_date.
+
+    Returns:
+        tuple: An unsaved Book without author and the author's name, and
+        None if the record is valid, otherwise None and the form errors.
+    """
+    form = BookForm(data=record)
+    if not form.is_valid():
+        return None, {field: list(messages) for field, messages in form.errors.items()}
+    return (form.instance, form.cleaned_data['author']), None
+
+
+def link_authors(books):
+    """
+    Sets the author of unsaved books, looking up (and creating) the authors
+    of the whole batch at once instead of once per book.
+
+    Args:
+        books (list): ``(book, author name)`` pairs from ``validate_book``.
+
+    Returns:
+        list[Book]: The books, ready for ``bulk_create``.
+    """
+    authors = Author.objects.for_names(name for _, name in books)
+    for book, name in books:
+        book.author = authors[name]
+    return [book for book, _ in books]
+
+
+def iter_book_rows(chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Reads every book as a tuple of ``EXPORT_FIELDS`` with a server-side
+    cursor, fetching ``chunk_size`` rows at a time. The author's name comes
+    from a join, so the export stays one query.
+
+    Args:
+        chunk_size (int): The number of rows fetched per round trip.
+
+    Returns:
+        Iterator[tuple]: The exported columns of each book, in id order.
+    """
+    return Book.objects.order_by('id').values_list(*EXPORT_LOOKUPS).iterator(chunk_size=chunk_size)
+
+
+def import_books(stream, fmt, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validates and inserts books from a text stream, one transaction per batch.
+
+    Args:
+        stream (TextIO): The opened CSV or JSON Lines file.
+        fmt (str): 'csv' or 'jsonl'.
+        batch_size (int): The number of rows per transaction.
+
+    Returns:
+        ImportReport: The number of inserted and rejected rows and throughput.
+    """
+    report = ImportReport()
+    for batch in iter_valid_batches(iter_records(stream, fmt), validate_book, report, batch_size):
+        with transaction.atomic():
+            Book.objects.bulk_create(link_authors(batch))
+        report.inserted += len(batch)
+    return report.finish()
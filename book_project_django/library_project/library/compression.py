@@ -0,0 +1,239 @@
+# library/compression.py
+import re
+import zlib
+
+from django.conf import settings
+from django.template.loaders import app_directories, filesystem
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # Optional, without it responses are only gzipped
+    brotli = None
+
+# Content types worth compressing; images, fonts and archives are
+# compressed already
+COMPRESSIBLE_TYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript', 'application/javascript',
+    'application/json', 'application/x-ndjson', 'application/xml', 'image/svg+xml',
+)
+# Smaller responses gain less than the Content-Encoding and Vary headers cost
+MINIMUM_SIZE = 500
+GZIP_LEVEL = 6
+# Brotli's higher qualities are meant for precompressed files, 4 compresses
+# better than gzip at about the same speed
+BROTLI_QUALITY = 4
+
+# Elements whose whitespace is content
+PROTECTED_TAG = re.compile(r'<(/?)(pre|textarea|script|style)\b', re.IGNORECASE)
+# A run of whitespace spanning lines renders like a single space
+LINE_BREAK_WHITESPACE = re.compile(r'\s*\n\s*')
+
+
+def accepted_encodings(headers):
+    """
+    Lists the content codings a client accepts.
+
+    Args:
+        headers (Headers): The request headers.
+
+    Returns:
+        set[str]: The codings of Accept-Encoding, without those refused with q=0.
+    """
+    encodings = set()
+    for item in headers.get('accept-encoding', '').split(','):
+        coding, _, params = item.partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+def choose_encoding(headers):
+    """
+    Picks the content coding of a response from Accept-Encoding.
+
+    Args:
+        headers (Headers): The request headers.
+
+    Returns:
+        str | None: 'br', 'gzip', or None to send the response as it is.
+    """
+    encodings = accepted_encodings(headers)
+    if 'br' in encodings and brotli is not None:
+        return 'br'
+    if 'gzip' in encodings:
+        return 'gzip'
+    return None
+
+
+def is_compressible(content_type, content_types=COMPRESSIBLE_TYPES):
+    """
+    Tells whether a content type is in the allowlist, ignoring parameters.
+
+    Args:
+        content_type (str | None): The Content-Type header.
+        content_types (Iterable[str]): The allowed media types.
+
+    Returns:
+        bool: Whether responses of this type are compressed.
+    """
+    return bool(content_type) and content_type.split(';')[0].strip().lower() in content_types
+
+
+def weak_etag(etag):
+    """
+    Marks a strong ETag as weak: the compressed body is not byte-identical to
+    the one the ETag was computed for, but it is semantically equivalent.
+
+    Args:
+        etag (str): The ETag header.
+
+    Returns:
+        str: The weak ETag.
+    """
+    return f'W/{etag}' if etag.startswith('"') else etag
+
+
+class Compressor:
+    """
+    Compresses a body chunk by chunk; every chunk is flushed, so a streamed
+    page still reaches the client piece by piece.
+
+    Args:
+        coding (str): 'br' or 'gzip'.
+        gzip_level (int): The zlib compression level, 1-9.
+        brotli_quality (int): The brotli quality, 0-11.
+    """
+
+    def __init__(self, coding, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+        self.coding = coding
+        if coding == 'br':
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip header and trailer
+
+    def compress(self, data, last=False):
+        """
+        Compresses the next chunk.
+
+        Args:
+            data (bytes): The chunk.
+            last (bool): Whether it is the last chunk of the body.
+
+        Returns:
+            bytes: The compressed data to send.
+        """
+        if self.coding == 'br':
+            return self._brotli.process(data) + (self._brotli.finish() if last else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+    def stream(self, chunks):
+        """
+        Compresses an iterable of chunks.
+
+        Args:
+            chunks (Iterable[bytes | str]): The body; strings are encoded as UTF-8.
+
+        Yields:
+            bytes: The compressed chunks.
+        """
+        try:
+            for chunk in chunks:
+                data = chunk.encode() if isinstance(chunk, str) else chunk
+                if data:
+                    yield self.compress(data)
+            yield self.compress(b'', last=True)
+        finally:
+            # Ends the wrapped stream too when the client goes away
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, whichever the client prefers
+    of those it accepts.
+
+    Only responses of the ``COMPRESSION_TYPES`` setting of at least
+    ``COMPRESSION_MIN_SIZE`` bytes are compressed, and none that already
+    have a Content-Encoding. ``GZIP_LEVEL`` and ``BROTLI_QUALITY`` set the
+    compression levels. Streamed responses are compressed chunk by
+    chunk. A strong ETag is made weak, which ``get_conditional_response``
+    accepts.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.minimum_size = getattr(settings, 'COMPRESSION_MIN_SIZE', MINIMUM_SIZE)
+        self.content_types = frozenset(getattr(settings, 'COMPRESSION_TYPES', COMPRESSIBLE_TYPES))
+        self.gzip_level = getattr(settings, 'GZIP_LEVEL', GZIP_LEVEL)
+        self.brotli_quality = getattr(settings, 'BROTLI_QUALITY', BROTLI_QUALITY)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_compressible(response.get('Content-Type'), self.content_types):
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = choose_encoding(request.headers)
+        if coding is None or request.method == 'HEAD' or response.status_code in (204, 206, 304):
+            return response
+        compressor = Compressor(coding, self.gzip_level, self.brotli_quality)
+        if response.streaming:
+            # A streamed response of unknown size is assumed to be large
+            response.streaming_content = compressor.stream(response.streaming_content)
+            response.headers.pop('Content-Length', None)
+        else:
+            if len(response.content) < self.minimum_size:
+                return response
+            response.content = compressor.compress(response.content, last=True)
+            response.headers['Content-Length'] = str(len(response.content))
+        response.headers['Content-Encoding'] = coding
+        if response.has_header('ETag'):
+            response.headers['ETag'] = weak_etag(response.headers['ETag'])
+        return response
+
+
+def minify_html(html, protected=False):
+    """
+    Collapses whitespace spanning lines into a single line break, except
+    inside ``<pre>``, ``<textarea>``, ``<script>`` and ``<style>``. The page
+    renders the same.
+
+    Args:
+        html (str): A piece of HTML.
+        protected (bool): Whether the piece starts inside one of those elements.
+
+    Returns:
+        tuple: The minified HTML and whether it ends inside one of those elements.
+    """
+    parts = []
+    position = 0
+    for match in PROTECTED_TAG.finditer(html):
+        segment = html[position:match.start()]
+        parts.append(segment if protected else LINE_BREAK_WHITESPACE.sub('\n', segment))
+        protected = not match.group(1)
+        position = match.start()
+    segment = html[position:]
+    parts.append(segment if protected else LINE_BREAK_WHITESPACE.sub('\n', segment))
+    return ''.join(parts), protected
+
+
+class MinifyingLoaderMixin:
+    """
+    Minifies the HTML of templates as they are loaded, see ``minify_html``.
+    Behind the cached loader it is done once per template, and only the
+    template source is changed, never the values it outputs.
+    """
+
+    def get_contents(self, origin):
+        return minify_html(super().get_contents(origin))[0]
+
+
+class MinifyingFilesystemLoader(MinifyingLoaderMixin, filesystem.Loader):
+    pass
+
+
+class MinifyingAppDirectoriesLoader(MinifyingLoaderMixin, app_directories.Loader):
+    pass
@@ -0,0 +1,68 @@
+# library/conditional.py
+from datetime import datetime, timezone
+
+from django.db import connections, router
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Book
+
+# Single-row counter bumped by triggers on every change of library_book,
+# see migration 0003.
+LIST_VERSION_SQL = 'SELECT version, updated_at FROM library_book_version WHERE id = 1'
+
+
+def list_validators():
+    """
+    Builds the validators of the book list from the version counter of
+    the database the request reads from.
+
+    Returns:
+        tuple: The strong ETag and the Last-Modified time.
+    """
+    with connections[router.db_for_read(Book)].cursor() as cursor:
+        cursor.execute(LIST_VERSION_SQL)
+        version, updated_at = cursor.fetchone()
+    updated_at = datetime.fromisoformat(updated_at).replace(tzinfo=timezone.utc)
+    return f'"list-{version}-{updated_at:%Y%m%d%H%M%S%f}"', updated_at
+
+
+def book_validators(pk):
+    """
+    Builds the validators of a book's detail page with a primary key lookup
+    of ``updated_at`` alone.
+
+    Args:
+        pk (int): Primary key of the book.
+
+    Returns:
+        tuple | None: The strong ETag and the Last-Modified time, or None
+        if there is no such book.
+    """
+    updated_at = Book.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return f'"book-{pk}-{updated_at:%Y%m%d%H%M%S%f}"', updated_at
+
+
+def not_modified(request, etag, last_modified):
+    """
+    Evaluates If-None-Match and If-Modified-Since of a request.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        etag (str): The quoted strong ETag of the current representation.
+        last_modified (datetime): When it last changed.
+
+    Returns:
+        HttpResponse | None: An empty 304 response when the client's copy
+        is current, otherwise None.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    return set_validators(response, etag, last_modified) if response is not None else None
+
+
+def set_validators(response, etag, last_modified):
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -1,13 +1,119 @@
 # library/forms.py
 from django import forms
-from .models import Book
+from django.core.validators import FileExtensionValidator
+from django.db.models.functions import Collate
+from .models import Author, Book
 from django.forms import DateInput
 
 
 class BookForm(forms.ModelForm):
+    # Entered as a name; save() links the book to the author of that name,
+    # creating it if needed
+    author = forms.CharField(max_length=255)
+    field_order = ['title', 'author', 'description', 'published_date']
+
     class Meta:
         model = Book
-        fields = ['title', 'author', 'description', 'published_date']
+        fields = ['title', 'description', 'published_date']
         widgets = {
             'published_date': DateInput(attrs={'type': 'date'}),  # Виджет с календарем
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.author_id is not None:
+            self.initial.setdefault('author', self.instance.author.name)
+
+    def save(self, commit=True):
+        name = self.cleaned_data['author']
+        if self.instance.author_id is None or self.instance.author.name != name:
+            self.instance.author = Author.objects.for_names([name])[name]
+        return super().save(commit)
+
+
+class BookBatchForm(forms.Form):
+    """
+    The same change applied to the books selected on the list page; blank
+    fields are left unchanged. The IDs of the books are the ``ids`` values
+    of the request.
+    """
+    author = forms.CharField(max_length=255, required=False)
+    published_date = forms.DateField(required=False, widget=DateInput(attrs={'type': 'date'}))
+
+    def values(self):
+        """
+        Returns the field values to set, linking the author of that name,
+        created if needed.
+
+        Returns:
+            dict: The filled in fields of a valid form.
+        """
+        values = {}
+        name = self.cleaned_data['author']
+        if name:
+            values['author'] = Author.objects.for_names([name])[name]
+        if self.cleaned_data['published_date'] is not None:
+            values['published_date'] = self.cleaned_data['published_date']
+        return values
+
+
+class ImportForm(forms.Form):
+    file = forms.FileField(
+        validators=[FileExtensionValidator(['csv', 'jsonl', 'ndjson'])],
+        help_text='A .csv or .jsonl file with title, author, description and published_date.',
+    )
+
+
+# Sort orders of the book list. Each one ends with the primary key so equal
+# values keep a stable order, and each follows an index of Book.Meta.
+BOOK_SORTS = {
+    'title': (Collate('title', 'NOCASE').asc(), 'id'),
+    'published': ('published_date', 'id'),
+    '-published': ('-published_date', '-id'),
+    'author': ('author__name', 'published_date', 'id'),
+}
+
+
+class BookFilterForm(forms.Form):
+    """
+    Filters and sort order of the book list, read from the query string.
+
+    Every filter is answered from an index: ``author`` and the year range
+    from (author_id, published_date) and published_date, ``title`` as a
+    case-insensitive prefix from the NOCASE index on title.
+    """
+    title = forms.CharField(max_length=255, required=False, label='Title starts with')
+    author = forms.IntegerField(required=False, widget=forms.HiddenInput)
+    year_from = forms.IntegerField(min_value=1, max_value=9999, required=False)
+    year_to = forms.IntegerField(min_value=1, max_value=9999, required=False)
+    sort = forms.ChoiceField(
+        choices=[('', 'Added'), ('title', 'Title'), ('author', 'Author'),
+                 ('published', 'Oldest first'), ('-published', 'Newest first')],
+        required=False,
+    )
+
+    def filter(self, queryset):
+        """
+        Applies the filters of a bound form to a queryset of books; invalid
+        values are ignored.
+
+        Args:
+            queryset (QuerySet): The books to filter.
+
+        Returns:
+            QuerySet: The filtered and sorted books.
+        """
+        # cleaned_data keeps the fields that validated even if others did not
+        self.is_valid()
+        data = self.cleaned_data
+        if data.get('title'):
+            queryset = queryset.filter(title__istartswith=data['title'])
+        if data.get('author') is not None:
+            queryset = queryset.filter(author_id=data['author'])
+        if data.get('year_from') is not None:
+            queryset = queryset.filter(published_date__year__gte=data['year_from'])
+        if data.get('year_to') is not None:
+            queryset = queryset.filter(published_date__year__lte=data['year_to'])
+        if data.get('sort'):
+            queryset = queryset.order_by(*BOOK_SORTS[data['sort']])
+        return queryset
@@ -0,0 +1,101 @@
+# library/maintenance.py
+import time
+from datetime import timedelta
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import Book
+
+# Deleted books are kept this long before they are purged
+PURGE_AFTER_DAYS = 7
+# Rows deleted per transaction, and seconds between two, so requests
+# waiting for the write lock get it between batches
+PURGE_BATCH_SIZE = 500
+PURGE_PAUSE = 0.1
+# Free pages handed back per transaction of the incremental vacuum
+VACUUM_STEP_PAGES = 1000
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def purge_deleted_books(older_than_days=PURGE_AFTER_DAYS, batch_size=PURGE_BATCH_SIZE, pause=PURGE_PAUSE):
+    """
+    Physically deletes the books soft deleted more than ``older_than_days``
+    days ago, in batches of one short transaction each, oldest first.
+
+    Args:
+        older_than_days (float): How long deleted books are kept.
+        batch_size (int): Books deleted per transaction.
+        pause (float): Seconds to sleep between two batches.
+
+    Returns:
+        int: The number of books purged.
+    """
+    using = router.db_for_write(Book)
+    books = Book.all_objects.using(using)
+    expired = books.filter(deleted_at__lt=timezone.now() - timedelta(days=older_than_days)).order_by('deleted_at')
+    purged = 0
+    while True:
+        with transaction.atomic(using=using):
+            pks = list(expired.values_list('pk', flat=True)[:batch_size])
+            if pks:
+                books.filter(pk__in=pks).delete()
+        purged += len(pks)
+        if len(pks) < batch_size:
+            return purged
+        time.sleep(pause)
+
+
+def vacuum_database(using='default', step_pages=VACUUM_STEP_PAGES, pause=PURGE_PAUSE):
+    """
+    Hands the free pages of a SQLite database back to the filesystem with
+    ``PRAGMA incremental_vacuum``, a step at a time, then truncates the
+    write-ahead log and refreshes the query planner statistics.
+
+    A database created before ``auto_vacuum=INCREMENTAL`` was set (see
+    sqlite_profile.py) is switched to it first, which takes one full
+    ``VACUUM``: the file is rewritten while every other connection waits.
+
+    Args:
+        using (str): The alias of the database.
+        step_pages (int): Pages freed per transaction.
+        pause (float): Seconds to sleep between two steps.
+
+    Returns:
+        dict: ``switched`` (whether the full VACUUM ran), ``freed_pages``
+        and ``page_size`` in bytes.
+
+    Raises:
+        ValueError: If the database is not SQLite.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        raise ValueError(f'Only SQLite databases are vacuumed, not {connection.vendor}')
+
+    def pragma(statement):
+        with connection.cursor() as cursor:
+            cursor.execute(statement)
+            row = cursor.fetchone() if cursor.description else None
+            return row[0] if row else None
+
+    # Outside of atomic() every statement commits on its own, as VACUUM needs
+    switched = pragma('PRAGMA auto_vacuum') != AUTO_VACUUM_INCREMENTAL
+    if switched:
+        pragma('PRAGMA auto_vacuum = INCREMENTAL')
+        pragma('VACUUM')
+    page_size = pragma('PRAGMA page_size')
+    free_pages = remaining = pragma('PRAGMA freelist_count')
+    while remaining:
+        # sqlite3's execute() steps a statement without result columns
+        # once, which frees a single page; executescript() runs it through
+        connection.connection.executescript(f'PRAGMA incremental_vacuum({int(step_pages)})')
+        previous, remaining = remaining, pragma('PRAGMA freelist_count')
+        if remaining >= previous:
+            break
+        if remaining:
+            time.sleep(pause)
+    if pragma('PRAGMA journal_mode') == 'wal':
+        pragma('PRAGMA wal_checkpoint(TRUNCATE)')
+    pragma('PRAGMA optimize')
+    return {'switched': switched, 'freed_pages': free_pages - remaining, 'page_size': page_size}
@@ -0,0 +1,29 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Copies the SQLite primary database onto every replica of REPLICA_DATABASES.'
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('No replicas configured, set LIBRARY_REPLICAS.')
+        primary = connections['default'].settings_dict
+        for alias in settings.REPLICA_DATABASES:
+            replica = connections[alias].settings_dict
+            if 'sqlite3' not in primary['ENGINE'] or 'sqlite3' not in replica['ENGINE']:
+                raise CommandError(f'Only SQLite files can be copied, {alias} is not one.')
+            connections[alias].close()
+            # The backup API copies a consistent snapshot, even while the
+            # primary is being written in WAL mode
+            source = sqlite3.connect(primary['NAME'])
+            target = sqlite3.connect(replica['NAME'])
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(f'Copied {primary["NAME"]} to {alias} ({replica["NAME"]})')
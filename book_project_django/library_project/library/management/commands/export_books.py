@@ -0,0 +1,34 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library.book_io import FORMATS, detect_format, iter_book_rows, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Exports every book to a CSV or JSON Lines file, or "-" for stdout.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--gzip', action='store_true', help='Defaults to true for .gz paths.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        compress = options['gzip'] or path.endswith('.gz')
+        try:
+            fmt = options['format'] or detect_format(path.removesuffix('.gz'))
+        except ValueError as e:
+            raise CommandError(e)
+        start = time.perf_counter()
+        written = 0
+        output = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        try:
+            for chunk in iter_export(iter_book_rows(), fmt, compress):
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        self.stderr.write(f'Wrote {written / 1e6:.1f} MB in {time.perf_counter() - start:.2f} s')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from library.book_io import FORMATS, IMPORT_BATCH_SIZE, detect_format, import_books
+
+
+class Command(BaseCommand):
+    help = 'Imports books from a CSV or JSON Lines file in batched transactions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            fmt = options['format'] or detect_format(options['path'])
+            with open(options['path'], encoding='utf-8', newline='') as stream:
+                report = import_books(stream, fmt, options['batch_size'])
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+        for line_number, errors in report.rejected:
+            self.stderr.write(f'Line {line_number}: {errors}')
+        self.stdout.write(self.style.SUCCESS(report.summary()))
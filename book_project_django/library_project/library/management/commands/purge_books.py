@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from library.maintenance import PURGE_AFTER_DAYS, PURGE_BATCH_SIZE, PURGE_PAUSE, purge_deleted_books
+
+
+class Command(BaseCommand):
+    help = 'Removes the books deleted before, a small batch per transaction; run it off-peak, e.g. from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=float, default=PURGE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=PURGE_PAUSE, help='Seconds between batches.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        purged = purge_deleted_books(options['older_than_days'], options['batch_size'], options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} books in {time.perf_counter() - start:.2f} s'))
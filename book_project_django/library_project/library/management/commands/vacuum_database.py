@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library.maintenance import PURGE_PAUSE, VACUUM_STEP_PAGES, vacuum_database
+
+
+class Command(BaseCommand):
+    help = 'Hands the free pages of the SQLite database back to the filesystem; run it off-peak, after purge_books.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--step-pages', type=int, default=VACUUM_STEP_PAGES, help='Pages freed per transaction.')
+        parser.add_argument('--pause', type=float, default=PURGE_PAUSE, help='Seconds between steps.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            report = vacuum_database(options['database'], options['step_pages'], options['pause'])
+        except ValueError as e:
+            raise CommandError(e)
+        if report['switched']:
+            self.stdout.write(f'Switched {options["database"]} to auto_vacuum=INCREMENTAL with a full VACUUM')
+        freed_mb = report['freed_pages'] * report['page_size'] / 1e6
+        self.stdout.write(self.style.SUCCESS(
+            f"Freed {report['freed_pages']} pages ({freed_mb:.1f} MB) in {time.perf_counter() - start:.2f} s"
+        ))
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+# External-content FTS5 index over library_book. The triggers keep it in step
+# with every INSERT, UPDATE and DELETE, including bulk_create and queryset
+# update/delete.
+CREATE_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE library_book_fts USING fts5(
+        title, author, description, content='library_book', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER library_book_fts_insert AFTER INSERT ON library_book BEGIN
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_delete AFTER DELETE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_update AFTER UPDATE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+    "INSERT INTO library_book_fts (library_book_fts) VALUES ('rebuild')",
+]
+
+DROP_SEARCH_INDEX = [
+    'DROP TRIGGER library_book_fts_update',
+    'DROP TRIGGER library_book_fts_delete',
+    'DROP TRIGGER library_book_fts_insert',
+    'DROP TABLE library_book_fts',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SEARCH_INDEX, DROP_SEARCH_INDEX),
+    ]
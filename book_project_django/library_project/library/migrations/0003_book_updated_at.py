@@ -0,0 +1,79 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+# Adding a NOT NULL column makes Django rebuild library_book on SQLite, which
+# drops the search index triggers of 0002. They are created again after the
+# rebuild, in either direction, unless they survived it.
+CREATE_SEARCH_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS library_book_fts_insert AFTER INSERT ON library_book BEGIN
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS library_book_fts_delete AFTER DELETE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS library_book_fts_update AFTER UPDATE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+]
+
+# A single-row counter that triggers bump on every INSERT, UPDATE and DELETE
+# of library_book, so list pages are validated without scanning the table.
+CREATE_LIST_VERSION = [
+    """
+    CREATE TABLE library_book_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """,
+    """
+    INSERT INTO library_book_version (id, version, updated_at)
+    VALUES (1, 1, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+    """,
+] + [
+    f"""
+    CREATE TRIGGER library_book_version_{event.lower()} AFTER {event} ON library_book BEGIN
+        UPDATE library_book_version
+        SET version = version + 1, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+        WHERE id = 1;
+    END
+    """
+    for event in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+DROP_LIST_VERSION = [
+    'DROP TRIGGER library_book_version_delete',
+    'DROP TRIGGER library_book_version_update',
+    'DROP TRIGGER library_book_version_insert',
+    'DROP TABLE library_book_version',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0002_book_search_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(migrations.RunSQL.noop, CREATE_SEARCH_TRIGGERS),
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(CREATE_SEARCH_TRIGGERS, migrations.RunSQL.noop),
+        migrations.RunSQL(CREATE_LIST_VERSION, DROP_LIST_VERSION),
+    ]
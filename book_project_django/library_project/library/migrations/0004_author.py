@@ -0,0 +1,165 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+UNKNOWN_AUTHOR = 'Unknown'
+
+# The index of 0002 reads library_book.author, so it is dropped before the
+# column goes away and created again over the author names below.
+DROP_BOOK_SEARCH_INDEX = [
+    'DROP TRIGGER library_book_fts_update',
+    'DROP TRIGGER library_book_fts_delete',
+    'DROP TRIGGER library_book_fts_insert',
+    'DROP TABLE library_book_fts',
+]
+
+CREATE_BOOK_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE library_book_fts USING fts5(
+        title, author, description, content='library_book', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER library_book_fts_insert AFTER INSERT ON library_book BEGIN
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_delete AFTER DELETE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_update AFTER UPDATE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        VALUES ('delete', old.id, old.title, old.author, old.description);
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        VALUES (new.id, new.title, new.author, new.description);
+    END
+    """,
+    "INSERT INTO library_book_fts (library_book_fts) VALUES ('rebuild')",
+]
+
+# Making author_id NOT NULL rebuilds library_book, which drops the triggers
+# of the version counter (0003) and of the search index. They are created
+# again after every rebuild, in either direction, unless they survived it.
+CREATE_LIST_VERSION_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS library_book_version_{event.lower()} AFTER {event} ON library_book BEGIN
+        UPDATE library_book_version
+        SET version = version + 1, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+        WHERE id = 1;
+    END
+    """
+    for event in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+# Contentless FTS5 index: the author name lives in library_author, so the
+# triggers pass every indexed value, and renaming an author reindexes its
+# books. Searches join library_book on the rowid.
+CREATE_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE library_book_fts USING fts5(title, author, description, content='')
+    """,
+    """
+    CREATE TRIGGER library_book_fts_insert AFTER INSERT ON library_book BEGIN
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        SELECT new.id, new.title, name, new.description FROM library_author WHERE id = new.author_id;
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_delete AFTER DELETE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        SELECT 'delete', old.id, old.title, name, old.description FROM library_author WHERE id = old.author_id;
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_update AFTER UPDATE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        SELECT 'delete', old.id, old.title, name, old.description FROM library_author WHERE id = old.author_id;
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        SELECT new.id, new.title, name, new.description FROM library_author WHERE id = new.author_id;
+    END
+    """,
+    """
+    CREATE TRIGGER library_author_fts_update AFTER UPDATE OF name ON library_author BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        SELECT 'delete', id, title, old.name, description FROM library_book WHERE author_id = old.id;
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        SELECT id, title, new.name, description FROM library_book WHERE author_id = new.id;
+    END
+    """,
+    """
+    INSERT INTO library_book_fts (rowid, title, author, description)
+    SELECT library_book.id, library_book.title, library_author.name, library_book.description
+    FROM library_book JOIN library_author ON library_author.id = library_book.author_id
+    """,
+]
+
+DROP_SEARCH_INDEX = [
+    'DROP TRIGGER library_author_fts_update',
+] + DROP_BOOK_SEARCH_INDEX
+
+
+def link_authors(apps, schema_editor):
+    """
+    Creates one author per distinct name and points every book at it.
+    Names are compared after stripping whitespace; books without a name
+    get an "Unknown" author.
+    """
+    Author = apps.get_model('library', 'Author')
+    Book = apps.get_model('library', 'Book')
+    spellings = {}
+    for author_name in Book.objects.values_list('author_name', flat=True).distinct():
+        spellings.setdefault(author_name.strip() or UNKNOWN_AUTHOR, []).append(author_name)
+    Author.objects.bulk_create([Author(name=name) for name in sorted(spellings)])
+    for author in Author.objects.all():
+        Book.objects.filter(author_name__in=spellings[author.name]).update(author=author)
+
+
+def unlink_authors(apps, schema_editor):
+    Author = apps.get_model('library', 'Author')
+    Book = apps.get_model('library', 'Book')
+    for author in Author.objects.all():
+        Book.objects.filter(author=author).update(author_name=author.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0003_book_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunSQL(migrations.RunSQL.noop, CREATE_LIST_VERSION_TRIGGERS),
+        migrations.RunSQL(DROP_BOOK_SEARCH_INDEX, CREATE_BOOK_SEARCH_INDEX),
+        migrations.CreateModel(
+            name='Author',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.RenameField(model_name='book', old_name='author', new_name='author_name'),
+        migrations.AddField(
+            model_name='book',
+            name='author',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.PROTECT, related_name='books', to='library.author'
+            ),
+        ),
+        migrations.RunPython(link_authors, unlink_authors),
+        # A default lets the reverse migration add the column back to existing rows
+        migrations.AlterField(model_name='book', name='author_name', field=models.CharField(max_length=255, default='')),
+        migrations.RemoveField(model_name='book', name='author_name'),
+        migrations.AlterField(
+            model_name='book',
+            name='author',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT, related_name='books', to='library.author'
+            ),
+        ),
+        migrations.RunSQL(CREATE_LIST_VERSION_TRIGGERS, migrations.RunSQL.noop),
+        migrations.RunSQL(CREATE_SEARCH_INDEX, DROP_SEARCH_INDEX),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+from django.db.models.functions import Collate
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0004_author'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author', 'published_date'], name='library_book_author_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['published_date'], name='library_book_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(Collate('title', 'NOCASE'), name='library_book_title_nocase_idx'),
+        ),
+    ]
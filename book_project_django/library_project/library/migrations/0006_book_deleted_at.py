@@ -0,0 +1,106 @@
+from django.db import migrations, models
+
+# Deleting a book only sets deleted_at, and purge_books removes the row
+# later. A marked book leaves the search index at once, so the triggers
+# skip rows already marked when they are purged, and purging them does not
+# bump the version counter: no page changes.
+CREATE_SOFT_DELETE_TRIGGERS = [
+    'DROP TRIGGER library_book_fts_delete',
+    'DROP TRIGGER library_book_fts_update',
+    'DROP TRIGGER library_author_fts_update',
+    'DROP TRIGGER library_book_version_delete',
+    """
+    CREATE TRIGGER library_book_fts_delete AFTER DELETE ON library_book WHEN old.deleted_at IS NULL BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        SELECT 'delete', old.id, old.title, name, old.description FROM library_author WHERE id = old.author_id;
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_update AFTER UPDATE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        SELECT 'delete', old.id, old.title, name, old.description FROM library_author
+        WHERE id = old.author_id AND old.deleted_at IS NULL;
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        SELECT new.id, new.title, name, new.description FROM library_author
+        WHERE id = new.author_id AND new.deleted_at IS NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER library_author_fts_update AFTER UPDATE OF name ON library_author BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        SELECT 'delete', id, title, old.name, description FROM library_book
+        WHERE author_id = old.id AND deleted_at IS NULL;
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        SELECT id, title, new.name, description FROM library_book
+        WHERE author_id = new.id AND deleted_at IS NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_version_delete AFTER DELETE ON library_book WHEN old.deleted_at IS NULL BEGIN
+        UPDATE library_book_version
+        SET version = version + 1, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+        WHERE id = 1;
+    END
+    """,
+]
+
+# The triggers of 0004, for the reverse migration; marked books are purged
+# first, the index does not hold them
+DROP_SOFT_DELETE_TRIGGERS = [
+    'DELETE FROM library_book WHERE deleted_at IS NOT NULL',
+    'DROP TRIGGER library_book_fts_delete',
+    'DROP TRIGGER library_book_fts_update',
+    'DROP TRIGGER library_author_fts_update',
+    'DROP TRIGGER library_book_version_delete',
+    """
+    CREATE TRIGGER library_book_fts_delete AFTER DELETE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        SELECT 'delete', old.id, old.title, name, old.description FROM library_author WHERE id = old.author_id;
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_fts_update AFTER UPDATE ON library_book BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        SELECT 'delete', old.id, old.title, name, old.description FROM library_author WHERE id = old.author_id;
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        SELECT new.id, new.title, name, new.description FROM library_author WHERE id = new.author_id;
+    END
+    """,
+    """
+    CREATE TRIGGER library_author_fts_update AFTER UPDATE OF name ON library_author BEGIN
+        INSERT INTO library_book_fts (library_book_fts, rowid, title, author, description)
+        SELECT 'delete', id, title, old.name, description FROM library_book WHERE author_id = old.id;
+        INSERT INTO library_book_fts (rowid, title, author, description)
+        SELECT id, title, new.name, description FROM library_book WHERE author_id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER library_book_version_delete AFTER DELETE ON library_book BEGIN
+        UPDATE library_book_version
+        SET version = version + 1, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+        WHERE id = 1;
+    END
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0005_book_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(
+                fields=['deleted_at'], condition=models.Q(deleted_at__isnull=False), name='library_book_deleted_idx'
+            ),
+        ),
+        migrations.RunSQL(CREATE_SOFT_DELETE_TRIGGERS, DROP_SOFT_DELETE_TRIGGERS),
+    ]
@@ -1,12 +1,128 @@
 # library/models.py
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models.functions import Collate
+from django.utils import timezone
+
+
+class AuthorManager(models.Manager):
+    def for_names(self, names):
+        """
+        Looks up authors by name, creating the missing ones with a single
+        bulk insert.
+
+        Args:
+            names (Iterable[str]): Author names, already stripped.
+
+        Returns:
+            dict: The Author of every name.
+        """
+        names = set(names)
+        self.bulk_create([Author(name=name) for name in names], ignore_conflicts=True)
+        return {author.name: author for author in self.filter(name__in=names)}
+
+
+class Author(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+
+    objects = AuthorManager()
+
+    def __str__(self):
+        return self.name
+
+
+class BookManager(models.Manager):
+    """
+    The default manager of books, without the deleted ones; ``all_objects``
+    returns those too, until the purge_books command removes them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+    def _chunks(self, pks, size):
+        """
+        Splits primary keys into chunks of at most ``size``, by default the
+        bound parameter limit of the database written to.
+
+        Args:
+            pks (list[int]): Primary keys of books.
+            size (int | None): The largest chunk.
+
+        Returns:
+            list[list[int]]: The chunks, in order.
+        """
+        size = size or connections[router.db_for_write(self.model)].features.max_query_params
+        return [pks[start:start + size] for start in range(0, len(pks), size)]
+
+    def update_many(self, pks, values, chunk_size=None):
+        """
+        Sets the same field values on many books with one
+        ``UPDATE ... WHERE id IN (...)`` per chunk of keys, in one
+        transaction. ``updated_at`` is set too, which ``update()`` skips.
+
+        Args:
+            pks (list[int]): Primary keys of the books to change.
+            values (dict): Field values, an Author instance for ``author``.
+            chunk_size (int | None): Keys per statement; by default as many
+                as the bound parameter limit leaves room for.
+
+        Returns:
+            int: The number of books changed.
+        """
+        values = {**values, 'updated_at': timezone.now()}
+        if chunk_size is None:
+            limit = connections[router.db_for_write(self.model)].features.max_query_params
+            chunk_size = limit - len(values)
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            return sum(self.filter(pk__in=chunk).update(**values) for chunk in self._chunks(pks, chunk_size))
+
+    def delete_many(self, pks, chunk_size=None):
+        """
+        Marks many books deleted with one ``UPDATE ... WHERE id IN (...)``
+        per chunk of keys, in one transaction.
+
+        Args:
+            pks (list[int]): Primary keys of the books to delete.
+            chunk_size (int | None): Keys per statement; by default as many
+                as the bound parameter limit leaves room for.
+
+        Returns:
+            int: The number of books deleted.
+        """
+        return self.update_many(pks, {'deleted_at': timezone.now()}, chunk_size)
 
 
 class Book(models.Model):
     title = models.CharField(max_length=255)
-    author = models.CharField(max_length=255)
+    author = models.ForeignKey(Author, on_delete=models.PROTECT, related_name='books')
     description = models.TextField()
     published_date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set instead of deleting the row, see soft_delete()
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = BookManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        # Back the filters and sort orders of the book list, see BookFilterForm
+        indexes = [
+            models.Index(fields=['author', 'published_date'], name='library_book_author_date_idx'),
+            models.Index(fields=['published_date'], name='library_book_published_idx'),
+            models.Index(Collate('title', 'NOCASE'), name='library_book_title_nocase_idx'),
+            # Only the deleted books, for the purge
+            models.Index(
+                fields=['deleted_at'], condition=models.Q(deleted_at__isnull=False), name='library_book_deleted_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+    def soft_delete(self):
+        """
+        Marks the book deleted: it disappears from ``Book.objects`` and the
+        search index at once, and purge_books removes the row later.
+        """
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at', 'updated_at'])
@@ -0,0 +1,23 @@
+# library/preload.py
+import os
+
+from django.template import engines
+
+
+def precompile_templates():
+    """
+    Loads every template of the project's template directories (``DIRS``),
+    so none is compiled while serving a request. The cached template loader
+    keeps them for the life of the process.
+
+    Returns:
+        int: The number of templates loaded.
+    """
+    count = 0
+    for engine in engines.all():
+        for directory in engine.dirs:
+            for root, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    engine.get_template(os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/'))
+                    count += 1
+    return count
@@ -0,0 +1,67 @@
+# library/routers.py
+import contextvars
+import random
+
+from django.conf import settings
+
+# Cookie marking a client that wrote recently; its reads stay on the primary
+# until the replicas have caught up
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_database = contextvars.ContextVar('read_database', default=None)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica chosen for the current request and every
+    write to the primary ('default').
+
+    Outside of a request, or when no replica is configured, reads go to the
+    primary as well. One replica serves all reads of a request, so its
+    validators and content come from the same copy.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold copies of the primary's rows
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaMiddleware:
+    """
+    Picks the database the reads of a request go to.
+
+    GET and HEAD requests read from a random replica of
+    ``settings.REPLICA_DATABASES``. Other requests use the primary and pin
+    the client to it for ``settings.REPLICA_PIN_SECONDS`` with a cookie, so
+    the client reads its own writes while the replicas lag behind.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = settings.REPLICA_DATABASES
+        safe = request.method in SAFE_METHODS
+        database = None
+        if replicas and safe and PIN_COOKIE not in request.COOKIES:
+            database = random.choice(replicas)
+        token = _read_database.set(database)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_database.reset(token)
+        if replicas and not safe:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,49 @@
+# library/search.py
+import re
+
+from django.db.models import prefetch_related_objects
+
+from .models import Book
+
+SEARCH_SQL = """
+    SELECT library_book.* FROM library_book_fts
+    JOIN library_book ON library_book.id = library_book_fts.rowid
+    WHERE library_book_fts MATCH %s AND library_book.deleted_at IS NULL
+    ORDER BY library_book_fts.rank
+    LIMIT %s OFFSET %s
+"""
+
+
+def match_expression(query):
+    """
+    Turns user input into an FTS5 query matching every word as a prefix.
+
+    Args:
+        query (str): The search text, e.g. "tolk ring".
+
+    Returns:
+        str | None: The MATCH expression, e.g. '"tolk"* "ring"*', or None
+        when the input has no searchable words.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_books(expression, limit, offset):
+    """
+    Returns one page of books matching the expression, best match first.
+    Their authors are fetched with one more query.
+
+    Args:
+        expression (str): A MATCH expression from ``match_expression``.
+        limit (int): The number of books to return.
+        offset (int): The number of best-ranked books to skip.
+
+    Returns:
+        list[Book]: The matching books.
+    """
+    books = list(Book.objects.raw(SEARCH_SQL, [expression, limit, offset]))
+    prefetch_related_objects(books, 'author')
+    return books
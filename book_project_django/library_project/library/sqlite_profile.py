@@ -0,0 +1,36 @@
+# library/sqlite_profile.py
+from django.conf import settings
+
+# PRAGMA settings applied to every new SQLite connection, by profile name.
+# "default" leaves SQLite's rollback journal and full fsync on every commit.
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'auto_vacuum': 'INCREMENTAL', # on new files; free pages kept until vacuumed
+        'journal_mode': 'WAL',        # readers no longer wait for writers
+        'synchronous': 'NORMAL',      # fsync at checkpoints, not every commit
+        'cache_size': -64000,         # 64 MB page cache (negative means KiB)
+        'mmap_size': 268435456,       # map up to 256 MB of the file
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,         # wait up to 5 s for a lock, in ms
+    },
+}
+
+
+def apply_sqlite_profile(sender, connection, **kwargs):
+    """
+    Receiver for the ``connection_created`` signal.
+
+    Runs the PRAGMA statements of the profile named by
+    ``settings.SQLITE_PROFILE`` on every new SQLite connection.
+
+    Args:
+        sender: The database wrapper class.
+        connection (DatabaseWrapper): The newly opened connection.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    profile = getattr(settings, 'SQLITE_PROFILE', 'default')
+    with connection.cursor() as cursor:
+        for pragma, value in SQLITE_PROFILES[profile].items():
+            cursor.execute(f'PRAGMA {pragma}={value}')
@@ -0,0 +1,61 @@
+# library/storage.py
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # Optional, without it only .gz variants are written
+    brotli = None
+
+# Text formats worth precompressing; images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.html', '.xml')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Fingerprints static files like ``ManifestStaticFilesStorage``
+    (``styles.css`` is collected as ``styles.3f2a1c9b0d4e.css`` too) and
+    writes gzip and, if the ``brotli`` package is installed, brotli variants
+    of the text files next to them, for the web server to send as they are.
+
+    Files ``collectstatic`` has not processed keep their name, so pages
+    render before the first ``collectstatic``, e.g. in tests.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name is not None:
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if not dry_run:
+            for name in sorted({*paths, *hashed_names}):
+                self.precompress(name)
+
+    def precompress(self, name):
+        """
+        Writes the gzip and brotli variants of a collected text file next
+        to it, unless they are not smaller.
+
+        Args:
+            name (str): The name of the file in ``STATIC_ROOT``.
+        """
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as f:
+            content = f.read()
+        variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content, quality=11)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(content):
+                with open(self.path(name + suffix), 'wb') as f:
+                    f.write(compressed)
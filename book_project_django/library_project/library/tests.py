@@ -1,3 +1,581 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .compression import minify_html
+from .forms import BookFilterForm
+from .instrumentation import QueryBudgetExceeded, query_budget
+from .maintenance import purge_deleted_books, vacuum_database
+from .models import Author, Book
+from .preload import precompile_templates
+from .routers import PIN_COOKIE, ReplicaMiddleware
+
+
+def create_book(author, **fields):
+    return Book.objects.create(author=Author.objects.for_names([author])[author], **fields)
+
+
+@skipUnless(settings.SQLITE_PROFILE == 'production', 'production SQLite profile not selected')
+class SQLiteProfileTests(TestCase):
+    def test_production_profile_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+
+
+class StaticAssetTests(TestCase):
+    def test_collectstatic_fingerprints_and_precompresses(self):
+        with tempfile.TemporaryDirectory() as static_root, override_settings(STATIC_ROOT=static_root):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            with open(os.path.join(static_root, 'staticfiles.json')) as f:
+                name = json.load(f)['paths']['library/styles.css']
+            self.assertRegex(name, r'^library/styles\.[0-9a-f]{12}\.css$')
+            with open(os.path.join(static_root, name), 'rb') as f, gzip.open(os.path.join(static_root, name + '.gz')) as gz:
+                self.assertEqual(gz.read(), f.read())
+            self.assertContains(self.client.get(reverse('book_create')), f'/static/{name}')
+
+    def test_pages_render_before_collectstatic(self):
+        with tempfile.TemporaryDirectory() as static_root, override_settings(STATIC_ROOT=static_root):
+            self.assertContains(self.client.get(reverse('book_create')), '/static/library/styles.css')
+
+
+class PreloadTests(TestCase):
+    def test_precompile_templates_loads_every_project_template(self):
+        template_dir = settings.TEMPLATES[0]['DIRS'][0]
+        names = [filename for _, _, filenames in os.walk(template_dir) for filename in filenames]
+        self.assertEqual(precompile_templates(), len(names))
+
+
+class BookDetailCacheTests(TestCase):
+    def setUp(self):
+        self.book = create_book(
+            title='Dune', author='Frank Herbert', description='Spice.', published_date=date(1965, 8, 1)
+        )
+        self.url = reverse('book_detail', args=[self.book.pk])
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cached_page_only_reads_validators(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Dune')
+
+    def test_edit_invalidates_cached_page(self):
+        self.client.get(self.url)
+        self.client.post(reverse('book_edit', args=[self.book.pk]), {
+            'title': 'Dune Messiah', 'author': 'Frank Herbert',
+            'description': 'Spice.', 'published_date': '1969-10-15',
+        })
+        self.assertContains(self.client.get(self.url), 'Dune Messiah')
+
+    def test_delete_invalidates_cached_page(self):
+        self.client.get(self.url)
+        self.client.post(reverse('book_delete', args=[self.book.pk]))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_page_cached_for_another_version_is_rendered_again(self):
+        cache.set(f'book_detail:{self.book.pk}', ('"book-stale"', 'Stale page'))
+        self.assertContains(self.client.get(self.url), 'Dune')
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        self.book = create_book(
+            title='Dune', author='Frank Herbert', description='Spice.', published_date=date(1965, 8, 1)
+        )
+        self.detail_url = reverse('book_detail', args=[self.book.pk])
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_detail_revalidates_with_one_query(self):
+        response = self.client.get(self.detail_url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_detail_etag(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.client.post(reverse('book_edit', args=[self.book.pk]), {
+            'title': 'Dune Messiah', 'author': 'Frank Herbert',
+            'description': 'Spice.', 'published_date': '1969-10-15',
+        })
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_revalidates_until_books_change(self):
+        response = self.client.get(reverse('book_list'))
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('book_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(reverse('book_list'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.book.delete()
+        self.assertEqual(self.client.get(reverse('book_list'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(MIDDLEWARE=['library.compression.CompressionMiddleware', *settings.MIDDLEWARE])
+class CompressionTests(TestCase):
+    def setUp(self):
+        for number in range(20):
+            create_book(title=f'Book {number}', author='Frank Herbert', published_date=date(1965, 8, 1))
+
+    def test_list_is_gzipped_with_weak_etag(self):
+        response = self.client.get(reverse('book_list'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(b'Book 19', gzip.decompress(response.content))
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(
+            reverse('book_list'), HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_sent_as_is_when_not_accepted_or_too_small(self):
+        response = self.client.get(reverse('book_list'), HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertContains(response, 'Book 19')
+        with override_settings(COMPRESSION_MIN_SIZE=10 ** 6):
+            self.client = self.client_class()
+            response = self.client.get(reverse('book_list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streamed_export_is_gzipped(self):
+        response = self.client.get(reverse('book_export'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'Book 19', gzip.decompress(b''.join(response.streaming_content)))
+
+    def test_minify_keeps_preformatted_whitespace(self):
+        html, protected = minify_html('<ul>\n    <li>A</li>\n    <li>B</li>\n</ul>\n<textarea>\n  x\n  ')
+        self.assertEqual(html, '<ul>\n<li>A</li>\n<li>B</li>\n</ul>\n<textarea>\n  x\n  ')
+        self.assertTrue(protected)
+        self.assertEqual(minify_html('\n  y</textarea>\n  <p>', protected), ('\n  y</textarea>\n<p>', False))
+
+
+@override_settings(REPLICA_DATABASES=['replica0', 'replica1'], REPLICA_PIN_SECONDS=10)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = ReplicaMiddleware(self.route)
+
+    def route(self, request):
+        self.routes = (router.db_for_read(Book), router.db_for_write(Book))
+        return HttpResponse()
+
+    def test_get_reads_from_a_replica(self):
+        response = self.middleware(self.factory.get('/'))
+        self.assertIn(self.routes[0], ['replica0', 'replica1'])
+        self.assertEqual(self.routes[1], 'default')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_pins_client_to_primary(self):
+        response = self.middleware(self.factory.post('/'))
+        self.assertEqual(self.routes, ('default', 'default'))
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+        self.factory.cookies[PIN_COOKIE] = '1'
+        self.middleware(self.factory.get('/'))
+        self.assertEqual(self.routes, ('default', 'default'))
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(router.db_for_read(Book), 'default')
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas_nothing_is_pinned(self):
+        response = self.middleware(self.factory.post('/'))
+        self.assertEqual(self.routes[0], 'default')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(
+    INSTRUMENTATION=True,
+    SLOW_REQUEST_MS=0,
+    MIDDLEWARE=['library.instrumentation.InstrumentationMiddleware'] + settings.MIDDLEWARE,
+    TEMPLATES=[{**settings.TEMPLATES[0], 'BACKEND': 'library.instrumentation.InstrumentedTemplates'}],
+)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        create_book(title='Dune', author='Frank Herbert', description='', published_date=date(1965, 8, 1))
+
+    def test_slow_request_logged_with_its_sql(self):
+        with self.assertLogs('library.instrumentation', 'WARNING') as logs:
+            self.client.get(reverse('book_list'))
+        self.assertIn('Slow request GET /library/ -> 200', logs.output[0])
+        self.assertIn('2 queries', logs.output[0])
+        self.assertIn('FROM "library_book"', logs.output[0])
+
+    def test_metrics_in_prometheus_format(self):
+        with self.assertLogs('library.instrumentation', 'WARNING'):
+            self.client.get(reverse('book_detail', args=[Book.objects.get().pk]))
+            response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4')
+        body = response.content.decode()
+        self.assertIn('# TYPE library_request_duration_seconds histogram', body)
+        self.assertIn('library_request_render_seconds_count{method="GET",route="/library/book/<int:pk>/",status="200"}', body)
+        self.assertIn('library_request_queries_bucket{method="GET",route="/library/book/<int:pk>/",status="200",le="+Inf"}', body)
+
+    @override_settings(INSTRUMENTATION=False)
+    def test_metrics_hidden_when_disabled(self):
+        with self.assertLogs('library.instrumentation', 'WARNING'):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.books = [
+            create_book(title=f'Book {i}', author='Author', description='', published_date=date(2000, 1, 1))
+            for i in range(5)
+        ]
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_book_pages_within_budget(self):
+        with query_budget(max_queries=2):
+            self.client.get(reverse('book_list'))
+        with query_budget(max_queries=2):
+            self.client.get(reverse('book_detail', args=[self.books[0].pk]))
+
+    def test_repeated_statement_fails(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, '5 x SELECT'):
+            with query_budget():
+                for book in self.books:
+                    Book.objects.get(pk=book.pk)
+
+    def test_over_budget_fails(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, '2 queries, budget is 1'):
+            with query_budget(max_queries=1):
+                self.client.get(reverse('book_list'))
+
+    @override_settings(
+        QUERY_CHECKS=True,
+        QUERY_BUDGET=1,
+        MIDDLEWARE=['library.instrumentation.InstrumentationMiddleware'] + settings.MIDDLEWARE,
+    )
+    def test_dev_middleware_logs_problems(self):
+        with self.assertLogs('library.instrumentation', 'WARNING') as logs:
+            self.client.get(reverse('book_list'))
+        self.assertIn('Query problems in GET /library/', logs.output[0])
+
+
+class AuthorTests(TestCase):
+    def setUp(self):
+        for i in range(3):
+            create_book(title=f'Dune {i}', author='Frank Herbert', description='', published_date=date(1965, 8, 1))
+            create_book(title=f'Emma {i}', author=f'Author {i}', description='', published_date=date(1815, 12, 23))
+        self.herbert = Author.objects.get(name='Frank Herbert')
+
+    def test_list_loads_authors_in_the_same_query(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('book_list'))
+        self.assertContains(response, 'Frank Herbert', count=3)
+        self.assertContains(response, reverse('author_detail', args=[self.herbert.pk]))
+
+    def test_author_page_lists_their_books(self):
+        response = self.client.get(reverse('author_detail', args=[self.herbert.pk]))
+        self.assertEqual([book.title for book in response.context['books']], ['Dune 0', 'Dune 1', 'Dune 2'])
+        self.assertEqual(self.client.get(reverse('author_detail', args=[0])).status_code, 404)
+
+    def test_form_reuses_author_by_name(self):
+        self.client.post(reverse('book_create'), {
+            'title': 'Dune Messiah', 'author': ' Frank Herbert ',
+            'description': 'Spice.', 'published_date': '1969-10-15',
+        })
+        self.assertEqual(Book.objects.get(title='Dune Messiah').author, self.herbert)
+        self.assertEqual(Author.objects.count(), 4)
+
+    def test_renaming_author_updates_search_index(self):
+        self.herbert.name = 'F. Herbert'
+        self.herbert.save()
+        response = self.client.get(reverse('book_search'), {'q': 'f herbert'})
+        self.assertEqual(len(response.context['books']), 3)
+
+
+class BookFilterTests(TestCase):
+    def setUp(self):
+        create_book(title='Dune', author='Frank Herbert', description='', published_date=date(1965, 8, 1))
+        create_book(title='dune Messiah', author='Frank Herbert', description='', published_date=date(1969, 10, 15))
+        create_book(title='Emma', author='Jane Austen', description='', published_date=date(1815, 12, 23))
+        self.herbert = Author.objects.get(name='Frank Herbert')
+
+    def filter_titles(self, **params):
+        response = self.client.get(reverse('book_list'), params)
+        return [book.title for book in response.context['books']]
+
+    def plan(self, **params):
+        return BookFilterForm(params).filter(Book.objects.select_related('author')).explain()
+
+    def test_filters_and_sorts(self):
+        self.assertEqual(self.filter_titles(title='DUNE', sort='title'), ['Dune', 'dune Messiah'])
+        self.assertEqual(self.filter_titles(author=self.herbert.pk, sort='-published'), ['dune Messiah', 'Dune'])
+        self.assertEqual(self.filter_titles(year_from=1900, year_to=1965), ['Dune'])
+        self.assertEqual(self.filter_titles(sort='author'), ['Dune', 'dune Messiah', 'Emma'])
+        self.assertEqual(self.filter_titles(year_from='soon', sort='published'), ['Emma', 'Dune', 'dune Messiah'])
+
+    def test_prefix_wildcards_match_literally(self):
+        create_book(title='100% Dune', author='Frank Herbert', description='', published_date=date(2000, 1, 1))
+        self.assertEqual(self.filter_titles(title='100%'), ['100% Dune'])
+        self.assertEqual(self.filter_titles(title='_une'), [])
+
+    def test_every_filter_searches_an_index(self):
+        for params in [
+            {'title': 'dune'},
+            {'author': self.herbert.pk},
+            {'year_from': 1960},
+            {'year_from': 1960, 'year_to': 1969},
+            {'author': self.herbert.pk, 'year_from': 1960, 'year_to': 1969},
+        ]:
+            with self.subTest(params):
+                plan = self.plan(**params)
+                self.assertIn('SEARCH library_book USING INDEX', plan)
+                self.assertNotIn('SCAN library_book', plan)
+
+    def test_sorts_read_an_index_in_order(self):
+        for params in [
+            {'sort': 'title'},
+            {'sort': 'published'},
+            {'sort': '-published'},
+            {'sort': 'author'},
+            {'title': 'dune', 'sort': 'title'},
+            {'author': self.herbert.pk, 'sort': 'published'},
+            {'year_from': 1960, 'sort': '-published'},
+        ]:
+            with self.subTest(params):
+                plan = self.plan(**params)
+                self.assertNotIn('TEMP B-TREE', plan)
+                self.assertNotRegex(plan, r'(?m)SCAN library_book$')
+
+
+class BookSearchTests(TestCase):
+    def setUp(self):
+        for title, author in [('The Hobbit', 'J. R. R. Tolkien'), ('Ringworld', 'Larry Niven')]:
+            create_book(title=title, author=author, description='', published_date=date(1970, 1, 1))
+
+    def search(self, q):
+        response = self.client.get(reverse('book_search'), {'q': q})
+        return [book.title for book in response.context['books']]
+
+    def test_prefix_match_on_author(self):
+        self.assertEqual(self.search('tolk'), ['The Hobbit'])
+
+    def test_index_follows_edits_and_deletes(self):
+        book = Book.objects.get(title='Ringworld')
+        book.title = 'Protector'
+        book.save()
+        self.assertEqual(self.search('ringw'), [])
+        self.assertEqual(self.search('protec'), ['Protector'])
+        book.delete()
+        self.assertEqual(self.search('niven'), [])
+
+    def test_query_without_words(self):
+        self.assertEqual(self.search('"*'), [])
+
+
+class BookImportTests(TestCase):
+    def test_upload_inserts_valid_rows_and_reports_rejected(self):
+        upload = SimpleUploadedFile('books.csv', (
+            b'title,author,description,published_date\n'
+            b'Dune,Frank Herbert,Spice.,1965-08-01\n'
+            b'Emma,Jane Austen,Matchmaking.,not a date\n'
+            b'Solaris,Stanislaw Lem,Ocean.,1961-06-01\n'
+        ))
+        response = self.client.post(reverse('book_import'), {'file': upload})
+        report = response.context['report']
+        self.assertEqual(report.inserted, 2)
+        self.assertEqual(report.rejected_count, 1)
+        self.assertEqual(report.rejected[0][0], 3)
+        self.assertQuerysetEqual(Book.objects.order_by('title'), ['Dune', 'Solaris'], transform=str)
+
+    def test_command_imports_json_lines(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+            f.write('{"title": "Dune", "author": "Frank Herbert", "description": "Spice.", '
+                    '"published_date": "1965-08-01"}\n')
+            f.write('not json\n')
+        self.addCleanup(os.remove, f.name)
+        out = io.StringIO()
+        call_command('import_books', f.name, stdout=out, stderr=io.StringIO())
+        self.assertIn('Inserted 1 books, rejected 1 rows', out.getvalue())
+        self.assertTrue(Book.objects.filter(title='Dune').exists())
+
+
+class BookExportTests(TestCase):
+    def setUp(self):
+        create_book(title='Dune', author='Frank Herbert', description='Spice.', published_date=date(1965, 8, 1))
+
+    def test_csv_export(self):
+        response = self.client.get(reverse('book_export'))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,title,author,description,published_date')
+        self.assertTrue(lines[1].endswith(',Dune,Frank Herbert,Spice.,1965-08-01'))
+
+    def test_gzipped_json_lines_export(self):
+        response = self.client.get(reverse('book_export'), {'format': 'jsonl', 'gzip': '1'})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="books.jsonl.gz"')
+        record = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(record['title'], 'Dune')
+        self.assertEqual(record['published_date'], '1965-08-01')
+
+
+class BookApiTests(TestCase):
+    def setUp(self):
+        self.book = create_book(
+            title='Dune', author='Frank Herbert', description='Spice.', published_date=date(1965, 8, 1)
+        )
+
+    def test_list_with_field_selection_and_etag(self):
+        url = reverse('api_book_collection')
+        response = self.client.get(url, {'fields': 'title'})
+        self.assertEqual(response.json(), {'items': [{'id': self.book.pk, 'title': 'Dune'}], 'next_cursor': None})
+        response = self.client.get(url, {'fields': 'title'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_keyset_pagination(self):
+        create_book(title='Emma', author='Jane Austen', description='.', published_date=date(1815, 12, 23))
+        response = self.client.get(reverse('api_book_collection'), {'limit': 1})
+        self.assertEqual(response.json()['next_cursor'], self.book.pk)
+        response = self.client.get(reverse('api_book_collection'), {'after': self.book.pk})
+        self.assertEqual([item['title'] for item in response.json()['items']], ['Emma'])
+
+    def test_batch_create_is_all_or_nothing(self):
+        url = reverse('api_book_batch')
+        books = [
+            {'title': 'Emma', 'author': 'Jane Austen', 'description': '.', 'published_date': '1815-12-23'},
+            {'title': 'Solaris'},
+        ]
+        response = self.client.post(url, books, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']), ['1'])
+        response = self.client.post(url, books[:1], content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_patch_and_delete(self):
+        url = reverse('api_book_item', args=[self.book.pk])
+        response = self.client.patch(url, {'title': 'Dune Messiah'}, content_type='application/json')
+        self.assertEqual(response.json()['title'], 'Dune Messiah')
+        self.assertEqual(response.json()['published_date'], '1965-08-01')
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(Book.objects.exists())
+
+
+class BookBatchTests(TestCase):
+    def setUp(self):
+        self.books = [
+            create_book(title=title, author='Frank Herbert', description='', published_date=date(1965, 8, 1))
+            for title in ['Dune', 'Dune Messiah', 'Children of Dune']
+        ]
+        self.pks = [book.pk for book in self.books]
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_update_many_in_chunks(self):
+        with self.assertNumQueries(4):  # Savepoint, two UPDATEs, release
+            updated = Book.objects.update_many(self.pks, {'published_date': date(2000, 1, 1)}, chunk_size=2)
+        self.assertEqual(updated, 3)
+        self.assertEqual(set(Book.objects.values_list('published_date', flat=True)), {date(2000, 1, 1)})
+        self.assertGreater(Book.objects.get(pk=self.pks[0]).updated_at, self.books[0].updated_at)
+
+    def test_edit_reassigns_author_and_invalidates_cached_pages(self):
+        url = reverse('book_detail', args=[self.pks[0]])
+        self.client.get(url)
+        response = self.client.post(reverse('book_batch_edit'), {'ids': self.pks[:2], 'author': 'Brian Herbert'})
+        self.assertRedirects(response, reverse('book_list'))
+        self.assertEqual(Book.objects.filter(author__name='Brian Herbert').count(), 2)
+        self.assertEqual(Book.objects.get(pk=self.pks[2]).published_date, date(1965, 8, 1))
+        self.assertContains(self.client.get(url), 'Brian Herbert')
+        search = self.client.get(reverse('book_search'), {'q': 'brian'})
+        self.assertEqual(len(search.context['books']), 2)
+
+    def test_edit_with_invalid_values(self):
+        response = self.client.post(reverse('book_batch_edit'), {'ids': self.pks, 'published_date': 'soon'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_delete_after_confirmation(self):
+        url = reverse('book_batch_delete')
+        response = self.client.post(url, {'ids': self.pks[:2]})
+        self.assertContains(response, 'delete 2 selected books?')
+        self.assertEqual(Book.objects.count(), 3)
+        response = self.client.post(url, {'ids': self.pks[:2], 'confirm': 'true'})
+        self.assertRedirects(response, reverse('book_list'))
+        self.assertEqual(list(Book.objects.values_list('pk', flat=True)), self.pks[2:])
+
+    def test_api_update_and_delete(self):
+        response = self.client.patch(
+            reverse('api_book_batch'), {'ids': self.pks + [0], 'values': {'published_date': '1970-01-01'}},
+            content_type='application/json',
+        )
+        self.assertEqual(response.json(), {'updated': 3})
+        response = self.client.patch(
+            reverse('api_book_batch'), {'ids': self.pks, 'values': {'title': ''}}, content_type='application/json'
+        )
+        self.assertEqual(list(response.json()['errors']), ['title'])
+        response = self.client.post(
+            reverse('api_book_batch_delete'), {'ids': self.pks}, content_type='application/json'
+        )
+        self.assertEqual(response.json(), {'deleted': 3})
+        response = self.client.post(reverse('api_book_batch_delete'), {'ids': []}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class SoftDeleteTests(TestCase):
+    def setUp(self):
+        self.book = create_book(
+            title='Dune', author='Frank Herbert', description='Spice.', published_date=date(1965, 8, 1)
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_deleted_book_is_hidden_everywhere(self):
+        self.client.post(reverse('book_delete', args=[self.book.pk]))
+        self.assertEqual(Book.all_objects.get(pk=self.book.pk).title, 'Dune')
+        self.assertEqual(self.client.get(reverse('book_detail', args=[self.book.pk])).status_code, 404)
+        self.assertEqual(list(self.client.get(reverse('book_list')).context['books']), [])
+        self.assertEqual(list(self.client.get(reverse('book_search'), {'q': 'dune'}).context['books']), [])
+        response = self.client.get(reverse('author_detail', args=[self.book.author_id]))
+        self.assertNotContains(response, 'Dune')
+        self.assertEqual(self.client.get(reverse('api_book_collection')).json()['items'], [])
+
+    def test_purge_removes_only_expired_books_and_keeps_list_version(self):
+        recent = create_book(title='Emma', author='Jane Austen', description='', published_date=date(1815, 12, 23))
+        Book.objects.delete_many([self.book.pk, recent.pk])
+        Book.all_objects.filter(pk=self.book.pk).update(deleted_at=timezone.now() - timedelta(days=30))
+        etag = self.client.get(reverse('book_list'))['ETag']
+        self.assertEqual(purge_deleted_books(older_than_days=7, batch_size=1, pause=0), 1)
+        self.assertEqual(list(Book.all_objects.values_list('pk', flat=True)), [recent.pk])
+        self.assertEqual(self.client.get(reverse('book_list'))['ETag'], etag)
+
+
+class VacuumTests(TransactionTestCase):
+    def test_switches_to_incremental_and_frees_pages(self):
+        for title in range(200):
+            create_book(title=str(title), author='Anonymous', description='x' * 1000, published_date=date(2000, 1, 1))
+        Book.objects.all().delete()
+        report = vacuum_database()
+        self.assertGreater(report['freed_pages'], 0)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA auto_vacuum')
+            self.assertEqual(cursor.fetchone()[0], 2)
+            cursor.execute('PRAGMA freelist_count')
+            self.assertEqual(cursor.fetchone()[0], 0)
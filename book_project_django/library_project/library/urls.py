@@ -1,11 +1,22 @@
 from django.urls import path
-from . import views
+from . import api, instrumentation, views
 
 
 urlpatterns = [
     path('', views.book_list, name='book_list'),
+    path('search/', views.book_search, name='book_search'),
+    path('export/', views.book_export, name='book_export'),
     path('book/<int:pk>/', views.book_detail, name='book_detail'),
     path('book/new/', views.book_create, name='book_create'),
+    path('book/import/', views.book_import, name='book_import'),
+    path('book/batch/edit/', views.book_batch_edit, name='book_batch_edit'),
+    path('book/batch/delete/', views.book_batch_delete, name='book_batch_delete'),
     path('book/<int:pk>/edit/', views.book_edit, name='book_edit'),
     path('book/<int:pk>/delete/', views.book_delete, name='book_delete'),
+    path('author/<int:pk>/', views.author_detail, name='author_detail'),
+    path('api/books/', api.book_collection, name='api_book_collection'),
+    path('api/books/batch/', api.book_batch, name='api_book_batch'),
+    path('api/books/batch/delete/', api.book_batch_delete, name='api_book_batch_delete'),
+    path('api/books/<int:pk>/', api.book_item, name='api_book_item'),
+    path('metrics/', instrumentation.metrics_view, name='metrics'),
 ]
@@ -1,33 +1,136 @@
+import io
+
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Book
-from .forms import BookForm
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_POST
+from .models import Author, Book
+from .book_io import FORMATS, detect_format, export_filename, import_books, iter_book_rows, iter_export
+from .conditional import book_validators, list_validators, not_modified, set_validators
+from .forms import BookBatchForm, BookFilterForm, BookForm, ImportForm
+from .search import match_expression, search_books
+
+SEARCH_PAGE_SIZE = 20
+# Books one batch edit or delete may select; the statements are chunked to
+# the bound parameter limit, the transaction is one
+MAX_BATCH_IDS = 10000
+
+
+def book_detail_cache_key(pk):
+    """
+    Returns the cache key of a rendered book detail page.
+
+    Args:
+        pk (int): Primary key of the book.
+
+    Returns:
+        str: The cache key.
+    """
+    return f'book_detail:{pk}'
+
 
 def book_list(request):
     """
     View to display a list of all books.
 
+    The ``title`` (prefix), ``author``, ``year_from``, ``year_to`` and
+    ``sort`` query parameters filter and order the list, see BookFilterForm.
+    The page carries an ETag and Last-Modified taken from the book version
+    counter; a client whose copy is still current gets a 304 without the
+    books being queried or the template rendered.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: Rendered template with a list of books, or an empty 304 response.
+    """
+    etag, last_modified = list_validators()
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+    filter_form = BookFilterForm(request.GET)
+    books = filter_form.filter(Book.objects.select_related('author'))
+    context = {'books': books, 'filter_form': filter_form}
+    return set_validators(render(request, 'library/book_list.html', context), etag, last_modified)
+
+def author_detail(request, pk):
+    """
+    View to display an author and the list of their books.
+
     Args:
         request (HttpRequest): The HTTP request object.
+        pk (int): Primary key of the author.
 
     Returns:
-        HttpResponse: Rendered template with a list of books.
+        HttpResponse: Rendered template with the author's books.
     """
-    books = Book.objects.all()
-    return render(request, 'library/book_list.html', {'books': books})
+    author = get_object_or_404(Author, pk=pk)
+    books = author.books.order_by('title')
+    return render(request, 'library/author_detail.html', {'author': author, 'books': books})
+
+def book_search(request):
+    """
+    View to search title, author and description through the FTS5 index.
+
+    Every word of the ``q`` query parameter matches as a prefix and results
+    are ordered by relevance; ``page`` selects the page of results.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: Rendered template with the matching books.
+    """
+    q = request.GET.get('q', '')
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    books = []
+    has_next = False
+    expression = match_expression(q)
+    if expression:
+        books = search_books(expression, SEARCH_PAGE_SIZE + 1, (page - 1) * SEARCH_PAGE_SIZE)
+        has_next = len(books) > SEARCH_PAGE_SIZE
+        books = books[:SEARCH_PAGE_SIZE]
+    return render(request, 'library/search.html', {
+        'q': q, 'books': books, 'page': page, 'has_next': has_next,
+        'previous_page': page - 1, 'next_page': page + 1,
+    })
 
 def book_detail(request, pk):
     """
     View to display the details of a single book.
 
+    Only ``updated_at`` is read before answering a conditional request with
+    304. Otherwise the rendered page is cached by primary key until the book
+    is edited or deleted.
+
     Args:
         request (HttpRequest): The HTTP request object.
         pk (int): Primary key of the book to retrieve.
 
     Returns:
-        HttpResponse: Rendered template with book details.
+        HttpResponse: Rendered template with book details, or an empty 304 response.
     """
-    book = get_object_or_404(Book, pk=pk)
-    return render(request, 'library/book_detail.html', {'book': book})
+    validators = book_validators(pk)
+    if validators is None:
+        raise Http404('No Book matches the given query.')
+    response = not_modified(request, *validators)
+    if response is not None:
+        return response
+    # The page is cached with its ETag and only served for the same one: a
+    # replica that has not caught up yet may have cached an older version
+    etag = validators[0]
+    cache_key = book_detail_cache_key(pk)
+    cached_etag, html = cache.get(cache_key, (None, None))
+    if cached_etag != etag:
+        book = get_object_or_404(Book.objects.select_related('author'), pk=pk)
+        html = render_to_string('library/book_detail.html', {'book': book}, request)
+        cache.set(cache_key, (etag, html))
+    return set_validators(HttpResponse(html), *validators)
 
 def book_create(request):
     """
@@ -48,6 +151,56 @@ def book_create(request):
         form = BookForm()
     return render(request, 'library/book_form.html', {'form': form})
 
+def book_import(request):
+    """
+    View to import books from an uploaded CSV or JSON Lines file.
+
+    The upload is parsed line by line, each row is validated with BookForm
+    and valid rows are inserted with bulk_create in batched transactions.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: Rendered upload form, with the import report after a POST.
+    """
+    report = None
+    if request.method == "POST":
+        form = ImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+            report = import_books(stream, detect_format(upload.name))
+    else:
+        form = ImportForm()
+    return render(request, 'library/book_import.html', {'form': form, 'report': report})
+
+def book_export(request):
+    """
+    View to stream every book as a CSV or JSON Lines download.
+
+    The ``format`` query parameter selects 'csv' (default) or 'jsonl' and
+    ``gzip=1`` compresses the file. Rows are read with ``.iterator()`` and
+    encoded chunk by chunk, so memory use does not depend on table size.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        StreamingHttpResponse: The file as an attachment.
+    """
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest('Unsupported format')
+    compress = request.GET.get('gzip', '0') in ('1', 'true')
+    if compress:
+        content_type = 'application/gzip'
+    else:
+        content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(iter_export(iter_book_rows(), fmt, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(fmt, compress)}"'
+    return response
+
 def book_edit(request, pk):
     """
     View to handle editing an existing book.
@@ -59,11 +212,12 @@ def book_edit(request, pk):
     Returns:
         HttpResponse: Rendered form template or redirect to book detail on successful save.
     """
-    book = get_object_or_404(Book, pk=pk)
+    book = get_object_or_404(Book.objects.select_related('author'), pk=pk)
     if request.method == "POST":
         form = BookForm(request.POST, instance=book)
         if form.is_valid():
             form.save()
+            cache.delete(book_detail_cache_key(pk))
             return redirect('book_detail', pk=book.pk)
     else:
         form = BookForm(instance=book)
@@ -71,7 +225,8 @@ def book_edit(request, pk):
 
 def book_delete(request, pk):
     """
-    View to handle the deletion of a book.
+    View to handle the deletion of a book, which is only marked deleted,
+    see Book.soft_delete.
 
     Args:
         request (HttpRequest): The HTTP request object.
@@ -82,6 +237,70 @@ def book_delete(request, pk):
     """
     book = get_object_or_404(Book, pk=pk)
     if request.method == "POST":
-        book.delete()
+        book.soft_delete()
+        cache.delete(book_detail_cache_key(pk))
         return redirect('book_list')
     return render(request, 'library/book_confirm_delete.html', {'book': book})
+
+def selected_book_ids(request):
+    """
+    Reads the IDs of the books selected on the list page from the form.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        list[int] | None: The distinct IDs, sorted, or None if one is not
+        an integer or there are more than MAX_BATCH_IDS.
+    """
+    try:
+        pks = sorted({int(pk) for pk in request.POST.getlist('ids')})
+    except ValueError:
+        return None
+    return pks if len(pks) <= MAX_BATCH_IDS else None
+
+@require_POST
+def book_batch_edit(request):
+    """
+    View to reassign the author and/or set the publication date of the books
+    selected on the list page, with set-based UPDATEs in one transaction.
+    Blank fields are left unchanged.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: Redirect to book list, or 400 if the IDs or values are invalid.
+    """
+    pks = selected_book_ids(request)
+    form = BookBatchForm(request.POST)
+    if pks is None or not form.is_valid():
+        return HttpResponseBadRequest('Invalid selection or values')
+    values = form.values()
+    if pks and values:
+        Book.objects.update_many(pks, values)
+        cache.delete_many([book_detail_cache_key(pk) for pk in pks])
+    return redirect('book_list')
+
+@require_POST
+def book_batch_delete(request):
+    """
+    View to delete the books selected on the list page, after a
+    confirmation page, marking them with set-based UPDATEs in one transaction.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: Rendered confirmation template or redirect to book list on successful deletion.
+    """
+    pks = selected_book_ids(request)
+    if pks is None:
+        return HttpResponseBadRequest('Invalid selection')
+    if not pks:
+        return redirect('book_list')
+    if request.POST.get('confirm') != 'true':
+        return render(request, 'library/book_batch_confirm_delete.html', {'book_ids': pks})
+    Book.objects.delete_many(pks)
+    cache.delete_many([book_detail_cache_key(pk) for pk in pks])
+    return redirect('book_list')
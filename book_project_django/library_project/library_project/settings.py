@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -20,12 +21,15 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-^#l=f=qk)&x+uv_exph8sg+od-h*igx!fa-_ssd#pyh-j5zxkl'
+SECRET_KEY = os.getenv(
+    'DJANGO_SECRET_KEY', 'django-insecure-^#l=f=qk)&x+uv_exph8sg+od-h*igx!fa-_ssd#pyh-j5zxkl'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# The production server (gunicorn.conf.py) sets DJANGO_DEBUG=0
+DEBUG = os.getenv('DJANGO_DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1,[::1]').split(',')
 
 
 # Application definition
@@ -48,6 +52,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'library.routers.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'library_project.urls'
@@ -81,6 +86,94 @@ DATABASES = {
     }
 }
 
+# Read replicas, a comma-separated list of SQLite files kept as copies of
+# db.sqlite3 (see `manage.py copy_replicas`). GET requests read from one of
+# them; writes, and a client's requests for REPLICA_PIN_SECONDS after it
+# wrote, use the primary. See library/routers.py
+REPLICA_PATHS = [path for path in os.getenv('LIBRARY_REPLICAS', '').split(',') if path]
+REPLICA_DATABASES = []
+for index, path in enumerate(REPLICA_PATHS):
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '10'))
+DATABASE_ROUTERS = ['library.routers.ReplicaRouter']
+
+# PRAGMA profile applied to new SQLite connections, see library/sqlite_profile.py
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'production')
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Rendered book detail pages are cached in-process (LRU) unless BOOK_CACHE_URL
+# points at a Redis-compatible server shared by all workers.
+
+BOOK_CACHE_URL = os.getenv('BOOK_CACHE_URL', 'local')
+
+if BOOK_CACHE_URL == 'local':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'TIMEOUT': 300,
+            'OPTIONS': {'MAX_ENTRIES': 1024},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': BOOK_CACHE_URL,
+            'TIMEOUT': 300,
+            'KEY_PREFIX': 'library',
+        }
+    }
+
+
+# Instrumentation
+# Opt-in request timings (SQL, rendering, total), a log of slow requests with
+# their SQL and Prometheus histograms on /metrics/, see library/instrumentation.py
+
+INSTRUMENTATION = os.getenv('INSTRUMENTATION') == '1'
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '500'))
+
+# Development checks: log requests that repeat a statement (N+1 queries) or
+# run more than QUERY_BUDGET queries
+QUERY_CHECKS = os.getenv('QUERY_CHECKS') == '1'
+QUERY_BUDGET = int(os.getenv('QUERY_BUDGET', '20'))
+
+if INSTRUMENTATION or QUERY_CHECKS:
+    MIDDLEWARE.insert(0, 'library.instrumentation.InstrumentationMiddleware')
+    TEMPLATES[0]['BACKEND'] = 'library.instrumentation.InstrumentedTemplates'
+
+
+# Compression
+# Opt-in response compression (brotli if installed, or gzip) and HTML
+# minification of the templates when they are loaded, see library/compression.py
+
+COMPRESSION = os.getenv('COMPRESSION') == '1'
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '500'))
+if os.getenv('COMPRESSION_TYPES'):
+    # library.compression.COMPRESSIBLE_TYPES by default
+    COMPRESSION_TYPES = os.getenv('COMPRESSION_TYPES').split(',')
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))
+MINIFY_HTML = os.getenv('MINIFY_HTML') == '1'
+
+if COMPRESSION:
+    MIDDLEWARE.insert(1, 'library.compression.CompressionMiddleware')
+if MINIFY_HTML:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'library.compression.MinifyingFilesystemLoader',
+            'library.compression.MinifyingAppDirectoriesLoader',
+        ]),
+    ]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -120,6 +213,16 @@ STATIC_URL = '/static/'  # URL для доступа к статическим 
 STATICFILES_DIRS = [
     BASE_DIR / 'library/static',  # путь к папке с статическими файлами
 ]
+# `manage.py collectstatic` writes the files here, each also under a
+# fingerprinted name that {% static %} links, with .gz/.br variants (see
+# library/storage.py). The web server serves STATIC_ROOT: fingerprinted
+# names with "Cache-Control: public, max-age=31536000, immutable", the
+# precompressed variants as they are (nginx: gzip_static, brotli_static)
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'library.storage.CompressedManifestStaticFilesStorage'},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
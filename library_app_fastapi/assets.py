@@ -0,0 +1,199 @@
+"""
+Builds the static assets for production: every file of the source directory
+is copied to the build directory under its own name and a fingerprinted one
+(``styles.css`` and ``styles.3f2a1c9b0d4e.css``), with gzip and, if the
+``brotli`` package is installed, brotli variants next to it. A manifest maps
+the names to the fingerprinted ones. Run from this directory:
+
+    python -m assets
+
+The app serves the build instead of ``static/`` once it exists.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+
+from starlette.datastructures import Headers
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:  # Optional, without it only .gz variants are built
+    brotli = None
+
+MANIFEST_NAME = "manifest.json"
+
+# Text formats worth precompressing; images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".mjs", ".json", ".map", ".svg", ".txt", ".html", ".xml")
+
+# Precompressed variants by content coding, in order of preference
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+# A fingerprinted file never changes, so browsers may keep it for a year;
+# a file under its own name may change with the next build
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def fingerprinted_name(name, content):
+    """
+    Inserts the hash of a file's content into its name.
+
+    Args:
+        name (str): The file name, e.g. "css/styles.css".
+        content (bytes): The file content.
+
+    Returns:
+        str: The name with the hash before the extension, e.g.
+        "css/styles.3f2a1c9b0d4e.css".
+    """
+    root, ext = os.path.splitext(name)
+    return f"{root}.{hashlib.md5(content).hexdigest()[:12]}{ext}"
+
+
+def precompress(path):
+    """
+    Writes the gzip and brotli variants of a text file next to it, unless
+    they are not smaller.
+
+    Args:
+        path (str): The file path.
+    """
+    if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return
+    with open(path, "rb") as f:
+        content = f.read()
+    variants = {".gz": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(content, quality=11)
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(content):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+
+
+def build_assets(source_dir, build_dir):
+    """
+    Fingerprints and precompresses the files of ``source_dir`` into
+    ``build_dir``.
+
+    Files of earlier builds are kept, so pages cached by clients can still
+    load the assets they link. The manifest is written last, so a
+    half-finished build is never served.
+
+    Args:
+        source_dir (str): The directory of the source assets.
+        build_dir (str): Where to write the built assets.
+
+    Returns:
+        dict: The manifest, fingerprinted names by name.
+    """
+    manifest = {}
+    for directory, _, filenames in os.walk(source_dir):
+        for filename in sorted(filenames):
+            name = os.path.relpath(os.path.join(directory, filename), source_dir).replace(os.sep, "/")
+            with open(os.path.join(directory, filename), "rb") as f:
+                content = f.read()
+            manifest[name] = fingerprinted_name(name, content)
+            for target in (name, manifest[name]):
+                path = os.path.join(build_dir, target)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(content)
+                precompress(path)
+    manifest_path = os.path.join(build_dir, MANIFEST_NAME)
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return manifest
+
+
+def load_manifest(build_dir):
+    """
+    Reads the manifest of a build.
+
+    Args:
+        build_dir (str): The build directory.
+
+    Returns:
+        dict | None: Fingerprinted names by name, None if nothing was built.
+    """
+    try:
+        with open(os.path.join(build_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def accepted_encodings(headers):
+    """
+    Lists the content codings a client accepts.
+
+    Args:
+        headers (Headers): The request headers.
+
+    Returns:
+        set[str]: The codings of Accept-Encoding, without those refused with q=0.
+    """
+    encodings = set()
+    for item in headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+class AssetStaticFiles(StaticFiles):
+    """
+    Serves a build of ``build_assets``: fingerprinted files with a
+    year-long immutable Cache-Control, everything else revalidated, and
+    the precompressed variant of a file to clients accepting it.
+
+    Args:
+        directory (str): The build directory.
+        manifest (dict): The manifest of the build.
+    """
+
+    def __init__(self, *, directory, manifest, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.fingerprinted = set(manifest.values())
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        name = self.get_path(scope).replace(os.sep, "/")
+        variants = [
+            (coding, full_path + suffix) for coding, suffix in ENCODINGS.items() if os.path.isfile(full_path + suffix)
+        ]
+        encodings = accepted_encodings(Headers(scope=scope))
+        coding = next((coding for coding, _ in variants if coding in encodings), None)
+        if coding is not None:
+            full_path = full_path + ENCODINGS[coding]
+            stat_result = os.stat(full_path)
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if variants:
+            response.headers["vary"] = "Accept-Encoding"
+        if coding is not None:
+            response.headers["content-encoding"] = coding
+        if name in self.fingerprinted:
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["cache-control"] = REVALIDATE_CACHE_CONTROL
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress the static assets.")
+    parser.add_argument("--source", default="static")
+    parser.add_argument("--build", default=os.getenv("STATIC_BUILD_DIR", "./static_build"))
+    args = parser.parse_args()
+
+    manifest = build_assets(args.source, args.build)
+    for name, fingerprinted in manifest.items():
+        print(f"{name} -> {fingerprinted}")
+    if brotli is None:
+        print("The brotli package is not installed, only gzip variants were built.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Exports every book to a CSV or JSON Lines file, optionally gzipped.
+
+Run from this directory; the format follows the file extension:
+
+    python -m book_export books.csv
+    python -m book_export books.jsonl.gz
+    python -m book_export - --format jsonl > books.jsonl
+"""
+import argparse
+import sys
+import time
+
+from book_io import FORMATS, detect_format, iter_export
+from main import MIGRATE_ON_STARTUP, SessionLocal, create_schema, iter_book_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export books to a CSV or JSON Lines file.")
+    parser.add_argument("path", help='The output file, or "-" for stdout')
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--gzip", action="store_true", help="Defaults to true for .gz paths")
+    args = parser.parse_args()
+
+    if MIGRATE_ON_STARTUP:
+        create_schema()
+
+    compress = args.gzip or args.path.endswith(".gz")
+    fmt = args.format or detect_format(args.path.removesuffix(".gz"))
+    start = time.perf_counter()
+    written = 0
+    db = SessionLocal()
+    output = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+    try:
+        for chunk in iter_export(iter_book_rows(db), fmt, compress):
+            output.write(chunk)
+            written += len(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        db.close()
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {written / 1e6:.1f} MB in {elapsed:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Imports books from a CSV or JSON Lines file.
+
+Run from this directory:
+
+    python -m book_import books.csv
+    python -m book_import books.jsonl --batch-size 5000
+"""
+import argparse
+
+from sqlalchemy import insert
+
+from book_io import FORMATS, IMPORT_BATCH_SIZE, ImportReport, detect_format, iter_records, iter_valid_batches
+from main import MIGRATE_ON_STARTUP, Book, SessionLocal, create_schema, link_authors, validate_book
+from replicas import use_primary
+
+
+def import_books(stream, fmt, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validates and inserts books from a text stream, one transaction per batch.
+
+    Args:
+        stream (TextIO): The opened CSV or JSON Lines file.
+        fmt (str): "csv" or "jsonl".
+        batch_size (int): The number of rows per transaction.
+
+    Returns:
+        ImportReport: The number of inserted and rejected rows and throughput.
+    """
+    report = ImportReport()
+    # The authors are looked up where the books are inserted
+    with use_primary():
+        for batch in iter_valid_batches(iter_records(stream, fmt), validate_book, report, batch_size):
+            with SessionLocal.begin() as db:
+                db.execute(insert(Book), link_authors(db, batch))
+            report.inserted += len(batch)
+    return report.finish()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import books from a CSV or JSON Lines file.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if MIGRATE_ON_STARTUP:
+        create_schema()
+
+    fmt = args.format or detect_format(args.path)
+    with open(args.path, encoding="utf-8", newline="") as stream:
+        report = import_books(stream, fmt, args.batch_size)
+    for line_number, errors in report.rejected:
+        print(f"Line {line_number}: {errors}")
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
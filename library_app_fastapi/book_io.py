@@ -0,0 +1,204 @@
+import csv
+import io
+import json
+import os
+import time
+import zlib
+
+BOOK_FIELDS = ("title", "author", "description", "published_date")
+EXPORT_FIELDS = ("id",) + BOOK_FIELDS
+FORMATS = ("csv", "jsonl")
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_REJECTIONS = 100
+EXPORT_CHUNK_SIZE = 1000
+
+
+def detect_format(filename):
+    """
+    Guesses the file format from its extension.
+
+    Args:
+        filename (str): The name of the file, e.g. "books.jsonl".
+
+    Returns:
+        str: "csv" or "jsonl".
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    raise ValueError(f"Cannot tell the format of {filename!r}, expected .csv or .jsonl")
+
+
+def export_filename(fmt, compress):
+    """
+    Returns the download name of an export.
+
+    Args:
+        fmt (str): "csv" or "jsonl".
+        compress (bool): Whether the export is gzip-compressed.
+
+    Returns:
+        str: E.g. "books.csv" or "books.jsonl.gz".
+    """
+    return f"books.{fmt}" + (".gz" if compress else "")
+
+
+def iter_records(stream, fmt):
+    """
+    Parses books from a text stream one line at a time.
+
+    Only the book fields are kept and every value is turned into a string,
+    so CSV and JSON Lines records look the same to the validators.
+
+    Args:
+        stream (TextIO): The opened file; CSV files need a header row.
+        fmt (str): "csv" or "jsonl".
+
+    Yields:
+        tuple: The line number, the record (or None) and a parse error (or None).
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, _normalize(record), None
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Expected a JSON object"
+                continue
+            yield line_number, _normalize(record), None
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _normalize(record):
+    return {
+        field: "" if record.get(field) is None else str(record[field]).strip()
+        for field in BOOK_FIELDS
+    }
+
+
+
+def iter_export(rows, fmt, compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Encodes rows as CSV or JSON Lines, yielding bytes every ``chunk_size`` rows.
+
+    Only one chunk is held in memory, so the rows should come from a
+    server-side cursor for the whole export to run in constant memory.
+
+    Args:
+        rows (Iterable): Tuples of values in ``EXPORT_FIELDS`` order.
+        fmt (str): "csv" or "jsonl".
+        compress (bool): Whether to gzip the output.
+        chunk_size (int): The number of rows encoded per yielded chunk.
+
+    Yields:
+        bytes: The next piece of the file.
+    """
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        write_row = writer.writerow
+    elif fmt == "jsonl":
+        def write_row(row):
+            buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, row)), default=str))
+            buffer.write("\n")
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def drain():
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    for count, row in enumerate(rows, start=1):
+        write_row(row)
+        if count % chunk_size == 0:
+            chunk = drain()
+            if chunk:
+                yield chunk
+    chunk = drain()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+def iter_valid_batches(records, validate, report, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validates parsed records and groups the valid ones into batches.
+
+    Args:
+        records (Iterable): Tuples produced by ``iter_records``.
+        validate (Callable): Takes a record and returns ``(values, errors)``.
+        report (ImportReport): Collects rejected rows.
+        batch_size (int): The number of rows per batch.
+
+    Yields:
+        list: Validated rows as returned by ``validate``, ready for a bulk insert.
+    """
+    batch = []
+    for line_number, record, error in records:
+        if error is None:
+            values, errors = validate(record)
+        else:
+            values, errors = None, {"row": [error]}
+        if values is None:
+            report.reject(line_number, errors)
+            continue
+        batch.append(values)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ImportReport:
+    """
+    Counts inserted and rejected rows of a bulk import and its throughput.
+
+    Attributes:
+        inserted (int): The number of rows inserted.
+        rejected_count (int): The number of rows rejected.
+        rejected (list): ``(line_number, errors)`` of the first rejected rows.
+        elapsed (float): Seconds from start to ``finish()``.
+    """
+
+    def __init__(self):
+        self.inserted = 0
+        self.rejected_count = 0
+        self.rejected = []
+        self.elapsed = 0.0
+        self._started = time.perf_counter()
+
+    def reject(self, line_number, errors):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REPORTED_REJECTIONS:
+            self.rejected.append((line_number, errors))
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self._started
+        return self
+
+    @property
+    def rows_per_second(self):
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"Inserted {self.inserted} books, rejected {self.rejected_count} rows "
+            f"in {self.elapsed:.2f} s ({self.rows_per_second:.0f} rows/s)"
+        )
@@ -0,0 +1,243 @@
+import re
+import zlib
+
+from jinja2.ext import Extension
+from jinja2.lexer import Token
+from starlette.datastructures import Headers, MutableHeaders
+
+from assets import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # Optional, without it responses are only gzipped
+    brotli = None
+
+# Content types worth compressing; images, fonts and archives are
+# compressed already
+COMPRESSIBLE_TYPES = (
+    "text/html", "text/css", "text/plain", "text/csv", "text/javascript", "application/javascript",
+    "application/json", "application/x-ndjson", "application/xml", "image/svg+xml",
+)
+# Smaller responses gain less than the Content-Encoding and Vary headers cost
+MINIMUM_SIZE = 500
+GZIP_LEVEL = 6
+# Brotli's higher qualities are meant for precompressed files, 4 compresses
+# better than gzip at about the same speed
+BROTLI_QUALITY = 4
+
+# Elements whose whitespace is content
+PROTECTED_TAG = re.compile(r"<(/?)(pre|textarea|script|style)\b", re.IGNORECASE)
+# A run of whitespace spanning lines renders like a single space
+LINE_BREAK_WHITESPACE = re.compile(r"\s*\n\s*")
+
+
+def choose_encoding(headers):
+    """
+    Picks the content coding of a response from Accept-Encoding.
+
+    Args:
+        headers (Headers): The request headers.
+
+    Returns:
+        str | None: "br", "gzip", or None to send the response as it is.
+    """
+    encodings = accepted_encodings(headers)
+    if "br" in encodings and brotli is not None:
+        return "br"
+    if "gzip" in encodings:
+        return "gzip"
+    return None
+
+
+def is_compressible(content_type, content_types=COMPRESSIBLE_TYPES):
+    """
+    Tells whether a content type is in the allowlist, ignoring parameters.
+
+    Args:
+        content_type (str | None): The Content-Type header.
+        content_types (Iterable[str]): The allowed media types.
+
+    Returns:
+        bool: Whether responses of this type are compressed.
+    """
+    return bool(content_type) and content_type.split(";")[0].strip().lower() in content_types
+
+
+def weak_etag(etag):
+    """
+    Marks a strong ETag as weak: the compressed body is not byte-identical to
+    the one the ETag was computed for, but it is semantically equivalent.
+
+    Args:
+        etag (str): The ETag header.
+
+    Returns:
+        str: The weak ETag.
+    """
+    return f"W/{etag}" if etag.startswith('"') else etag
+
+
+class Compressor:
+    """
+    Compresses a body chunk by chunk; every chunk is flushed, so a streamed
+    page still reaches the client piece by piece.
+
+    Args:
+        coding (str): "br" or "gzip".
+        gzip_level (int): The zlib compression level, 1-9.
+        brotli_quality (int): The brotli quality, 0-11.
+    """
+
+    def __init__(self, coding, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+        self.coding = coding
+        if coding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip header and trailer
+
+    def compress(self, data, last=False):
+        """
+        Compresses the next chunk.
+
+        Args:
+            data (bytes): The chunk.
+            last (bool): Whether it is the last chunk of the body.
+
+        Returns:
+            bytes: The compressed data to send.
+        """
+        if self.coding == "br":
+            return self._brotli.process(data) + (self._brotli.finish() if last else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with brotli or gzip, whichever
+    the client prefers of those it accepts.
+
+    Only responses of ``content_types`` of at least ``minimum_size`` bytes
+    are compressed, and none that already have a Content-Encoding, such as
+    precompressed static files. Streamed responses are compressed chunk by
+    chunk. A strong ETag is made weak, which the conditional request
+    handling of the routes accepts.
+
+    Args:
+        app (ASGIApp): The wrapped application.
+        minimum_size (int): Smaller responses are sent as they are.
+        content_types (Iterable[str]): The media types to compress.
+        gzip_level (int): The zlib compression level, 1-9.
+        brotli_quality (int): The brotli quality, 0-11.
+    """
+
+    def __init__(
+        self, app, minimum_size=MINIMUM_SIZE, content_types=COMPRESSIBLE_TYPES, gzip_level=GZIP_LEVEL,
+        brotli_quality=BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = frozenset(content_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # The body of a HEAD response is never sent, there is nothing to compress
+        coding = choose_encoding(Headers(scope=scope)) if scope["method"] != "HEAD" else None
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                # Held back until the first chunk of the body tells the size
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(scope=start)
+                compressor = self.compressor_for(headers, coding, len(body), more_body)
+                if compressor:
+                    headers["content-encoding"] = coding
+                    del headers["content-length"]
+                    if "etag" in headers:
+                        headers["etag"] = weak_etag(headers["etag"])
+                await send(start)
+            if compressor:
+                message = {**message, "body": compressor.compress(body, last=not more_body)}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def compressor_for(self, headers, coding, first_chunk_size, more_body):
+        """
+        Decides whether to compress a response and adds the Vary header.
+
+        Args:
+            headers (MutableHeaders): The response headers.
+            coding (str | None): The chosen content coding.
+            first_chunk_size (int): The size of the first chunk of the body.
+            more_body (bool): Whether more chunks follow.
+
+        Returns:
+            Compressor | bool: The compressor, or False to send the response
+            as it is.
+        """
+        if not is_compressible(headers.get("content-type"), self.content_types) or "content-encoding" in headers:
+            return False
+        headers.add_vary_header("Accept-Encoding")
+        if "content-length" in headers:
+            too_small = int(headers["content-length"]) < self.minimum_size
+        else:
+            # A streamed response of unknown size is assumed to be large
+            too_small = not more_body and first_chunk_size < self.minimum_size
+        if coding is None or too_small:
+            return False
+        return Compressor(coding, self.gzip_level, self.brotli_quality)
+
+
+def minify_html(html, protected=False):
+    """
+    Collapses whitespace spanning lines into a single line break, except
+    inside ``<pre>``, ``<textarea>``, ``<script>`` and ``<style>``. The page
+    renders the same.
+
+    Args:
+        html (str): A piece of HTML.
+        protected (bool): Whether the piece starts inside one of those elements.
+
+    Returns:
+        tuple: The minified HTML and whether it ends inside one of those elements.
+    """
+    parts = []
+    position = 0
+    for match in PROTECTED_TAG.finditer(html):
+        segment = html[position:match.start()]
+        parts.append(segment if protected else LINE_BREAK_WHITESPACE.sub("\n", segment))
+        protected = not match.group(1)
+        position = match.start()
+    segment = html[position:]
+    parts.append(segment if protected else LINE_BREAK_WHITESPACE.sub("\n", segment))
+    return "".join(parts), protected
+
+
+class MinifyExtension(Extension):
+    """
+    Jinja2 extension minifying the HTML of templates when they are compiled,
+    see ``minify_html``. Only the template source is changed, never the
+    values it outputs, and rendering costs nothing extra.
+    """
+
+    def filter_stream(self, stream):
+        protected = False
+        for token in stream:
+            if token.type == "data":
+                value, protected = minify_html(token.value, protected)
+                token = Token(token.lineno, "data", value)
+            yield token
@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from sqlalchemy import column, select, table, text
+
+# A single-row counter that triggers bump on every INSERT, UPDATE and DELETE
+# of books, so list pages are validated without scanning the table.
+LIST_VERSION_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS books_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO books_version (id, version, updated_at)
+    VALUES (1, 1, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+    """,
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS books_version_{event.lower()} AFTER {event} ON books{condition} BEGIN
+        UPDATE books_version
+        SET version = version + 1, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+        WHERE id = 1;
+    END
+    """
+    for event, condition in (
+        ("INSERT", ""),
+        ("UPDATE", ""),
+        # Purging soft deleted books changes no page
+        ("DELETE", " WHEN old.deleted_at IS NULL"),
+    )
+]
+
+# A SELECT rather than text(), so sessions routing reads send it to the
+# same replica as the list itself, see replicas.py
+books_version = table("books_version", column("id"), column("version"), column("updated_at"))
+LIST_VERSION_SQL = select(books_version.c.version, books_version.c.updated_at).where(books_version.c.id == 1)
+
+
+def create_list_version(connection):
+    """
+    Creates the books version counter and its triggers if they do not exist yet.
+
+    Args:
+        connection (Connection): A connection inside a transaction.
+    """
+    for statement in LIST_VERSION_DDL:
+        connection.execute(text(statement))
+
+
+def list_validators(row):
+    """
+    Builds the validators of the book list from the version counter.
+
+    Args:
+        row (Row): The result of ``LIST_VERSION_SQL``.
+
+    Returns:
+        tuple: The strong ETag and the Last-Modified time (naive UTC).
+    """
+    updated_at = datetime.fromisoformat(row.updated_at)
+    return f'"list-{row.version}-{updated_at:%Y%m%d%H%M%S%f}"', updated_at
+
+
+def book_validators(book_id, updated_at):
+    """
+    Builds the validators of a book's detail page.
+
+    Args:
+        book_id (int): The ID of the book.
+        updated_at (datetime): When the book was last changed (naive UTC).
+
+    Returns:
+        tuple: The strong ETag and the Last-Modified time.
+    """
+    return f'"book-{book_id}-{updated_at:%Y%m%d%H%M%S%f}"', updated_at
+
+
+def http_date(value):
+    """
+    Formats a naive UTC datetime as an HTTP date, e.g. "Sun, 18 Oct 2026 09:30:00 GMT".
+    """
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_not_modified(headers, etag, last_modified):
+    """
+    Evaluates If-None-Match, or If-Modified-Since when there is none.
+
+    Args:
+        headers (Headers): The request headers.
+        etag (str): The quoted ETag of the current representation.
+        last_modified (datetime): When it last changed (naive UTC).
+
+    Returns:
+        bool: Whether the client's copy is current and a 304 can be sent.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+
+def validator_headers(etag, last_modified):
+    return {"ETag": etag, "Last-Modified": http_date(last_modified)}
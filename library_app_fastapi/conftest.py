@@ -0,0 +1,58 @@
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import text
+
+from book_cache import create_cache
+from instrumentation import REPEAT_THRESHOLD, query_budget as watch_queries
+
+# The tests use a database of their own; main reads the URL when imported.
+# Run them from this directory, where the templates are
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "library.db"))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    A client of the app, started with its lifespan, on empty tables and an
+    empty book cache.
+
+    Yields:
+        TestClient: The client.
+    """
+    from fastapi.testclient import TestClient
+
+    import main
+
+    monkeypatch.setattr(main, "book_cache", create_cache("local"))
+    with TestClient(main.app) as client:
+        with main.engine.begin() as connection:
+            connection.execute(text("DELETE FROM books"))
+            connection.execute(text("DELETE FROM authors"))
+        yield client
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fails a test when the code in the block runs more than ``max_queries``
+    statements or repeats one (an N+1 pattern)::
+
+        def test_book_list(query_budget):
+            with query_budget(max_queries=2):
+                client.get("/")
+
+    Returns:
+        Callable: Takes ``max_queries`` and ``repeat_threshold`` and returns
+        a context manager watching every engine of the app.
+    """
+    from main import async_engine, async_replica_engines, engine, replica_engines
+
+    engines = [engine, async_engine.sync_engine, *replica_engines]
+    engines += [replica.sync_engine for replica in async_replica_engines]
+
+    def budget(max_queries=None, repeat_threshold=REPEAT_THRESHOLD):
+        return watch_queries(*engines, max_queries=max_queries, repeat_threshold=repeat_threshold)
+
+    return budget
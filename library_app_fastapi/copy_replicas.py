@@ -0,0 +1,22 @@
+"""
+Copies the SQLite database onto every replica of REPLICA_URLS, e.g. to try
+read-replica routing locally. Run from this directory:
+
+    REPLICA_URLS=sqlite:///./replica0.db,sqlite:///./replica1.db python -m copy_replicas
+"""
+from main import DATABASE_URL, REPLICA_URLS, replica_engines
+from replicas import copy_sqlite_database
+
+
+def main():
+    if not REPLICA_URLS:
+        raise SystemExit("No replicas configured, set REPLICA_URLS.")
+    for url, replica_engine in zip(REPLICA_URLS, replica_engines):
+        # Pooled connections would keep reading the replaced file
+        replica_engine.dispose()
+        copy_sqlite_database(DATABASE_URL, url)
+        print(f"Copied {DATABASE_URL} to {url}")
+
+
+if __name__ == "__main__":
+    main()
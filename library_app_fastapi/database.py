@@ -0,0 +1,142 @@
+import sqlite3
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool, StaticPool
+
+# Pool strategies:
+#   "queue"  keeps up to pool_size connections open, opens up to max_overflow
+#            more under load and then waits up to pool_timeout seconds
+#   "static" shares one connection; an in-memory SQLite database only lives
+#            as long as its connection, so it needs this
+#   "null"   opens and closes a connection on every checkout
+POOL_STRATEGIES = ("queue", "static", "null")
+
+# Driver of the asynchronous engine, by dialect. The apps only run on
+# SQLite: the search is an FTS5 table, the list versions are kept by SQLite
+# triggers and every connection gets the PRAGMAs of sqlite_profile.py
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+}
+
+# Bound parameters one statement may carry: SQLite allows 999 before 3.32
+# and 32766 since. Statements over long id lists are split to stay below it
+MAX_BOUND_PARAMETERS = 32766 if sqlite3.sqlite_version_info >= (3, 32) else 999
+
+
+def chunked(values, size):
+    """
+    Splits a list into consecutive lists of at most ``size`` items.
+
+    Args:
+        values (Sequence): The items.
+        size (int): The largest chunk.
+
+    Returns:
+        list[Sequence]: The chunks, in order.
+    """
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+def check_database_url(url):
+    """
+    Rejects a database URL the apps cannot run on.
+
+    Args:
+        url (str | URL): The database URL.
+
+    Returns:
+        URL: The parsed URL.
+
+    Raises:
+        ValueError: If the URL is not an SQLite one.
+    """
+    url = make_url(url)
+    if url.get_backend_name() not in ASYNC_DRIVERS:
+        raise ValueError(
+            f"Unsupported database {url.drivername}: only SQLite URLs are supported, the search index, "
+            "the list versions and the connection profile need SQLite"
+        )
+    return url
+
+
+def is_memory_database(url):
+    """
+    Tells whether a URL names an in-memory SQLite database, including
+    shared-cache URIs like ``sqlite:///file:library?mode=memory&cache=shared&uri=true``.
+
+    Args:
+        url (str | URL): The database URL.
+
+    Returns:
+        bool: True for an in-memory SQLite database.
+    """
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite":
+        return False
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+
+def async_database_url(url):
+    """
+    Switches a database URL to the asyncio driver of its dialect, e.g.
+    ``sqlite:///./library.db`` to ``sqlite+aiosqlite:///./library.db``.
+
+    Args:
+        url (str | URL): The database URL.
+
+    Returns:
+        URL: The URL for ``create_async_engine``.
+
+    Raises:
+        ValueError: If the URL is not an SQLite one.
+    """
+    url = check_database_url(url)
+    backend = url.get_backend_name()
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def engine_options(
+    url, pool=None, pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=-1, pool_pre_ping=False,
+    asyncio=False,
+):
+    """
+    Builds the keyword arguments of ``create_engine`` for a pool strategy.
+
+    Args:
+        url (str | URL): The database URL.
+        pool (str | None): One of ``POOL_STRATEGIES``; None picks "static"
+            for an in-memory SQLite database and "queue" otherwise.
+        pool_size (int): Connections a "queue" pool keeps open.
+        max_overflow (int): Connections a "queue" pool opens beyond pool_size.
+        pool_timeout (float): Seconds to wait for a connection of a full
+            "queue" pool before failing.
+        pool_recycle (int): Replace connections older than this many seconds,
+            before a server or proxy drops them; -1 never does.
+        pool_pre_ping (bool): Test every connection on checkout and replace
+            it when it was closed by the server.
+        asyncio (bool): Whether the options are for ``create_async_engine``.
+
+    Returns:
+        dict: The engine options.
+
+    Raises:
+        ValueError: If the URL is not an SQLite one or the pool strategy is
+            unknown.
+    """
+    check_database_url(url)
+    if pool is None:
+        pool = "static" if is_memory_database(url) else "queue"
+    if pool not in POOL_STRATEGIES:
+        raise ValueError(f"Unknown pool strategy: {pool}")
+    options = {"pool_recycle": pool_recycle, "pool_pre_ping": pool_pre_ping}
+    if pool == "queue":
+        options.update(
+            poolclass=AsyncAdaptedQueuePool if asyncio else QueuePool,
+            pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout,
+        )
+    else:
+        options["poolclass"] = StaticPool if pool == "static" else NullPool
+    if make_url(url).get_backend_name() == "sqlite" and not asyncio:
+        # Pooled connections are handed to whichever thread checks them out
+        options["connect_args"] = {"check_same_thread": False}
+    return options
@@ -0,0 +1,48 @@
+"""
+Production server: gunicorn running the app in uvicorn workers, one per CPU
+unless WEB_CONCURRENCY says otherwise. Run from this directory:
+
+    gunicorn -c gunicorn.conf.py
+
+The app is imported once, in the master process, before the workers are
+forked: the migrations run once and the workers share the compiled
+templates and the rest of the app copy-on-write. Templates are never
+reloaded from disk. `uvicorn main:app --reload` stays the development server.
+"""
+import gc
+import os
+
+# Development paths are off whatever the environment says, and the
+# master migrates the database instead of every worker
+os.environ["TEMPLATE_AUTO_RELOAD"] = "0"
+os.environ["MIGRATE_ON_STARTUP"] = "0"
+
+wsgi_app = "main:app"
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = os.getenv("BIND", "127.0.0.1:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+preload_app = True
+
+# A collection in the master would only touch pages the workers are about
+# to share, see when_ready
+gc.disable()
+
+
+def when_ready(server):
+    """
+    Runs in the master once the app is loaded, before the first fork.
+    """
+    import main
+
+    main.create_schema()
+    # The workers open their own connections, those of the migrations
+    # must not be shared across processes
+    for pooled_engine in [main.engine, *main.replica_engines]:
+        pooled_engine.dispose()
+    # The objects of the preloaded app are left out of every collection, so
+    # the workers' collections do not write to their pages and copy them
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
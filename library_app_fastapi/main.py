@@ -1,27 +1,259 @@
-from fastapi import FastAPI, Form, HTTPException, Depends, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import Body, FastAPI, File, Form, HTTPException, Depends, Query, Request, UploadFile
+from fastapi.responses import (
+    HTMLResponse, ORJSONResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
+)
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import create_engine, Column, Integer, String, Date
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import (
+    and_, create_engine, event, false, insert, or_, select, update, Column, ForeignKey, Index, Integer, String,
+    Date, DateTime,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import contains_eager, joinedload, relationship, sessionmaker, with_loader_criteria, Session
 from sqlalchemy.ext.declarative import declarative_base
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+import hashlib
+import io
 import logging
+import os
+from urllib.parse import urlencode
+
+from assets import AssetStaticFiles, load_manifest
+from book_cache import create_cache
+from compression import COMPRESSIBLE_TYPES, CompressionMiddleware
+from book_io import (
+    EXPORT_FIELDS, ImportReport, detect_format, export_filename, iter_export, iter_records, iter_valid_batches
+)
+from conditional import (
+    LIST_VERSION_SQL, book_validators, create_list_version, is_not_modified, list_validators, validator_headers
+)
+from database import MAX_BOUND_PARAMETERS, async_database_url, chunked, engine_options
+from migrations import upgrade_database
+from rendering import create_templates, precompile_templates
+from replicas import ReplicaPinningMiddleware, RoutingSession, use_primary
+from search_index import create_search_index, match_expression, search_statement
+from sqlite_profile import install_sqlite_profile
+from write_behind import WriteBehindQueue
+
+# Database setup. DATABASE_URL takes an SQLite URL, others fail at startup
+# (see database.py); the asynchronous engine uses the asyncio driver of the
+# same database unless ASYNC_DATABASE_URL is set. The two engines cannot
+# share a plain in-memory SQLite database, use
+# sqlite:///file:library?mode=memory&cache=shared&uri=true
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./library.db")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+
+# Connection pool of each engine, see database.py. DB_POOL is "queue",
+# "static" or "null" and defaults to "static" for in-memory SQLite.
+DB_POOL = os.getenv("DB_POOL") or None
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))  # seconds, -1 never
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING") == "1"
+pool_settings = dict(
+    pool=DB_POOL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE, pool_pre_ping=DB_POOL_PRE_PING,
+)
+
+# Read replicas, a comma-separated list of URLs of copies of the database
+# (see copy_replicas.py). Sessions send SELECTs of GET requests to one of
+# them; writes, and a client's requests for REPLICA_PIN_SECONDS after it
+# wrote, use the primary. See replicas.py
+REPLICA_URLS = [url for url in os.getenv("REPLICA_URLS", "").split(",") if url]
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "10"))
+
+
+def create_engines(url):
+    """
+    Creates the synchronous and asynchronous engine of one database.
+
+    Args:
+        url (str): The synchronous database URL.
+
+    Returns:
+        tuple: The Engine and the AsyncEngine.
+    """
+    sync_engine = create_engine(url, **engine_options(url, **pool_settings))
+    async_url = ASYNC_DATABASE_URL if url == DATABASE_URL else async_database_url(url)
+    async_engine = create_async_engine(async_url, **engine_options(async_url, **pool_settings, asyncio=True))
+    install_sqlite_profile(sync_engine, SQLITE_PROFILE)
+    install_sqlite_profile(async_engine.sync_engine, SQLITE_PROFILE)
+    return sync_engine, async_engine
+
 
-# Database setup
-DATABASE_URL = "sqlite:///./library.db"
 Base = declarative_base()
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine, async_engine = create_engines(DATABASE_URL)
+replica_engines, async_replica_engines = [], []
+for replica_url in REPLICA_URLS:
+    replica_engine, async_replica_engine = create_engines(replica_url)
+    replica_engines.append(replica_engine)
+    async_replica_engines.append(async_replica_engine)
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine, class_=RoutingSession, replicas=replica_engines
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False,
+    sync_session_class=RoutingSession, replicas=[replica.sync_engine for replica in async_replica_engines],
+)
+
+# Book list pagination
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+EXPORT_CHUNK_SIZE = 1000
+SEARCH_PAGE_SIZE = 20
+MAX_API_BATCH_SIZE = 1000
+# Books one batch edit or delete may select; the statements are chunked to
+# MAX_BOUND_PARAMETERS, the transaction is one
+MAX_BATCH_IDS = 10000
+
+# Rendered book detail pages, "local" or a redis:// URL shared by all workers
+BOOK_CACHE_URL = os.getenv("BOOK_CACHE_URL", "local")
+BOOK_CACHE_SIZE = 1024
+BOOK_CACHE_TTL = 300
+book_cache = create_cache(BOOK_CACHE_URL, BOOK_CACHE_SIZE, BOOK_CACHE_TTL)
+
+# Compiled templates are kept on disk for fast cold starts; set
+# TEMPLATE_AUTO_RELOAD=1 while editing templates
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", "./.jinja_cache")
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD") == "1"
+
+# Opt-in request timings (SQL, rendering, total), a log of slow requests
+# with their SQL and Prometheus histograms on /metrics; instrumentation.py is
+# only imported when enabled
+INSTRUMENTATION = os.getenv("INSTRUMENTATION") == "1"
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "500"))
+
+# Development checks: log requests that repeat a statement (N+1 queries) or
+# run more than QUERY_BUDGET queries
+QUERY_CHECKS = os.getenv("QUERY_CHECKS") == "1"
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "20"))
+
+# Opt-in response compression, brotli if the package is installed or gzip,
+# of COMPRESSION_TYPES responses of at least COMPRESSION_MIN_SIZE bytes, and
+# minification of the HTML templates when they are compiled. See compression.py
+COMPRESSION = os.getenv("COMPRESSION") == "1"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+COMPRESSION_TYPES = os.getenv("COMPRESSION_TYPES", ",".join(COMPRESSIBLE_TYPES)).split(",")
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+MINIFY_HTML = os.getenv("MINIFY_HTML") == "1"
+
+# Write-behind mode: the book forms validate and queue their write, and a
+# background task commits the queue in batches of WRITE_BEHIND_BATCH_SIZE,
+# at the latest WRITE_BEHIND_FLUSH_MS after a write was queued. Queued
+# writes are lost if the process dies, see write_behind.py
+WRITE_BEHIND = os.getenv("WRITE_BEHIND") == "1"
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "100"))
+WRITE_BEHIND_FLUSH_MS = int(os.getenv("WRITE_BEHIND_FLUSH_MS", "50"))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))
+
+# Schema creation and migrations run when a worker starts serving, unless
+# they ran beforehand with `python -m migrate` (or in the gunicorn master,
+# see gunicorn.conf.py) and MIGRATE_ON_STARTUP=0 spares every worker's cold
+# start the check
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "1") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Creates or migrates the schema (see create_schema), runs the
+    write-behind worker while the app is serving and closes the pooled
+    connections on shutdown.
+
+    Args:
+        app (FastAPI): The application.
+    """
+    if MIGRATE_ON_STARTUP:
+        create_schema()
+    if write_queue is not None:
+        write_queue.start()
+    try:
+        yield
+    finally:
+        if write_queue is not None:
+            await write_queue.stop()
+        # aiosqlite runs every connection in a thread that would keep the
+        # process alive after the server stopped
+        for pooled_engine in [async_engine, *async_replica_engines]:
+            await pooled_engine.dispose()
+
 
 # Create FastAPI app instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
-# Static files and templates
-app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
+# Static files and templates. Once `python -m assets` has built static/
+# into STATIC_BUILD_DIR, the build is served: fingerprinted files are cached
+# by browsers for a year, with gzip/brotli variants, and templates link them
+# through static_url()
+STATIC_BUILD_DIR = os.getenv("STATIC_BUILD_DIR", "./static_build")
+asset_manifest = load_manifest(STATIC_BUILD_DIR)
+if asset_manifest is None:
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+else:
+    app.mount("/static", AssetStaticFiles(directory=STATIC_BUILD_DIR, manifest=asset_manifest), name="static")
+templates, fragments = create_templates(
+    "templates", TEMPLATE_CACHE_DIR, TEMPLATE_AUTO_RELOAD, asset_manifest=asset_manifest, minify=MINIFY_HTML
+)
+
+if COMPRESSION:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        content_types=COMPRESSION_TYPES,
+        gzip_level=GZIP_LEVEL,
+        brotli_quality=BROTLI_QUALITY,
+    )
+
+if REPLICA_URLS:
+    app.add_middleware(ReplicaPinningMiddleware, pin_seconds=REPLICA_PIN_SECONDS)
+
+if INSTRUMENTATION or QUERY_CHECKS:
+    from instrumentation import InstrumentationMiddleware, Metrics, instrument_engine, instrument_templates
+
+    metrics = Metrics()
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+    for replica_engine, async_replica_engine in zip(replica_engines, async_replica_engines):
+        instrument_engine(replica_engine)
+        instrument_engine(async_replica_engine.sync_engine)
+    instrument_templates(templates.env)
+    app.add_middleware(
+        InstrumentationMiddleware,
+        metrics=metrics,
+        slow_request_seconds=SLOW_REQUEST_MS / 1000,
+        max_queries=QUERY_BUDGET if QUERY_CHECKS else None,
+    )
+
+precompile_templates(templates.env)
 
 # Models
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Author(Base):
+    """
+    Represents an author; books refer to it by ``author_id``.
+
+    Attributes:
+        id (int): The unique identifier for the author.
+        name (str): The author's name, unique.
+    """
+    __tablename__ = 'authors'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
 class Book(Base):
     """
     Represents a book in the library database.
@@ -29,53 +261,767 @@ class Book(Base):
     Attributes:
         id (int): The unique identifier for the book.
         title (str): The title of the book.
-        author (str): The author's name.
+        author_id (int): The ID of the book's author.
+        author (Author): The book's author; load it with ``joinedload``
+            when listing books.
         description (str): A brief description of the book.
         published_date (datetime.date): The publication date of the book.
+        updated_at (datetime.datetime): When the book was last changed (UTC),
+            the Last-Modified time of its pages.
+        deleted_at (datetime.datetime): When the book was deleted (UTC), or
+            None. Deleted books are left out of every ORM query, see
+            exclude_deleted_books, until `python -m purge_books` removes them.
     """
     __tablename__ = 'books'
     
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, index=True)
-    author = Column(String)
+    title = Column(String)
+    author_id = Column(Integer, ForeignKey('authors.id'), nullable=False)
+    author = relationship(Author)
     description = Column(String)
     published_date = Column(Date)
+    updated_at = Column(DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+    deleted_at = Column(DateTime)
+
+    # Back the filters and sort orders of the book list, see BookFilters,
+    # and the purge of deleted books
+    __table_args__ = (
+        Index("ix_books_author_id_published_date", author_id, published_date),
+        Index("ix_books_published_date", published_date),
+        Index("ix_books_title_nocase", title.collate("NOCASE")),
+        Index("ix_books_deleted_at", deleted_at, sqlite_where=deleted_at.isnot(None)),
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def exclude_deleted_books(execute_state):
+    """
+    Adds ``deleted_at IS NULL`` to every ORM SELECT and UPDATE of books, so
+    deleted books are neither shown nor changed. Statements run with the
+    ``include_deleted`` execution option see them.
+
+    Args:
+        execute_state (ORMExecuteState): The statement about to run.
+    """
+    if (
+        (execute_state.is_select or execute_state.is_update)
+        and not execute_state.is_column_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Book, Book.deleted_at.is_(None), include_aliases=True)
+        )
 
 
-# Create tables in the database
-Base.metadata.create_all(bind=engine)
+# API schemas
+class BookIn(BaseModel):
+    """
+    The fields of a book sent to the JSON API.
+    """
+    model_config = ConfigDict(str_strip_whitespace=True)
 
-# Dependency to get DB session
-def get_db():
+    title: str = Field(min_length=1)
+    author: str = Field(min_length=1)
+    description: str = ""
+    published_date: date
+
+
+class BookPatch(BaseModel):
+    """
+    A partial update of a book; only the fields sent are changed, and those
+    may not be null (an empty description clears it).
     """
-    Dependency to provide a database session.
-    Ensures the session is properly closed after use.
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    title: str | None = Field(None, min_length=1)
+    author: str | None = Field(None, min_length=1)
+    description: str | None = None
+    published_date: date | None = None
+
+    # Validators do not run on the defaults of the fields left out
+    @field_validator("title", "author", "description", "published_date")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+
+class BookOut(BaseModel):
+    """
+    A book as returned by the JSON API.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    author: str
+    description: str | None
+    published_date: date | None
+
+    @field_validator("author", mode="before")
+    @classmethod
+    def author_name(cls, author):
+        return str(author)
+
+
+class BookBatchUpdate(BaseModel):
+    """
+    The same partial update applied to many books.
+    """
+    ids: list[int] = Field(min_length=1, max_length=MAX_BATCH_IDS)
+    values: BookPatch
+
+
+class BookBatchDelete(BaseModel):
+    """
+    The books to delete.
+    """
+    ids: list[int] = Field(min_length=1, max_length=MAX_BATCH_IDS)
+
+
+class BookListOut(BaseModel):
+    """
+    One keyset page of books; ``next_cursor`` is the ``after`` of the next page.
+    Items only carry ``id`` and the requested ``fields``.
+    """
+    items: list[dict]
+    next_cursor: int | None
+
+
+def create_schema():
+    """
+    Creates or migrates the tables, then the full-text search index and the
+    version counter of the book list. Importing the app never touches the
+    database; this runs at startup unless MIGRATE_ON_STARTUP=0, and once
+    per deploy with `python -m migrate`.
+    """
+    upgrade_database(engine, Base.metadata, Book.__tablename__)
+    with engine.begin() as connection:
+        create_search_index(connection)
+        create_list_version(connection)
+
+
+async def get_async_db():
+    """
+    Dependency to provide an asynchronous database session.
+    Queries are awaited, so the event loop keeps serving other requests
+    while SQLite is busy.
 
     Yields:
-        Session: The database session.
+        AsyncSession: The asynchronous database session.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_book_or_404(db, book_id):
+    """
+    Loads a book and its author by id or raises a 404 error.
+
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        book_id (int): The ID of the book to load.
+
+    Returns:
+        Book: The requested book.
+    """
+    book = await db.get(Book, book_id, options=[joinedload(Book.author)])
+    if book is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return book
+
+
+class BookPage:
+    """
+    One keyset page of books, iterated lazily.
+
+    The page is fetched with ``LIMIT limit + 1`` after the previous page's
+    last book in the sort order; the extra row only tells whether another
+    page exists. ``next_cursor`` is set once iteration is finished, so
+    templates may read it after their loop.
+
+    Attributes:
+        limit (int): The maximum number of books on the page.
+        next_cursor (int | None): The id to pass as ``after`` for the next page.
+    """
+
+    def __init__(self, rows, limit):
+        self._rows = rows
+        self.limit = limit
+        self.next_cursor = None
+
+    def __iter__(self):
+        last_id = None
+        for count, book in enumerate(self._rows):
+            if count == self.limit:
+                self.next_cursor = last_id
+                break
+            last_id = book.id
+            yield book
+
+
+# Sort orders of the book list as (column, descending) pairs. Each one ends
+# with the primary key, so a book's values are a unique keyset cursor, and
+# each follows an index of Book.
+BOOK_SORTS = {
+    "": ((Book.id, False),),
+    "title": ((Book.title.collate("NOCASE"), False), (Book.id, False)),
+    "author": ((Author.name, False), (Book.published_date, False), (Book.id, False)),
+    "published": ((Book.published_date, False), (Book.id, False)),
+    "-published": ((Book.published_date, True), (Book.id, True)),
+}
+
+
+def like_prefix(prefix):
+    """
+    Builds a LIKE pattern matching values starting with ``prefix``, with
+    its own wildcards escaped by a backslash.
+
+    Args:
+        prefix (str): The literal prefix.
+
+    Returns:
+        str: The pattern.
+    """
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def keyset_condition(keys, cursor, not_null=()):
+    """
+    Builds the condition selecting the rows after ``cursor`` in the order of
+    ``keys``. The first key is also compared on its own, so SQLite starts
+    reading its index at the cursor instead of scanning.
+
+    SQLite sorts NULL before every value, so after a NULL come the tied
+    NULLs and, in ascending order, every value; in descending order NULLs
+    follow every value. Past a dated cursor, "-published" therefore reads
+    its index in order from the newest date rather than from the cursor,
+    unless a year filter rules the NULLs out.
+
+    Args:
+        keys (tuple): (column, descending) pairs, see BOOK_SORTS.
+        cursor (tuple): The values of the keys of the last row read.
+        not_null (Collection[str]): The keys of nullable columns holding no
+            NULL in the rows read, see ``BookFilters.not_null``.
+
+    Returns:
+        ColumnElement: The WHERE condition.
+    """
+    (column, descending), value = keys[0], cursor[0]
+    nullable = getattr(column, "nullable", True) and getattr(column, "key", None) not in not_null
+    rest = keyset_condition(keys[1:], cursor[1:], not_null) if len(keys) > 1 else false()
+    if value is None:
+        tied = and_(column.is_(None), rest)
+        return tied if descending else or_(column.is_not(None), tied)
+    after = column < value if descending else column > value
+    if len(keys) > 1:
+        from_value = column <= value if descending else column >= value
+        after = and_(from_value, or_(after, rest))
+    return or_(after, column.is_(None)) if descending and nullable else after
+
+
+class BookFilters:
+    """
+    Filters and sort order of the book list, read from the query string.
+
+    Every filter is answered from an index: ``author`` and the year range
+    from (author_id, published_date) and published_date, ``title`` as a
+    case-insensitive prefix from the NOCASE index on title.
+
+    Args:
+        title (str | None): The start of the titles to list.
+        author (int | None): The ID of the author whose books to list.
+        year_from (int | None): The first year of publication to list.
+        year_to (int | None): The last year of publication to list.
+        sort (str): A key of BOOK_SORTS; books are listed in the order they
+            were added by default.
+    """
+
+    def __init__(
+        self,
+        title: str | None = Query(None, max_length=255),
+        author: int | None = None,
+        year_from: int | None = Query(None, ge=1, le=9999),
+        year_to: int | None = Query(None, ge=1, le=9999),
+        sort: str = Query("", pattern="^(|title|author|published|-published)$"),
+    ):
+        self.title = title
+        self.author = author
+        self.year_from = year_from
+        self.year_to = year_to
+        self.sort = sort
+
+    @property
+    def keys(self):
+        return BOOK_SORTS[self.sort]
+
+    def conditions(self):
+        """
+        Returns:
+            list: The WHERE conditions of the filters that are set.
+        """
+        conditions = []
+        if self.title:
+            # SQLite's LIKE ignores ASCII case and reads the NOCASE index
+            conditions.append(Book.title.like(like_prefix(self.title), escape="\\"))
+        if self.author is not None:
+            conditions.append(Book.author_id == self.author)
+        if self.year_from is not None:
+            conditions.append(Book.published_date >= date(self.year_from, 1, 1))
+        if self.year_to is not None:
+            conditions.append(Book.published_date <= date(self.year_to, 12, 31))
+        return conditions
+
+    def not_null(self):
+        """
+        Returns:
+            set[str]: The nullable keys the filters that are set leave no
+            NULL in.
+        """
+        return {"published_date"} if self.year_from is not None or self.year_to is not None else set()
+
+    def cursor(self, db, after):
+        """
+        Looks up the sort values of the last book of the previous page.
+
+        Args:
+            db (Session): The database session.
+            after (int | None): The id of that book.
+
+        Returns:
+            tuple | None: The values of ``keys``, or None for the first page
+            and when the book was deleted meanwhile.
+        """
+        if after is None or len(self.keys) == 1:
+            return None if after is None else (after,)
+        columns = [column for column, _ in self.keys]
+        row = db.execute(select(*columns).join(Book.author).where(Book.id == after)).first()
+        return tuple(row) if row is not None else None
+
+    def query_string(self):
+        """
+        Returns:
+            str: The filters that are set, encoded for a link to another page.
+        """
+        params = {
+            "title": self.title, "author": self.author,
+            "year_from": self.year_from, "year_to": self.year_to, "sort": self.sort,
+        }
+        return urlencode({name: value for name, value in params.items() if value not in (None, "")})
+
+
+def book_page_query(filters, cursor, limit):
+    """
+    Builds the keyset query for a page of books.
+
+    Args:
+        filters (BookFilters): The filters and sort order of the list.
+        cursor (tuple | None): The sort values of the last book on the
+            previous page, see ``BookFilters.cursor``.
+        limit (int): The page size.
+
+    Returns:
+        Select: Filtered books in the sort order with their authors joined,
+        at most ``limit + 1`` rows.
+    """
+    query = select(Book).join(Book.author).options(contains_eager(Book.author)).where(*filters.conditions())
+    if cursor is not None:
+        query = query.where(keyset_condition(filters.keys, cursor, filters.not_null()))
+    order = [column.desc() if descending else column for column, descending in filters.keys]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def book_columns(fields):
+    """
+    Maps book fields to the columns selecting them; ``author`` is the
+    author's name, so queries using it must join ``Book.author``.
+
+    Args:
+        fields (Iterable[str]): Field names, e.g. ("id", "title", "author").
+
+    Returns:
+        list: The columns, labelled with the field names.
+    """
+    return [Author.name.label(field) if field == "author" else getattr(Book, field) for field in fields]
+
+
+def stream_book_list(request, filters, after, limit):
+    """
+    Renders the book list chunk by chunk with ``Template.generate()``.
+
+    The generator owns a synchronous session because it keeps reading rows
+    after the route has returned; Starlette iterates it in a worker thread,
+    so the blocking reads stay off the event loop.
+
+    Args:
+        request (Request): The HTTP request object.
+        filters (BookFilters): The filters and sort order of the list.
+        after (int | None): The id of the last book on the previous page.
+        limit (int): The page size.
+
+    Yields:
+        str: Rendered fragments of the page.
     """
     db = SessionLocal()
     try:
-        yield db
+        query = book_page_query(filters, filters.cursor(db, after), limit)
+        rows = db.scalars(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        page = BookPage(rows, limit)
+        template = templates.get_template("book_list.html")
+        yield from template.generate(request=request, books=page, filters=filters)
+    finally:
+        db.close()
+
+
+def iter_book_rows(db, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Reads every book as a tuple of ``EXPORT_FIELDS`` through a server-side
+    cursor, fetching ``chunk_size`` rows at a time.
+
+    Args:
+        db (Session): A synchronous database session.
+        chunk_size (int): The number of rows fetched per round trip.
+
+    Yields:
+        Row: The exported columns of one book, in id order.
+    """
+    query = (
+        select(*book_columns(EXPORT_FIELDS))
+        .join(Book.author)
+        .order_by(Book.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    yield from db.execute(query)
+
+
+def stream_export(fmt, compress):
+    """
+    Encodes the whole books table for a streamed download.
+
+    Like ``stream_book_list`` the generator owns its synchronous session and
+    is iterated by Starlette in a worker thread.
+
+    Args:
+        fmt (str): "csv" or "jsonl".
+        compress (bool): Whether to gzip the output.
+
+    Yields:
+        bytes: The next piece of the file.
+    """
+    db = SessionLocal()
+    try:
+        yield from iter_export(iter_book_rows(db), fmt, compress)
     finally:
         db.close()
 
 
+def validate_book(record):
+    """
+    Applies the rules of the book form to an imported record.
+
+    Args:
+        record (dict): String values of title, author, description and
+            published_date.
+
+    Returns:
+        tuple: Column values and None if the record is valid,
+        otherwise None and a dict of field errors.
+    """
+    errors = {}
+    for field in ("title", "author", "published_date"):
+        if not record[field]:
+            errors[field] = ["This field is required."]
+    values = dict(record)
+    if record["published_date"]:
+        try:
+            values["published_date"] = datetime.strptime(record["published_date"], "%Y-%m-%d").date()
+        except ValueError:
+            errors["published_date"] = ["Expected a date in YYYY-MM-DD format."]
+    if errors:
+        return None, errors
+    return values, None
+
+
+def get_authors(db, names):
+    """
+    Looks up authors by name, creating the missing ones with a single
+    INSERT OR IGNORE.
+
+    Args:
+        db (Session): A synchronous session; async routes call this through
+            ``AsyncSession.run_sync``.
+        names (Iterable[str]): Author names, already stripped.
+
+    Returns:
+        dict: The Author of every name.
+    """
+    names = set(names)
+    db.execute(sqlite_insert(Author).on_conflict_do_nothing(), [{"name": name} for name in names])
+    return {author.name: author for author in db.scalars(select(Author).where(Author.name.in_(names)))}
+
+
+def link_authors(db, rows):
+    """
+    Replaces the author name of validated book rows by its ``author_id``,
+    looking up the authors of the whole batch at once.
+
+    Args:
+        db (Session): A synchronous session.
+        rows (list[dict]): Column values with an ``author`` name.
+
+    Returns:
+        list[dict]: The column values with ``author_id`` instead.
+    """
+    authors = get_authors(db, (row["author"] for row in rows))
+    return [
+        {**{key: value for key, value in row.items() if key != "author"}, "author_id": authors[row["author"]].id}
+        for row in rows
+    ]
+
+
+async def get_author(db, name):
+    """
+    Returns the author with a name, creating it if needed.
+
+    Args:
+        db (AsyncSession): The asynchronous database session.
+        name (str): The author's name, already stripped.
+
+    Returns:
+        Author: The author.
+    """
+    authors = await db.run_sync(get_authors, [name])
+    return authors[name]
+
+
+def write_books(db, writes):
+    """
+    Applies queued book writes: the new books with one executemany, then
+    the edits in the order they were queued.
+
+    Args:
+        db (Session): A synchronous session.
+        writes (list[tuple]): ``(book_id, values)`` pairs of validated
+            column values with an ``author`` name; ``book_id`` is None for
+            a new book.
+    """
+    rows = link_authors(db, [values for _, values in writes])
+    new_books = [row for (book_id, _), row in zip(writes, rows) if book_id is None]
+    if new_books:
+        db.execute(insert(Book), new_books)
+    for (book_id, _), row in zip(writes, rows):
+        if book_id is not None:
+            db.execute(update(Book).where(Book.id == book_id).values(**row))
+
+
+def update_books(db, book_ids, values, chunk_size=None):
+    """
+    Sets the same column values on many books with one
+    ``UPDATE ... WHERE id IN (...)`` per chunk of ids, in the session's
+    transaction.
+
+    Args:
+        db (Session): A synchronous session; async routes call this through
+            ``AsyncSession.run_sync``.
+        book_ids (list[int]): The books to change.
+        values (dict): Column values, with an ``author`` name instead of
+            ``author_id``.
+        chunk_size (int | None): Ids per statement; by default as many as
+            the bound parameter limit leaves room for.
+
+    Returns:
+        int: The number of books changed.
+    """
+    if "author" in values:
+        values = link_authors(db, [values])[0]
+    # One more parameter sets updated_at
+    chunk_size = chunk_size or MAX_BOUND_PARAMETERS - len(values) - 1
+    statement = update(Book).values(**values).execution_options(synchronize_session=False)
+    return sum(db.execute(statement.where(Book.id.in_(chunk))).rowcount for chunk in chunked(book_ids, chunk_size))
+
+
+def delete_books(db, book_ids, chunk_size=None):
+    """
+    Marks many books deleted with one ``UPDATE ... WHERE id IN (...)`` per
+    chunk of ids, in the session's transaction. `python -m purge_books`
+    removes them later.
+
+    Args:
+        db (Session): A synchronous session.
+        book_ids (list[int]): The books to delete.
+        chunk_size (int | None): Ids per statement; by default as many as
+            the bound parameter limit leaves room for.
+
+    Returns:
+        int: The number of books deleted.
+    """
+    return update_books(db, book_ids, {"deleted_at": utcnow()}, chunk_size)
+
+
+async def commit_book_writes(writes):
+    """
+    Commits a batch of the write-behind queue in one transaction.
+
+    Args:
+        writes (list[tuple]): The queued ``(book_id, values)`` pairs.
+    """
+    # The authors are looked up where the books are written
+    with use_primary():
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(write_books, writes)
+            await db.commit()
+
+
+write_queue = WriteBehindQueue(
+    commit_book_writes, WRITE_BEHIND_BATCH_SIZE, WRITE_BEHIND_FLUSH_MS / 1000, WRITE_BEHIND_MAX_PENDING
+) if WRITE_BEHIND else None
+
+
+def validate_book_form(title, author, description, published_date):
+    """
+    Validates a submitted book form with the rules of ``validate_book``.
+
+    Args:
+        title (str): The title of the book.
+        author (str): The author's name.
+        description (str): A brief description of the book.
+        published_date (str): The publication date (YYYY-MM-DD format).
+
+    Returns:
+        dict: Column values, with the stripped ``author`` name.
+
+    Raises:
+        HTTPException: 422 with the field errors if the form is invalid,
+            e.g. when the author's name is blank.
+    """
+    values, errors = validate_book(
+        {"title": title.strip(), "author": author.strip(), "description": description,
+         "published_date": published_date.strip()}
+    )
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    return values
+
+
+async def queue_book_write(book_id, values):
+    """
+    Queues the write of a validated book form.
+
+    Args:
+        book_id (int | None): The book to edit, None for a new book.
+        values (dict): The values of ``validate_book_form``.
+    """
+    await write_queue.put((book_id, values))
+
+
 # Routes
 @app.get("/", response_class=HTMLResponse)
-async def book_list(request: Request, db: Session = Depends(get_db)):
+async def book_list(
+    request: Request,
+    after: int | None = None,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    filters: BookFilters = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Renders a list of all books in the library.
+    Renders one keyset-paginated page of books, filtered and sorted by the
+    query parameters of ``BookFilters``.
+
+    The page carries an ETag and Last-Modified taken from the books version
+    counter; a client whose copy is still current gets a 304 without the
+    page being queried or rendered.
 
     Args:
         request (Request): The HTTP request object.
-        db (Session): The database session.
+        after (int | None): The id of the last book on the previous page.
+        limit (int): The number of books per page.
+        stream (bool): Whether to stream the page as it is rendered.
+        filters (BookFilters): The filters and sort order of the list.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        HTMLResponse: The rendered HTML response containing the book list,
+        a StreamingResponse when ``stream`` is set, or an empty 304 response.
+    """
+    etag, last_modified = list_validators((await db.execute(LIST_VERSION_SQL)).one())
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request.headers, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    if stream:
+        return StreamingResponse(
+            stream_book_list(request, filters, after, limit), media_type="text/html", headers=headers
+        )
+    cursor = await db.run_sync(filters.cursor, after)
+    page = BookPage((await db.scalars(book_page_query(filters, cursor, limit))).all(), limit)
+    context = {"request": request, "books": page, "filters": filters}
+    return templates.TemplateResponse("book_list.html", context, headers=headers)
+
+
+@app.get("/search", response_class=HTMLResponse)
+async def book_search(
+    request: Request,
+    q: str = "",
+    page: int = Query(1, ge=1),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Searches title, author and description through the FTS5 index.
+
+    Every word of the query matches as a prefix and results are ordered by
+    relevance (bm25).
+
+    Args:
+        request (Request): The HTTP request object.
+        q (str): The search text.
+        page (int): The 1-based page of results.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        HTMLResponse: The rendered HTML response with the matching books.
+    """
+    books = []
+    has_next = False
+    expression = match_expression(q)
+    if expression:
+        hits = search_statement(expression, SEARCH_PAGE_SIZE + 1, (page - 1) * SEARCH_PAGE_SIZE).subquery()
+        query = (
+            select(Book)
+            .join(hits, hits.c.rowid == Book.id)
+            .options(joinedload(Book.author))
+            .order_by(hits.c.rank)
+        )
+        books = (await db.scalars(query)).all()
+        has_next = len(books) > SEARCH_PAGE_SIZE
+        books = books[:SEARCH_PAGE_SIZE]
+    return templates.TemplateResponse(
+        "search.html", {"request": request, "q": q, "books": books, "page": page, "has_next": has_next}
+    )
+
+
+@app.get("/export")
+async def book_export(format: str = Query("csv", pattern="^(csv|jsonl)$"), gzip: bool = False):
+    """
+    Streams every book as a CSV or JSON Lines download.
+
+    Rows are read with a server-side cursor and encoded chunk by chunk, so
+    memory use does not depend on the size of the table.
+
+    Args:
+        format (str): "csv" or "jsonl".
+        gzip (bool): Whether to gzip the file.
 
     Returns:
-        HTMLResponse: The rendered HTML response containing the book list.
+        StreamingResponse: The file as an attachment.
     """
-    books = db.query(Book).all()
-    return templates.TemplateResponse("book_list.html", {"request": request, "books": books})
+    filename = export_filename(format, gzip)
+    media_type = "application/gzip" if gzip else ("text/csv" if format == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        stream_export(format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @app.get("/book/new", response_class=HTMLResponse)
@@ -83,13 +1029,16 @@ async def book_create_form(request: Request):
     """
     Displays the form to create a new book.
 
+    The empty form is the same for every request, so it is rendered once
+    and served from the fragment cache.
+
     Args:
         request (Request): The HTTP request object.
 
     Returns:
         HTMLResponse: The rendered HTML response with the book form.
     """
-    return templates.TemplateResponse("book_form.html", {"request": request, "book": None})
+    return HTMLResponse(fragments.render("book_form.html", book=None))
 
 
 @app.post("/book/new", response_class=HTMLResponse)
@@ -99,33 +1048,41 @@ async def book_create(
     author: str = Form(...),
     description: str = Form(...),
     published_date: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Handles creating a new book.
 
+    In write-behind mode the book is queued and appears in the list once
+    its batch is committed.
+
     Args:
         request (Request): The HTTP request object.
         title (str): The title of the book.
         author (str): The author's name.
         description (str): A brief description of the book.
         published_date (str): The publication date of the book (YYYY-MM-DD format).
-        db (Session): The database session.
+        db (AsyncSession): The asynchronous database session.
 
     Returns:
         RedirectResponse: Redirects to the book list after creation.
+
+    Raises:
+        HTTPException: 422 with the field errors if the form is invalid.
     """
+    values = validate_book_form(title, author, description, published_date)
+    if write_queue is not None:
+        await queue_book_write(None, values)
+        return RedirectResponse(url="/", status_code=303)
     try:
-        published_date_obj = datetime.strptime(published_date, "%Y-%m-%d").date()
         new_book = Book(
-            title=title,
-            author=author,
-            description=description,
-            published_date=published_date_obj
+            title=values["title"],
+            author=await get_author(db, values["author"]),
+            description=values["description"],
+            published_date=values["published_date"]
         )
         db.add(new_book)
-        db.commit()
-        db.refresh(new_book)
+        await db.commit()
         logging.debug(f"Book added: {new_book.title}")
         return RedirectResponse(url="/", status_code=303)
     except Exception as e:
@@ -133,41 +1090,185 @@ async def book_create(
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@app.get("/book/import", response_class=HTMLResponse)
+async def book_import_form(request: Request):
+    """
+    Displays the form to upload a CSV or JSON Lines file of books.
+
+    Like the empty book form it is served from the fragment cache.
+
+    Args:
+        request (Request): The HTTP request object.
+
+    Returns:
+        HTMLResponse: The rendered HTML response with the upload form.
+    """
+    return HTMLResponse(fragments.render("book_import.html", report=None))
+
+
+@app.post("/book/import", response_class=HTMLResponse)
+async def book_import(
+    request: Request,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Imports books from an uploaded CSV or JSON Lines file.
+
+    The upload is parsed line by line and valid rows are inserted in batched
+    transactions with a single executemany per batch.
+
+    Args:
+        request (Request): The HTTP request object.
+        file (UploadFile): The uploaded .csv or .jsonl file.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        HTMLResponse: The rendered HTML response with the import report.
+    """
+    try:
+        fmt = detect_format(file.filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    report = ImportReport()
+    for batch in iter_valid_batches(iter_records(stream, fmt), validate_book, report):
+        await db.execute(insert(Book), await db.run_sync(link_authors, batch))
+        await db.commit()
+        report.inserted += len(batch)
+    report.finish()
+    logging.info(report.summary())
+    return templates.TemplateResponse("book_import.html", {"request": request, "report": report})
+
+
+@app.post("/book/batch/edit", response_class=HTMLResponse)
+async def book_batch_edit(
+    ids: list[int] = Form([], max_length=MAX_BATCH_IDS),
+    author: str = Form(""),
+    published_date: str = Form(""),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Reassigns the author and/or sets the publication date of the books
+    selected on the list page, with set-based UPDATEs in one transaction.
+    Blank fields are left unchanged.
+
+    Batch edits are never queued, not even in write-behind mode.
+
+    Args:
+        ids (list[int]): The IDs of the selected books.
+        author (str): The new author's name, or blank.
+        published_date (str): The new publication date (YYYY-MM-DD format), or blank.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        RedirectResponse: Redirects to the book list.
+
+    Raises:
+        HTTPException: 422 if the publication date is invalid.
+    """
+    values = {}
+    if author.strip():
+        values["author"] = author.strip()
+    if published_date.strip():
+        try:
+            values["published_date"] = datetime.strptime(published_date.strip(), "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(
+                status_code=422, detail={"published_date": ["Expected a date in YYYY-MM-DD format."]}
+            )
+    book_ids = sorted(set(ids))
+    if book_ids and values:
+        await db.run_sync(update_books, book_ids, values)
+        await db.commit()
+        book_cache.delete_many(f"book_detail:{book_id}" for book_id in book_ids)
+    return RedirectResponse(url="/", status_code=303)
+
+
+@app.post("/book/batch/delete", response_class=HTMLResponse)
+async def book_batch_delete(
+    request: Request,
+    ids: list[int] = Form([], max_length=MAX_BATCH_IDS),
+    confirm: bool = Form(False),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Asks to confirm deleting the books selected on the list page, then
+    marks them deleted with set-based UPDATEs in one transaction.
+
+    Args:
+        request (Request): The HTTP request object.
+        ids (list[int]): The IDs of the selected books.
+        confirm (bool): Whether the deletion was confirmed.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        HTMLResponse: The confirmation page, or a redirect to the book list
+        once the books are deleted.
+    """
+    book_ids = sorted(set(ids))
+    if not book_ids:
+        return RedirectResponse(url="/", status_code=303)
+    if not confirm:
+        return templates.TemplateResponse(
+            "book_batch_confirm_delete.html", {"request": request, "book_ids": book_ids}
+        )
+    await db.run_sync(delete_books, book_ids)
+    await db.commit()
+    book_cache.delete_many(f"book_detail:{book_id}" for book_id in book_ids)
+    return RedirectResponse(url="/", status_code=303)
+
+
 @app.get("/book/{book_id}", response_class=HTMLResponse)
-async def book_detail(request: Request, book_id: int, db: Session = Depends(get_db)):
+async def book_detail(request: Request, book_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Displays the details of a specific book.
 
+    Only ``updated_at`` is read before answering a conditional request with
+    304. Otherwise the rendered page is cached by book id, so repeated views
+    skip both the query and the template until the book is edited or deleted.
+
     Args:
         request (Request): The HTTP request object.
         book_id (int): The ID of the book to display.
-        db (Session): The database session.
+        db (AsyncSession): The asynchronous database session.
 
     Returns:
-        HTMLResponse: The rendered HTML response with the book details.
+        HTMLResponse: The rendered HTML response with the book details,
+        or an empty 304 response.
     """
-    book = db.query(Book).filter(Book.id == book_id).first()
-    if book is None:
+    updated_at = await db.scalar(select(Book.updated_at).where(Book.id == book_id))
+    if updated_at is None:
         raise HTTPException(status_code=404, detail="Book not found")
-    return templates.TemplateResponse("book_detail.html", {"request": request, "book": book})
+    etag, last_modified = book_validators(book_id, updated_at)
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request.headers, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    # The page is cached behind its ETag and only served for the same one:
+    # a replica that has not caught up yet may have cached an older version
+    cache_key = f"book_detail:{book_id}"
+    cached_etag, _, html = (book_cache.get(cache_key) or "").partition("\n")
+    if cached_etag != etag:
+        book = await get_book_or_404(db, book_id)
+        html = templates.get_template("book_detail.html").render(request=request, book=book)
+        book_cache.set(cache_key, f"{etag}\n{html}")
+    return HTMLResponse(html, headers=headers)
 
 
 @app.get("/book/{book_id}/edit", response_class=HTMLResponse)
-async def book_edit_form(request: Request, book_id: int, db: Session = Depends(get_db)):
+async def book_edit_form(request: Request, book_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Displays the form to edit a book.
 
     Args:
         request (Request): The HTTP request object.
         book_id (int): The ID of the book to edit.
-        db (Session): The database session.
+        db (AsyncSession): The asynchronous database session.
 
     Returns:
         HTMLResponse: The rendered HTML response with the book form.
     """
-    book = db.query(Book).filter(Book.id == book_id).first()
-    if book is None:
-        raise HTTPException(status_code=404, detail="Book not found")
+    book = await get_book_or_404(db, book_id)
     return templates.TemplateResponse("book_form.html", {"request": request, "book": book})
 
 
@@ -179,11 +1280,14 @@ async def book_edit(
     author: str = Form(...),
     description: str = Form(...),
     published_date: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Handles editing an existing book.
 
+    In write-behind mode the edit is queued and shows once its batch is
+    committed.
+
     Args:
         request (Request): The HTTP request object.
         book_id (int): The ID of the book to edit.
@@ -191,59 +1295,318 @@ async def book_edit(
         author (str): The updated author's name.
         description (str): The updated description of the book.
         published_date (str): The updated publication date (YYYY-MM-DD format).
-        db (Session): The database session.
+        db (AsyncSession): The asynchronous database session.
 
     Returns:
         RedirectResponse: Redirects to the book detail view after editing.
+
+    Raises:
+        HTTPException: 422 with the field errors if the form is invalid.
     """
-    book = db.query(Book).filter(Book.id == book_id).first()
-    if book is None:
-        raise HTTPException(status_code=404, detail="Book not found")
-    
-    book.title = title
-    book.author = author
-    book.description = description
-    book.published_date = datetime.strptime(published_date, "%Y-%m-%d").date()
-    db.commit()
-    db.refresh(book)
+    book = await get_book_or_404(db, book_id)
+    values = validate_book_form(title, author, description, published_date)
+    if write_queue is not None:
+        await queue_book_write(book_id, values)
+        book_cache.delete(f"book_detail:{book_id}")
+        return RedirectResponse(url=f"/book/{book_id}", status_code=303)
+
+    book.title = values["title"]
+    book.author = await get_author(db, values["author"])
+    book.description = values["description"]
+    book.published_date = values["published_date"]
+    await db.commit()
+    book_cache.delete(f"book_detail:{book_id}")
     return RedirectResponse(url=f"/book/{book_id}", status_code=303)
 
 
 @app.get("/book/{book_id}/delete", response_class=HTMLResponse)
-async def book_delete_form(request: Request, book_id: int, db: Session = Depends(get_db)):
+async def book_delete_form(request: Request, book_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Displays the confirmation page to delete a book.
 
     Args:
         request (Request): The HTTP request object.
         book_id (int): The ID of the book to delete.
-        db (Session): The database session.
+        db (AsyncSession): The asynchronous database session.
 
     Returns:
         HTMLResponse: The rendered HTML response with the confirmation page.
     """
-    book = db.query(Book).filter(Book.id == book_id).first()
-    if book is None:
-        raise HTTPException(status_code=404, detail="Book not found")
+    book = await get_book_or_404(db, book_id)
     return templates.TemplateResponse("book_confirm_delete.html", {"request": request, "book": book})
 
 
 @app.post("/book/{book_id}/delete", response_class=HTMLResponse)
-async def book_delete(book_id: int, db: Session = Depends(get_db)):
+async def book_delete(book_id: int, db: AsyncSession = Depends(get_async_db)):
     """
-    Handles deleting an existing book.
+    Handles deleting an existing book. The book is marked deleted and
+    disappears from every page; `python -m purge_books` removes it later.
 
     Args:
         book_id (int): The ID of the book to delete.
-        db (Session): The database session.
+        db (AsyncSession): The asynchronous database session.
 
     Returns:
         RedirectResponse: Redirects to the book list after deletion.
     """
-    book = db.query(Book).filter(Book.id == book_id).first()
-    if book is None:
-        raise HTTPException(status_code=404, detail="Book not found")
-    
-    db.delete(book)
-    db.commit()
+    book = await get_book_or_404(db, book_id)
+    book.deleted_at = utcnow()
+    await db.commit()
+    book_cache.delete(f"book_detail:{book_id}")
     return RedirectResponse(url="/", status_code=303)
+
+
+@app.get("/author/{author_id}", response_class=HTMLResponse)
+async def author_detail(request: Request, author_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Displays an author and the list of their books.
+
+    Args:
+        request (Request): The HTTP request object.
+        author_id (int): The ID of the author.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        HTMLResponse: The rendered HTML response with the author's books.
+    """
+    author = await db.get(Author, author_id)
+    if author is None:
+        raise HTTPException(status_code=404, detail="Author not found")
+    books = (await db.scalars(select(Book).where(Book.author_id == author_id).order_by(Book.title))).all()
+    return templates.TemplateResponse("author_detail.html", {"request": request, "author": author, "books": books})
+
+
+# JSON API
+API_FIELDS = ("title", "author", "description", "published_date")
+
+
+def json_response(request, content, status_code=200):
+    """
+    Serializes content with orjson and, for GET requests, adds a strong ETag
+    computed from the body, answering a matching If-None-Match with 304.
+
+    Args:
+        request (Request): The HTTP request object.
+        content: The JSON-serializable content.
+        status_code (int): The status code of a fresh response.
+
+    Returns:
+        Response: The JSON response, or an empty 304 response.
+    """
+    response = ORJSONResponse(content, status_code=status_code)
+    if request.method == "GET":
+        etag = f'"{hashlib.md5(response.body).hexdigest()}"'
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+    return response
+
+
+def book_json(book):
+    return BookOut.model_validate(book).model_dump()
+
+
+@app.get("/api/books", response_model=BookListOut)
+async def api_book_list(
+    request: Request,
+    after: int | None = None,
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: str | None = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lists books a keyset page at a time.
+
+    Args:
+        request (Request): The HTTP request object.
+        after (int | None): The id of the last book on the previous page.
+        limit (int): The number of books per page.
+        fields (str | None): Comma-separated fields to return besides id,
+            e.g. "title,author"; all fields by default.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        Response: The page of books and the cursor of the next one.
+    """
+    selected = API_FIELDS if not fields else tuple(field.strip() for field in fields.split(","))
+    unknown = set(selected) - set(API_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    query = select(Book.id, *book_columns(selected)).order_by(Book.id)
+    if "author" in selected:
+        query = query.join(Book.author)
+    if after is not None:
+        query = query.where(Book.id > after)
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    items = [row._asdict() for row in rows[:limit]]
+    return json_response(request, {"items": items, "next_cursor": next_cursor})
+
+
+@app.post("/api/books", response_model=BookOut, status_code=201)
+async def api_book_create(request: Request, data: BookIn, db: AsyncSession = Depends(get_async_db)):
+    """
+    Creates a book.
+
+    Args:
+        request (Request): The HTTP request object.
+        data (BookIn): The fields of the new book.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        Response: The created book.
+    """
+    values = data.model_dump()
+    values["author"] = await get_author(db, values["author"])
+    book = Book(**values)
+    db.add(book)
+    await db.commit()
+    return json_response(request, book_json(book), status_code=201)
+
+
+@app.post("/api/books/batch", response_model=list[BookOut], status_code=201)
+async def api_book_batch_create(
+    request: Request,
+    data: list[BookIn] = Body(..., max_length=MAX_API_BATCH_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Creates many books with a single multi-row INSERT in one transaction.
+
+    Args:
+        request (Request): The HTTP request object.
+        data (list[BookIn]): The new books.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        Response: The created books, in the order they were sent.
+    """
+    if not data:
+        return json_response(request, [], status_code=201)
+    items = [item.model_dump() for item in data]
+    statement = insert(Book).returning(Book.id, sort_by_parameter_order=True)
+    ids = (await db.scalars(statement, await db.run_sync(link_authors, items))).all()
+    await db.commit()
+    return json_response(request, [{"id": book_id, **item} for book_id, item in zip(ids, items)], status_code=201)
+
+
+@app.patch("/api/books/batch")
+async def api_book_batch_update(request: Request, data: BookBatchUpdate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Applies the same partial update to many books with set-based UPDATEs
+    in one transaction, e.g. to reassign their author.
+
+    Args:
+        request (Request): The HTTP request object.
+        data (BookBatchUpdate): The IDs of the books and the fields to change.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        Response: The number of books updated; unknown IDs are skipped.
+    """
+    book_ids = sorted(set(data.ids))
+    values = data.values.model_dump(exclude_unset=True)
+    updated = 0
+    if values:
+        updated = await db.run_sync(update_books, book_ids, values)
+        await db.commit()
+        book_cache.delete_many(f"book_detail:{book_id}" for book_id in book_ids)
+    return json_response(request, {"updated": updated})
+
+
+@app.post("/api/books/batch/delete")
+async def api_book_batch_delete(request: Request, data: BookBatchDelete, db: AsyncSession = Depends(get_async_db)):
+    """
+    Deletes many books, marking them with set-based UPDATEs in one
+    transaction.
+
+    Args:
+        request (Request): The HTTP request object.
+        data (BookBatchDelete): The IDs of the books.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        Response: The number of books deleted; unknown IDs are skipped.
+    """
+    book_ids = sorted(set(data.ids))
+    deleted = await db.run_sync(delete_books, book_ids)
+    await db.commit()
+    book_cache.delete_many(f"book_detail:{book_id}" for book_id in book_ids)
+    return json_response(request, {"deleted": deleted})
+
+
+@app.get("/api/books/{book_id}", response_model=BookOut)
+async def api_book_detail(request: Request, book_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Returns one book.
+
+    Args:
+        request (Request): The HTTP request object.
+        book_id (int): The ID of the book.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        Response: The book.
+    """
+    book = await get_book_or_404(db, book_id)
+    return json_response(request, book_json(book))
+
+
+@app.patch("/api/books/{book_id}", response_model=BookOut)
+async def api_book_update(
+    request: Request,
+    book_id: int,
+    data: BookPatch,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Updates the fields of a book that are present in the request body.
+
+    Args:
+        request (Request): The HTTP request object.
+        book_id (int): The ID of the book.
+        data (BookPatch): The fields to change.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        Response: The updated book.
+    """
+    book = await get_book_or_404(db, book_id)
+    for field, value in data.model_dump(exclude_unset=True).items():
+        if field == "author":
+            value = await get_author(db, value)
+        setattr(book, field, value)
+    await db.commit()
+    book_cache.delete(f"book_detail:{book_id}")
+    return json_response(request, book_json(book))
+
+
+@app.delete("/api/books/{book_id}", status_code=204)
+async def api_book_delete(book_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Deletes a book.
+
+    Args:
+        book_id (int): The ID of the book.
+        db (AsyncSession): The asynchronous database session.
+
+    Returns:
+        Response: An empty 204 response.
+    """
+    book = await get_book_or_404(db, book_id)
+    book.deleted_at = utcnow()
+    await db.commit()
+    book_cache.delete(f"book_detail:{book_id}")
+    return Response(status_code=204)
+
+
+if INSTRUMENTATION:
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics_endpoint():
+        """
+        Exposes the request histograms in the Prometheus text format.
+
+        Returns:
+            PlainTextResponse: The metrics.
+        """
+        return PlainTextResponse(metrics.expose(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,113 @@
+"""
+Off-peak maintenance of the library database, run from cron rather than
+from the request path: purging the soft deleted books and handing the
+space they leave back to the filesystem.
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+
+# Deleted books are kept this long before they are purged
+PURGE_AFTER_DAYS = 7
+# Rows deleted per transaction, and seconds between two, so requests
+# waiting for the write lock get it between batches
+PURGE_BATCH_SIZE = 500
+PURGE_PAUSE = 0.1
+# Free pages handed back per transaction of the incremental vacuum
+VACUUM_STEP_PAGES = 1000
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def purge_cutoff(days=PURGE_AFTER_DAYS):
+    """
+    Returns the time before which deleted rows are purged.
+
+    Args:
+        days (float): How long deleted rows are kept.
+
+    Returns:
+        datetime: The cutoff, naive UTC like the ``deleted_at`` columns.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+
+
+def purge_deleted(engine, table, before, batch_size=PURGE_BATCH_SIZE, pause=PURGE_PAUSE):
+    """
+    Physically deletes the rows of a table soft deleted before a time, in
+    batches of one short transaction each, oldest first.
+
+    Args:
+        engine (Engine): The synchronous engine of the database.
+        table (Table): A table with ``id`` and ``deleted_at`` columns.
+        before (datetime): Rows deleted before this time are purged.
+        batch_size (int): Rows deleted per transaction.
+        pause (float): Seconds to sleep between two batches.
+
+    Returns:
+        int: The number of rows purged.
+    """
+    batch = (
+        select(table.c.id)
+        .where(table.c.deleted_at < before)
+        .order_by(table.c.deleted_at)
+        .limit(batch_size)
+    )
+    statement = delete(table).where(table.c.id.in_(batch.scalar_subquery()))
+    purged = 0
+    while True:
+        with engine.begin() as connection:
+            count = connection.execute(statement).rowcount
+        purged += count
+        if count < batch_size:
+            return purged
+        time.sleep(pause)
+
+
+def vacuum_database(engine, step_pages=VACUUM_STEP_PAGES, pause=PURGE_PAUSE):
+    """
+    Hands the free pages of a SQLite database back to the filesystem with
+    ``PRAGMA incremental_vacuum``, a step at a time, then truncates the
+    write-ahead log and refreshes the query planner statistics.
+
+    A database created before ``auto_vacuum=INCREMENTAL`` was set (see
+    sqlite_profile.py) is switched to it first, which takes one full
+    ``VACUUM``: the file is rewritten while every other connection waits.
+
+    Args:
+        engine (Engine): The synchronous engine of a SQLite database.
+        step_pages (int): Pages freed per transaction.
+        pause (float): Seconds to sleep between two steps.
+
+    Returns:
+        dict: ``switched`` (whether the full VACUUM ran), ``freed_pages``
+        and ``page_size`` in bytes.
+
+    Raises:
+        ValueError: If the database is not SQLite.
+    """
+    if engine.dialect.name != "sqlite":
+        raise ValueError(f"Only SQLite databases are vacuumed, not {engine.dialect.name}")
+    # VACUUM cannot run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        pragma = connection.exec_driver_sql
+        switched = pragma("PRAGMA auto_vacuum").scalar() != AUTO_VACUUM_INCREMENTAL
+        if switched:
+            pragma("PRAGMA auto_vacuum = INCREMENTAL")
+            pragma("VACUUM")
+        page_size = pragma("PRAGMA page_size").scalar()
+        free_pages = remaining = pragma("PRAGMA freelist_count").scalar()
+        while remaining:
+            # sqlite3's execute() steps a statement without result columns
+            # once, which frees a single page; executescript() runs it through
+            connection.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(step_pages)})")
+            previous, remaining = remaining, pragma("PRAGMA freelist_count").scalar()
+            if remaining >= previous:
+                break
+            if remaining:
+                time.sleep(pause)
+        if pragma("PRAGMA journal_mode").scalar() == "wal":
+            pragma("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        pragma("PRAGMA optimize").fetchall()
+    return {"switched": switched, "freed_pages": free_pages - remaining, "page_size": page_size}
@@ -0,0 +1,18 @@
+"""
+Creates or migrates the database schema. Run from this directory once per
+deploy, before the workers start:
+
+    python -m migrate
+
+Workers started with MIGRATE_ON_STARTUP=0 then skip the step.
+"""
+from main import DATABASE_URL, create_schema
+
+
+def main():
+    create_schema()
+    print(f"Migrated {DATABASE_URL}")
+
+
+if __name__ == "__main__":
+    main()
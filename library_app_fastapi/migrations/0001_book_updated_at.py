@@ -0,0 +1,14 @@
+"""
+Adds ``books.updated_at``, the Last-Modified time of a book's pages.
+
+SQLite only adds NOT NULL columns with a constant default, so existing
+books get the time of the migration.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+
+def upgrade(connection):
+    now = datetime.now(timezone.utc).replace(tzinfo=None).isoformat(" ")
+    connection.execute(text(f"ALTER TABLE books ADD COLUMN updated_at DATETIME NOT NULL DEFAULT '{now}'"))
@@ -0,0 +1,36 @@
+"""
+Moves author names out of ``books`` into the new ``authors`` table.
+
+Every distinct name, with surrounding whitespace stripped, becomes one
+author and books refer to it by ``author_id``; books without a name get an
+"Unknown" author. The full-text index read ``books.author``, so it is
+dropped first and built again over the author names at startup.
+"""
+from sqlalchemy import text
+
+UNKNOWN_AUTHOR = "Unknown"
+
+STATEMENTS = [
+    "DROP TRIGGER IF EXISTS books_fts_insert",
+    "DROP TRIGGER IF EXISTS books_fts_delete",
+    "DROP TRIGGER IF EXISTS books_fts_update",
+    "DROP TABLE IF EXISTS books_fts",
+    "CREATE TABLE authors (id INTEGER NOT NULL, name VARCHAR NOT NULL, PRIMARY KEY (id), UNIQUE (name))",
+    """
+    INSERT INTO authors (name)
+    SELECT DISTINCT coalesce(nullif(trim(author), ''), :unknown) FROM books ORDER BY 1
+    """,
+    "ALTER TABLE books ADD COLUMN author_id INTEGER REFERENCES authors (id)",
+    """
+    UPDATE books SET author_id = (
+        SELECT id FROM authors WHERE name = coalesce(nullif(trim(books.author), ''), :unknown)
+    )
+    """,
+    "CREATE INDEX ix_books_author_id ON books (author_id)",
+    "ALTER TABLE books DROP COLUMN author",
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS:
+        connection.execute(text(statement), {"unknown": UNKNOWN_AUTHOR})
@@ -0,0 +1,21 @@
+"""
+Adds the indexes behind the filters and sort orders of the book list.
+
+(author_id, published_date) also serves lookups by author alone, so it
+replaces ``ix_books_author_id``; titles are filtered and sorted ignoring
+case, so the NOCASE index replaces ``ix_books_title``.
+"""
+from sqlalchemy import text
+
+STATEMENTS = [
+    "DROP INDEX IF EXISTS ix_books_author_id",
+    "DROP INDEX IF EXISTS ix_books_title",
+    "CREATE INDEX ix_books_author_id_published_date ON books (author_id, published_date)",
+    "CREATE INDEX ix_books_published_date ON books (published_date)",
+    'CREATE INDEX ix_books_title_nocase ON books (title COLLATE "NOCASE")',
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS:
+        connection.execute(text(statement))
@@ -0,0 +1,23 @@
+"""
+Adds ``books.deleted_at``: deleting a book only marks it, and the purge job
+removes marked books later (see maintenance.py). The partial index finds
+the marked books without growing with the live ones.
+
+The search index and version counter triggers are dropped, to be created
+again by the schema step with conditions skipping marked books.
+"""
+from sqlalchemy import text
+
+STATEMENTS = [
+    "ALTER TABLE books ADD COLUMN deleted_at DATETIME",
+    "CREATE INDEX ix_books_deleted_at ON books (deleted_at) WHERE deleted_at IS NOT NULL",
+    "DROP TRIGGER IF EXISTS books_fts_delete",
+    "DROP TRIGGER IF EXISTS books_fts_update",
+    "DROP TRIGGER IF EXISTS authors_fts_update",
+    "DROP TRIGGER IF EXISTS books_version_delete",
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS:
+        connection.execute(text(statement))
@@ -0,0 +1,56 @@
+"""
+Schema migrations of the library database.
+
+Every module in this package named ``NNNN_description.py`` defines
+``upgrade(connection)``. Pending migrations run in name order, each in its
+own transaction, and are recorded in the ``schema_migrations`` table. A new
+database is created from the models instead, with every migration marked
+as applied.
+"""
+import importlib
+import pkgutil
+
+from sqlalchemy import inspect, text
+
+
+def migration_names():
+    """
+    Lists the migrations of this package in the order they are applied.
+
+    Returns:
+        list[str]: Module names, e.g. ["0001_book_updated_at"].
+    """
+    return sorted(module.name for module in pkgutil.iter_modules(__path__))
+
+
+def upgrade_database(engine, metadata, table_name):
+    """
+    Brings the database schema up to date with the models.
+
+    Args:
+        engine (Engine): The synchronous engine of the database.
+        metadata (MetaData): The metadata of the models.
+        table_name (str): A table that exists in every created database;
+            when it is missing the database is new.
+
+    Returns:
+        list[str]: The names of the migrations that were run.
+    """
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE IF NOT EXISTS schema_migrations (version VARCHAR PRIMARY KEY)"))
+        applied = set(connection.scalars(text("SELECT version FROM schema_migrations")))
+        new_database = not inspect(connection).has_table(table_name)
+    if new_database:
+        metadata.create_all(bind=engine)
+    run = []
+    for name in migration_names():
+        if name in applied:
+            continue
+        with engine.begin() as connection:
+            if not new_database:
+                importlib.import_module(f"{__name__}.{name}").upgrade(connection)
+                run.append(name)
+            connection.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": name})
+    # Tables added to the models since the last migration
+    metadata.create_all(bind=engine)
+    return run
@@ -0,0 +1,33 @@
+"""
+Removes the books deleted more than --older-than-days days ago, a small
+batch per transaction so requests keep getting the write lock. Run from
+this directory, off-peak, e.g. nightly from cron:
+
+    python -m purge_books --older-than-days 7 && python -m vacuum_database
+"""
+import argparse
+import time
+
+from main import MIGRATE_ON_STARTUP, Book, create_schema, engine
+from maintenance import PURGE_AFTER_DAYS, PURGE_BATCH_SIZE, PURGE_PAUSE, purge_cutoff, purge_deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purge deleted books.")
+    parser.add_argument("--older-than-days", type=float, default=PURGE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=PURGE_PAUSE, help="Seconds between batches")
+    args = parser.parse_args()
+
+    if MIGRATE_ON_STARTUP:
+        create_schema()
+
+    start = time.perf_counter()
+    purged = purge_deleted(
+        engine, Book.__table__, purge_cutoff(args.older_than_days), args.batch_size, args.pause
+    )
+    print(f"Purged {purged} books in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import threading
+from functools import partial
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from markupsafe import Markup
+
+from compression import MinifyExtension
+
+
+class FragmentCache:
+    """
+    Keeps the HTML of templates whose output only depends on the arguments
+    given here, such as page headers and empty forms, so they are rendered
+    once per process instead of once per request.
+
+    Templates render fragments with ``{{ fragment("partials/header.html") }}``.
+    Nothing is kept while ``enabled`` is false, so edited templates show up
+    immediately during development.
+
+    Attributes:
+        enabled (bool): Whether rendered fragments are kept.
+    """
+
+    def __init__(self, env, enabled=True):
+        self.env = env
+        self.enabled = enabled
+        self._fragments = {}
+        self._lock = threading.Lock()
+
+    def render(self, name, **context):
+        """
+        Renders a template, or returns its HTML from an earlier call.
+
+        Args:
+            name (str): The template name.
+            **context: Hashable template variables; they are part of the key.
+
+        Returns:
+            Markup: The rendered HTML, safe to insert into other templates.
+        """
+        key = (name, tuple(sorted(context.items())))
+        html = self._fragments.get(key)
+        if html is None:
+            html = Markup(self.env.get_template(name).render(**context))
+            if self.enabled:
+                with self._lock:
+                    self._fragments[key] = html
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+
+def static_url(manifest, name):
+    """
+    Returns the URL of a static file, fingerprinted if the assets were built.
+
+    Args:
+        manifest (dict): Fingerprinted names by name, see assets.py.
+        name (str): The file name in static/, e.g. "styles.css".
+
+    Returns:
+        str: The URL.
+    """
+    return f"/static/{manifest.get(name, name)}"
+
+
+def create_templates(directory, cache_dir=None, auto_reload=False, asset_manifest=None, minify=False):
+    """
+    Creates the Jinja2 templates with a bytecode cache on disk.
+
+    Compiled templates are written to ``cache_dir`` and loaded from there by
+    the next process, so a cold start skips parsing and compiling. Without
+    ``auto_reload`` a loaded template is never checked for changes on disk.
+
+    Args:
+        directory (str): The template directory.
+        cache_dir (str | None): Where to keep compiled templates; None
+            disables the bytecode cache.
+        auto_reload (bool): Whether to recompile templates changed on disk.
+        asset_manifest (dict | None): The manifest of the built static
+            assets, used by the ``static_url`` template global.
+        minify (bool): Whether to minify the HTML of the templates, see
+            ``compression.MinifyExtension``.
+
+    Returns:
+        tuple: The ``Jinja2Templates`` and the ``FragmentCache`` registered as
+        the ``fragment`` template global.
+    """
+    bytecode_cache = None
+    if cache_dir:
+        if minify:
+            # The cache does not tell templates compiled with and without the extension apart
+            cache_dir = os.path.join(cache_dir, "minified")
+        os.makedirs(cache_dir, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    env = Environment(
+        loader=FileSystemLoader(directory),
+        autoescape=True,
+        bytecode_cache=bytecode_cache,
+        auto_reload=auto_reload,
+        extensions=[MinifyExtension] if minify else [],
+    )
+    fragments = FragmentCache(env, enabled=not auto_reload)
+    env.globals["fragment"] = fragments.render
+    env.globals["static_url"] = partial(static_url, asset_manifest or {})
+    return Jinja2Templates(env=env), fragments
+
+
+def precompile_templates(env):
+    """
+    Loads every template, so none is compiled while serving a request.
+
+    Args:
+        env (Environment): The Jinja2 environment.
+
+    Returns:
+        int: The number of templates loaded.
+    """
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
@@ -0,0 +1,54 @@
+from sqlalchemy import event
+
+# PRAGMA settings applied to every new SQLite connection, by profile name.
+# "default" leaves SQLite's rollback journal and full fsync on every commit.
+SQLITE_PROFILES = {
+    "default": {},
+    "production": {
+        "auto_vacuum": "INCREMENTAL", # on new files; free pages kept until vacuumed
+        "journal_mode": "WAL",        # readers no longer wait for writers
+        "synchronous": "NORMAL",      # fsync at checkpoints, not every commit
+        "cache_size": -64000,         # 64 MB page cache (negative means KiB)
+        "mmap_size": 268435456,       # map up to 256 MB of the file
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,         # wait up to 5 s for a lock, in ms
+    },
+}
+
+
+def apply_sqlite_profile(dbapi_connection, profile):
+    """
+    Runs the PRAGMA statements of a profile on a raw DB-API connection.
+
+    Note that ``journal_mode=WAL`` is stored in the database file, so
+    switching back to the "default" profile does not undo it.
+
+    Args:
+        dbapi_connection: The sqlite3 (or aiosqlite adapted) connection.
+        profile (str): The name of a profile in ``SQLITE_PROFILES``.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in SQLITE_PROFILES[profile].items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+    finally:
+        cursor.close()
+
+
+def install_sqlite_profile(engine, profile):
+    """
+    Applies a profile to every connection the engine opens.
+
+    Args:
+        engine (Engine): A synchronous engine; for an ``AsyncEngine`` pass
+            its ``sync_engine``.
+        profile (str): The name of a profile in ``SQLITE_PROFILES``.
+    """
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile: {profile}")
+    if engine.dialect.name != "sqlite" or not SQLITE_PROFILES[profile]:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_profile(dbapi_connection, profile)
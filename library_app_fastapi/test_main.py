@@ -0,0 +1,303 @@
+import json
+import re
+from html import unescape
+
+import pytest
+from sqlalchemy import event, update
+
+from database import async_database_url, engine_options
+from instrumentation import QueryBudgetExceeded
+
+
+def add_books(client, *titles, author="Frank Herbert", published_date="1965-08-01"):
+    books = [{"title": title, "author": author, "published_date": published_date} for title in titles]
+    response = client.post("/api/books/batch", json=books)
+    assert response.status_code == 201
+    return [book["id"] for book in response.json()]
+
+
+def add_library(client):
+    # Several authors, so loading each book's author lazily repeats a statement
+    ids = []
+    for author in ("Frank Herbert", "Jane Austen", "Ursula K. Le Guin"):
+        ids += add_books(client, f"{author} 1", f"{author} 2", author=author)
+    return ids
+
+
+def listed_titles(html):
+    return re.findall(r'<a href="/book/\d+">([^<]*)</a>', html)
+
+
+def test_api_keyset_pages_follow_each_other(client):
+    ids = add_books(client, "Dune", "Dune Messiah", "Children of Dune")
+    page = client.get("/api/books", params={"limit": 2, "fields": "title"}).json()
+    assert page["items"] == [{"id": ids[0], "title": "Dune"}, {"id": ids[1], "title": "Dune Messiah"}]
+    assert page["next_cursor"] == ids[1]
+    page = client.get("/api/books", params={"limit": 2, "after": page["next_cursor"], "fields": "title"}).json()
+    assert page == {"items": [{"id": ids[2], "title": "Children of Dune"}], "next_cursor": None}
+
+
+def test_last_page_has_no_next_link(client):
+    ids = add_books(client, "Dune", "Dune Messiah", "Children of Dune")
+    html = client.get("/", params={"limit": 2, "sort": "title"}).text
+    assert listed_titles(html) == ["Children of Dune", "Dune"]
+    next_link = f'href="/?sort=title&after={ids[0]}&limit=2"'
+    assert next_link in html
+    html = client.get("/", params={"limit": 2, "sort": "title", "after": ids[0]}).text
+    assert listed_titles(html) == ["Dune Messiah"]
+    assert "Next page" not in html
+    # A full last page has no next page either
+    html = client.get("/", params={"limit": 3}).text
+    assert len(listed_titles(html)) == 3
+    assert "Next page" not in html
+
+
+def test_tampered_cursor(client):
+    ids = add_books(client, "Dune", "Emma")
+    assert client.get("/", params={"after": "Dune"}).status_code == 422
+    assert client.get("/api/books", params={"after": "1 OR 1=1"}).status_code == 422
+    # The cursor of a book that does not exist starts the list over
+    html = client.get("/", params={"sort": "title", "after": ids[-1] + 100}).text
+    assert listed_titles(html) == ["Dune", "Emma"]
+    assert listed_titles(client.get("/", params={"after": ids[-1] + 100}).text) == []
+
+
+def test_streamed_list_matches_rendered_list(client):
+    ids = add_books(client, "Dune", "Dune Messiah", "Children of Dune")
+    response = client.get("/", params={"limit": 2, "stream": "true"})
+    assert response.status_code == 200
+    assert "content-length" not in response.headers
+    assert response.headers["etag"] == client.get("/").headers["etag"]
+    assert listed_titles(response.text) == ["Dune", "Dune Messiah"]
+    assert f"after={ids[1]}&limit=2" in response.text
+
+
+def test_streamed_export(client):
+    ids = add_books(client, "Dune", "Emma")
+    response = client.get("/export", params={"format": "jsonl"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "attachment" in response.headers["content-disposition"]
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["id"], row["title"], row["author"]) for row in rows] == [
+        (ids[0], "Dune", "Frank Herbert"), (ids[1], "Emma", "Frank Herbert")
+    ]
+
+
+def test_patch_rejects_null_fields(client):
+    [book_id] = add_books(client, "Dune")
+    for field in ("title", "author", "description", "published_date"):
+        response = client.patch(f"/api/books/{book_id}", json={field: None})
+        assert response.status_code == 422, field
+    response = client.patch(f"/api/books/{book_id}", json={"title": "Dune Messiah", "description": ""})
+    assert response.json()["title"] == "Dune Messiah"
+    book = client.get(f"/api/books/{book_id}").json()
+    assert (book["author"], book["description"], book["published_date"]) == ("Frank Herbert", "", "1965-08-01")
+
+
+def test_book_pages_within_budget(client, query_budget):
+    ids = add_library(client)
+    with query_budget(max_queries=2):
+        html = client.get("/").text
+    assert len(listed_titles(html)) == 6
+    with query_budget(max_queries=3):
+        client.get("/", params={"sort": "author", "after": ids[0]})
+    with query_budget(max_queries=2):
+        client.get(f"/book/{ids[0]}")
+    # Cached, only the validators are read
+    with query_budget(max_queries=1):
+        client.get(f"/book/{ids[0]}")
+    author_id = re.search(r'href="/author/(\d+)"', html).group(1)
+    with query_budget(max_queries=2):
+        html = client.get(f"/author/{author_id}").text
+    assert len(listed_titles(html)) == 2
+
+
+def test_repeated_statement_fails(client, query_budget):
+    ids = add_library(client)
+    with pytest.raises(QueryBudgetExceeded, match="x SELECT"):
+        with query_budget():
+            for book_id in ids:
+                client.get(f"/api/books/{book_id}")
+
+
+def test_over_budget_fails(client, query_budget):
+    add_library(client)
+    with pytest.raises(QueryBudgetExceeded, match="2 queries, budget is 1"):
+        with query_budget(max_queries=1):
+            client.get("/")
+
+
+def test_forms_reject_blank_author(client):
+    [book_id] = add_books(client, "Dune")
+    form = {"title": "Dune Messiah", "author": "   ", "description": "", "published_date": "1969-10-15"}
+    assert client.post("/book/new", data=form).status_code == 422
+    assert client.post(f"/book/{book_id}/edit", data=form).status_code == 422
+    assert client.get(f"/api/books/{book_id}").json()["author"] == "Frank Herbert"
+    response = client.post("/book/new", data={**form, "author": " Frank Herbert "}, follow_redirects=False)
+    assert response.status_code == 303
+    html = client.get("/").text
+    assert listed_titles(html) == ["Dune", "Dune Messiah"]
+    assert len(set(re.findall(r'href="/author/(\d+)"', html))) == 1
+
+
+def walk_pages(client, **params):
+    titles = []
+    url = "/?" + "&".join(f"{name}={value}" for name, value in {**params, "limit": 1}.items())
+    while url:
+        html = client.get(url).text
+        titles += listed_titles(html)
+        next_link = re.search(r'href="(/\?[^"]*after=[^"]*)">Next page', html)
+        url = next_link and unescape(next_link.group(1))
+    return titles
+
+
+def test_keyset_pages_past_null_dates(client):
+    import main
+
+    ids = add_books(client, "Dune", "Emma", "Solaris", "Ringworld")
+    with main.engine.begin() as connection:
+        connection.execute(update(main.Book).where(main.Book.id.in_(ids[1:3])).values(published_date=None))
+    for sort in ("", "title", "author", "published", "-published"):
+        titles = listed_titles(client.get("/", params={"sort": sort}).text)
+        assert len(titles) == 4
+        assert walk_pages(client, sort=sort) == titles, sort
+    assert walk_pages(client, sort="published") == ["Emma", "Solaris", "Dune", "Ringworld"]
+    assert walk_pages(client, sort="-published") == ["Ringworld", "Dune", "Solaris", "Emma"]
+    assert walk_pages(client, sort="-published", year_from=1900) == ["Ringworld", "Dune"]
+
+
+def query_plan(statement):
+    import main
+
+    executed = []
+
+    def capture(connection, cursor, sql, parameters, context, executemany):
+        executed.append((sql, parameters))
+
+    # The statement as sent, with the criteria leaving out deleted books
+    event.listen(main.engine, "before_cursor_execute", capture)
+    try:
+        with main.SessionLocal() as db:
+            db.execute(statement).all()
+            sql, parameters = executed[-1]
+            rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters).all()
+    finally:
+        event.remove(main.engine, "before_cursor_execute", capture)
+    return "\n".join(row[3] for row in rows)
+
+
+def page_plan(after=None, **params):
+    import main
+
+    defaults = {"title": None, "author": None, "year_from": None, "year_to": None, "sort": ""}
+    filters = main.BookFilters(**{**defaults, **params})
+    with main.SessionLocal() as db:
+        cursor = filters.cursor(db, after)
+    return query_plan(main.book_page_query(filters, cursor, main.PAGE_SIZE))
+
+
+@pytest.fixture
+def catalog(client):
+    import main
+
+    ids = add_books(client, "Dune", "Dune Messiah", published_date="1965-08-01")
+    ids += add_books(client, "Emma", author="Jane Austen", published_date="1815-12-23")
+    with main.SessionLocal() as db:
+        author_id = db.get(main.Book, ids[0]).author_id
+    return ids, author_id
+
+
+def test_every_filter_searches_an_index(catalog):
+    _, author_id = catalog
+    for params in [
+        {"title": "dune"},
+        {"author": author_id},
+        {"year_from": 1960, "year_to": 1969},
+        {"author": author_id, "year_from": 1960, "year_to": 1969},
+        # In id order SQLite rather reads the table in order than sorts an open range
+        {"year_from": 1960, "sort": "published"},
+    ]:
+        plan = page_plan(**params)
+        assert "SEARCH books USING INDEX" in plan, params
+        assert not re.search(r"(?m)^SCAN books", plan), params
+
+
+def test_sorts_read_an_index_in_order(catalog):
+    ids, author_id = catalog
+    for params in [
+        {"sort": "title"},
+        {"sort": "published"},
+        {"sort": "-published"},
+        {"sort": "author"},
+        {"title": "dune", "sort": "title"},
+        {"author": author_id, "sort": "published"},
+        {"year_from": 1960, "sort": "-published"},
+    ]:
+        for after in (None, ids[0]):
+            plan = page_plan(after, **params)
+            assert "TEMP B-TREE" not in plan, (params, after)
+            assert not re.search(r"(?m)^SCAN books$", plan), (params, after)
+            # Later pages start reading the index at the cursor
+            if after and params != {"sort": "-published"}:
+                assert not re.search(r"(?m)^SCAN (books|authors)", plan), (params, after)
+
+
+def test_api_batch_update_rejects_null_values(client):
+    ids = add_books(client, "Dune", "Emma")
+    for field in ("title", "author", "description", "published_date"):
+        response = client.patch("/api/books/batch", json={"ids": ids, "values": {field: None}})
+        assert response.status_code == 422, field
+    assert [book["title"] for book in client.get("/api/books").json()["items"]] == ["Dune", "Emma"]
+
+
+def test_api_batch_update_and_delete(client):
+    ids = add_books(client, "Dune", "Emma", "Solaris")
+    client.get(f"/book/{ids[0]}")
+    values = {"author": " Jane Austen ", "published_date": "1815-12-23"}
+    response = client.patch("/api/books/batch", json={"ids": [*ids[:2], 0], "values": values})
+    assert response.json() == {"updated": 2}
+    books = client.get("/api/books", params={"fields": "author,published_date"}).json()["items"]
+    assert [(book["author"], book["published_date"]) for book in books] == [
+        ("Jane Austen", "1815-12-23"), ("Jane Austen", "1815-12-23"), ("Frank Herbert", "1965-08-01")
+    ]
+    # The cached detail page was dropped
+    assert "Jane Austen" in client.get(f"/book/{ids[0]}").text
+    response = client.post("/api/books/batch/delete", json={"ids": [ids[0], ids[2], 0]})
+    assert response.json() == {"deleted": 2}
+    assert [book["id"] for book in client.get("/api/books").json()["items"]] == [ids[1]]
+    assert client.get(f"/book/{ids[0]}").status_code == 404
+    assert client.patch("/api/books/batch", json={"ids": [], "values": {"title": "Emma"}}).status_code == 422
+
+
+def test_update_books_in_chunks(client):
+    import main
+
+    ids = add_books(client, "Dune", "Emma", "Solaris")
+    with main.SessionLocal() as db:
+        assert main.update_books(db, ids, {"title": "Untitled"}, chunk_size=2) == 3
+        assert main.delete_books(db, ids[:2], chunk_size=1) == 2
+        db.commit()
+    assert [book["title"] for book in client.get("/api/books").json()["items"]] == ["Untitled"]
+
+
+def test_batch_forms(client):
+    ids = add_books(client, "Dune", "Emma")
+    response = client.post("/book/batch/edit", data={"ids": ids, "author": "Jane Austen", "published_date": "soon"})
+    assert response.status_code == 422
+    client.post("/book/batch/edit", data={"ids": ids, "author": "Jane Austen", "published_date": ""})
+    assert {book["author"] for book in client.get("/api/books").json()["items"]} == {"Jane Austen"}
+    response = client.post("/book/batch/delete", data={"ids": ids})
+    assert "delete 2 selected books?" in response.text
+    assert len(client.get("/api/books").json()["items"]) == 2
+    response = client.post("/book/batch/delete", data={"ids": ids, "confirm": "true"}, follow_redirects=False)
+    assert response.status_code == 303
+    assert client.get("/api/books").json()["items"] == []
+
+
+def test_only_sqlite_urls_are_accepted():
+    for url in ("postgresql://library@localhost/library", "mysql+pymysql://library@localhost/library"):
+        with pytest.raises(ValueError, match="only SQLite URLs are supported"):
+            engine_options(url)
+        with pytest.raises(ValueError, match="only SQLite URLs are supported"):
+            async_database_url(url)
+    assert str(async_database_url("sqlite:///./library.db")) == "sqlite+aiosqlite:///./library.db"
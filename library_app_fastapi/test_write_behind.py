@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+
+from write_behind import WriteBehindQueue
+
+
+class Database:
+    """
+    Records the batches written; a batch holding a write in ``failing``
+    fails as a whole, like a transaction.
+    """
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.batches = []
+
+    async def write_batch(self, batch):
+        await asyncio.sleep(0)
+        if self.failing & set(batch):
+            raise ValueError(f"cannot write {batch}")
+        self.batches.append(list(batch))
+
+
+def run_queue(writes, database, **options):
+    async def main():
+        queue = WriteBehindQueue(database.write_batch, **options)
+        queue.start()
+        for write in writes:
+            await queue.put(write)
+        await queue.stop()
+        return queue
+
+    return asyncio.run(main())
+
+
+def test_writes_are_batched():
+    database = Database()
+    queue = run_queue(range(7), database, batch_size=3, flush_interval=1)
+    assert database.batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert (queue.flushed, queue.failed) == (7, 0)
+
+
+def test_batch_flushed_after_interval():
+    async def main():
+        database = Database()
+        queue = WriteBehindQueue(database.write_batch, batch_size=100, flush_interval=0.01)
+        queue.start()
+        await queue.put(1)
+        await asyncio.sleep(0.1)
+        batches = list(database.batches)
+        await queue.stop()
+        return batches
+
+    assert asyncio.run(main()) == [[1]]
+
+
+def test_stop_flushes_without_waiting_for_the_interval():
+    database = Database()
+    start = time.monotonic()
+    run_queue([1, 2], database, batch_size=100, flush_interval=30)
+    assert time.monotonic() - start < 5
+    assert database.batches == [[1, 2]]
+
+
+def test_failed_batch_is_retried_write_by_write(caplog):
+    database = Database(failing=[2])
+    with caplog.at_level(logging.ERROR):
+        queue = run_queue(range(4), database, batch_size=4, flush_interval=1)
+    assert database.batches == [[0], [1], [3]]
+    assert (queue.flushed, queue.failed) == (3, 1)
+    assert "Dropped queued write: 2" in caplog.text
+
+
+def test_put_waits_while_the_queue_is_full():
+    async def main():
+        release = asyncio.Event()
+        written = []
+
+        async def write_batch(batch):
+            await release.wait()
+            written.extend(batch)
+
+        queue = WriteBehindQueue(write_batch, batch_size=1, flush_interval=0, max_pending=1)
+        queue.start()
+        await queue.put(1)
+        await queue.put(2)
+        # 1 is being written, 2 fills the queue
+        blocked = asyncio.create_task(queue.put(3))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        release.set()
+        await blocked
+        await queue.stop()
+        return written
+
+    assert asyncio.run(main()) == [1, 2, 3]
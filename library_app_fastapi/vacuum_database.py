@@ -0,0 +1,33 @@
+"""
+Hands the free pages of the SQLite database back to the filesystem with an
+incremental vacuum, then truncates the write-ahead log. Run from this
+directory, off-peak, after `python -m purge_books`:
+
+    python -m vacuum_database
+
+The first run on a database created without auto_vacuum=INCREMENTAL
+rewrites the whole file once; other connections wait until it is done.
+"""
+import argparse
+import time
+
+from main import DATABASE_URL, engine
+from maintenance import PURGE_PAUSE, VACUUM_STEP_PAGES, vacuum_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally vacuum the SQLite database.")
+    parser.add_argument("--step-pages", type=int, default=VACUUM_STEP_PAGES, help="Pages freed per transaction")
+    parser.add_argument("--pause", type=float, default=PURGE_PAUSE, help="Seconds between steps")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = vacuum_database(engine, args.step_pages, args.pause)
+    if report["switched"]:
+        print(f"Switched {DATABASE_URL} to auto_vacuum=INCREMENTAL with a full VACUUM")
+    freed_mb = report["freed_pages"] * report["page_size"] / 1e6
+    print(f"Freed {report['freed_pages']} pages ({freed_mb:.1f} MB) in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+
+# Queued by stop() so the worker flushes what it collected without waiting
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Queues writes in memory and applies them from a background task in
+    batched transactions.
+
+    The worker waits for the first write, then collects more until
+    ``batch_size`` are pending or ``flush_interval`` seconds have passed, and
+    hands them to ``write_batch`` at once. If the batch fails, its writes
+    are retried one by one so a single bad write does not take the others
+    with it; writes that still fail are logged and dropped.
+
+    Durability: a write is acknowledged once it is queued, not once it is
+    committed. Writes still in the queue when the process dies (a crash,
+    SIGKILL, a failed flush) are lost; ``stop()`` on a graceful shutdown
+    flushes them. Until its batch is flushed, a write is not visible to
+    readers, including the client that sent it.
+
+    Args:
+        write_batch (Callable): Coroutine function taking a list of queued
+            writes and committing them in one transaction.
+        batch_size (int): The most writes per transaction.
+        flush_interval (float): The longest a write waits for its batch to
+            fill up, in seconds.
+        max_pending (int): The most queued writes; ``put()`` waits while the
+            queue is full.
+    """
+
+    def __init__(self, write_batch, batch_size=100, flush_interval=0.05, max_pending=10000):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue(max_pending)
+        self.flushed = 0
+        self.failed = 0
+        self._worker = None
+
+    def start(self):
+        """
+        Starts the background task; call it from the running event loop.
+        """
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Flushes the queued writes, without waiting for the batch being
+        collected to fill up, and stops the background task.
+        """
+        await self.queue.put(_STOP)
+        await self.queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+
+    async def put(self, write):
+        """
+        Queues a write.
+
+        Args:
+            write: An item ``write_batch`` understands.
+        """
+        await self.queue.put(write)
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            writes = [write for write in batch if write is not _STOP]
+            try:
+                if writes:
+                    await self._flush(writes)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _flush(self, batch):
+        try:
+            await self.write_batch(batch)
+            self.flushed += len(batch)
+            return
+        except Exception:
+            if len(batch) == 1:
+                logging.exception(f"Dropped queued write: {batch[0]!r}")
+                self.failed += 1
+                return
+            logging.exception(f"Batch of {len(batch)} queued writes failed, retrying them one by one")
+        for write in batch:
+            await self._flush([write])
@@ -0,0 +1,104 @@
+"""
+Measures requests/sec of the FastAPI library app at several concurrency levels.
+
+The app is started with uvicorn from ``--app-dir`` so two checkouts can be
+compared on the same machine, e.g. the revision before the async data layer
+and the current one:
+
+    git worktree add /tmp/library-before <revision-before>
+    python test/bench_async_db.py --app-dir /tmp/library-before/library_app_fastapi
+    python test/bench_async_db.py --app-dir library_app_fastapi
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def start_server(app_dir, port):
+    """
+    Starts uvicorn serving ``main:app`` from the given directory.
+
+    Args:
+        app_dir (str): The directory containing the FastAPI ``main.py``.
+        port (int): The port to listen on.
+
+    Returns:
+        subprocess.Popen: The running server process.
+    """
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir,
+    )
+    url = f"http://127.0.0.1:{port}/"
+    for _ in range(100):
+        try:
+            httpx.get(url)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f"Server in {app_dir} did not start")
+
+
+async def run_clients(url, concurrency, duration):
+    """
+    Sends GET requests from ``concurrency`` clients for ``duration`` seconds.
+
+    Args:
+        url (str): The URL to request.
+        concurrency (int): The number of concurrent clients.
+        duration (float): How long to keep sending requests, in seconds.
+
+    Returns:
+        tuple: Completed requests per second and the number of failed requests.
+    """
+    completed = 0
+    failed = 0
+    deadline = time.perf_counter() + duration
+
+    async def client_loop():
+        nonlocal completed, failed
+        # One keep-alive connection per client; a single shared httpx pool
+        # becomes the bottleneck long before the server does.
+        async with httpx.AsyncClient(timeout=10) as client:
+            while time.perf_counter() < deadline:
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                    completed += 1
+                except httpx.HTTPError:
+                    failed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return completed / elapsed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app-dir", default=os.path.join(os.path.dirname(__file__), "..", "library_app_fastapi"))
+    parser.add_argument("--path", default="/", help="Path to request, e.g. / or /book/1")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 128])
+    args = parser.parse_args()
+
+    server = start_server(os.path.abspath(args.app_dir), args.port)
+    try:
+        url = f"http://127.0.0.1:{args.port}{args.path}"
+        for concurrency in args.concurrency:
+            rps, failed = asyncio.run(run_clients(url, concurrency, args.duration))
+            print(f"{concurrency:>4} clients: {rps:8.1f} requests/sec, {failed} failed")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Measures bytes on the wire and CPU time of response compression per page size.
+
+The book list of the FastAPI app is rendered with ``--rows`` books, as it
+is and with the templates minified, then compressed with every setting of
+``SETTINGS`` the way ``CompressionMiddleware`` does. Brotli rows need the
+``brotli`` package.
+
+    python test/bench_compression.py --rows 50 500 5000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import timeit
+from datetime import date
+from types import SimpleNamespace
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "library_app_fastapi")
+sys.path.insert(0, APP_DIR)
+from compression import Compressor, brotli  # noqa: E402
+from rendering import create_templates  # noqa: E402
+
+TEMPLATE_DIR = os.path.join(APP_DIR, "templates")
+
+# Content coding and level of each measured setting
+SETTINGS = {
+    "gzip 1": ("gzip", {"gzip_level": 1}),
+    "gzip 6": ("gzip", {"gzip_level": 6}),
+    "gzip 9": ("gzip", {"gzip_level": 9}),
+    "brotli 4": ("br", {"brotli_quality": 4}),
+    "brotli 11": ("br", {"brotli_quality": 11}),
+}
+
+
+def render_book_list(templates, rows):
+    """
+    Renders the book list page with sample books.
+
+    Args:
+        templates (Jinja2Templates): The templates to render with.
+        rows (int): The number of books on the page.
+
+    Returns:
+        bytes: The page as UTF-8.
+    """
+    books = [
+        SimpleNamespace(
+            id=book_id, title=f"Book {book_id}", author_id=book_id % 100, author=f"Author {book_id % 100}",
+            description="A novel of manners. " * 5, published_date=date(1813, 1, 28),
+        )
+        for book_id in range(1, rows + 1)
+    ]
+    filters = SimpleNamespace(
+        title=None, author=None, year_from=None, year_to=None, sort="", query_string=lambda: ""
+    )
+    return templates.get_template("book_list.html").render(books=books, filters=filters).encode()
+
+
+def time_compression(body, coding, options, number):
+    """
+    Compresses a page ``number`` times.
+
+    Args:
+        body (bytes): The page.
+        coding (str): "br" or "gzip".
+        options (dict): Levels for ``Compressor``.
+        number (int): How many times to compress it.
+
+    Returns:
+        tuple: The compressed size in bytes and the CPU time of one
+        compression in milliseconds.
+    """
+    size = len(Compressor(coding, **options).compress(body, last=True))
+    seconds = min(timeit.repeat(
+        lambda: Compressor(coding, **options).compress(body, last=True), number=number, repeat=3,
+        timer=time.process_time,
+    ))
+    return size, seconds / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--number", type=int, default=20, help="Compressions per setting")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        variants = {
+            "as is": create_templates(TEMPLATE_DIR, cache_dir)[0],
+            "minified": create_templates(TEMPLATE_DIR, cache_dir, minify=True)[0],
+        }
+        print(f"{'rows':>6} {'template':<10} {'setting':<10} {'bytes':>10} {'ratio':>7} {'CPU/page':>10}")
+        for rows in args.rows:
+            for variant, templates in variants.items():
+                body = render_book_list(templates, rows)
+                print(f"{rows:>6} {variant:<10} {'none':<10} {len(body):>10} {1:>7.2f} {0:>7.2f} ms")
+                for name, (coding, options) in SETTINGS.items():
+                    if coding == "br" and brotli is None:
+                        continue
+                    size, milliseconds = time_compression(body, coding, options, args.number)
+                    print(
+                        f"{rows:>6} {variant:<10} {name:<10} {size:>10} {size / len(body):>7.2f} "
+                        f"{milliseconds:>7.2f} ms"
+                    )
+    if brotli is None:
+        print("The brotli package is not installed, brotli was not measured.")
+
+
+if __name__ == "__main__":
+    main()
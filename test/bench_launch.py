@@ -0,0 +1,162 @@
+"""
+Measures requests/sec of each app under its development and its production
+server on the same hardware.
+
+Every app is copied with its database to a temporary directory and started
+once with the development server of the README and once with its
+``gunicorn.conf.py``, then ``--concurrency`` clients request the book list
+for ``--duration`` seconds.
+
+    python test/bench_launch.py --concurrency 1 16 64 --duration 5
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Directory, port, page to request, the command of each server and one
+# preparing the database copy
+APPS = {
+    "flask": {
+        "directory": "book_manager_flask",
+        "port": 5000,  # app.run() has no port option
+        "path": "/",
+        "dev": [sys.executable, "app.py"],
+    },
+    "django": {
+        "directory": os.path.join("book_project_django", "library_project"),
+        "port": 8020,
+        "path": "/library/",
+        "dev": [sys.executable, "manage.py", "runserver", "8020"],
+        "setup": [sys.executable, "manage.py", "migrate", "--noinput"],
+    },
+    "fastapi": {
+        "directory": "library_app_fastapi",
+        "port": 8021,
+        "path": "/",
+        "dev": [sys.executable, "-m", "uvicorn", "main:app", "--reload", "--port", "8021"],
+    },
+}
+
+
+def start_server(command, app_dir, url):
+    """
+    Starts a server in its own process group and waits until it answers.
+
+    Args:
+        command (list[str]): The command starting the server.
+        app_dir (str): The directory to run it in.
+        url (str): A URL the server answers once it is up.
+
+    Returns:
+        subprocess.Popen: The running server process.
+    """
+    server = subprocess.Popen(
+        command, cwd=app_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+    for _ in range(300):
+        try:
+            httpx.get(url).raise_for_status()
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    stop_server(server)
+    raise RuntimeError(f"{command} in {app_dir} did not start")
+
+
+def stop_server(server):
+    """
+    Stops a server with every process it started, such as reloaders and workers.
+
+    Args:
+        server (subprocess.Popen): The server process.
+    """
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+
+
+async def run_clients(url, concurrency, duration):
+    """
+    Requests ``url`` from ``concurrency`` clients for ``duration`` seconds.
+
+    Args:
+        url (str): The URL to request.
+        concurrency (int): The number of concurrent clients.
+        duration (float): How long to keep requesting, in seconds.
+
+    Returns:
+        tuple: The number of successful and of failed requests.
+    """
+    completed = 0
+    failed = 0
+    deadline = time.perf_counter() + duration
+
+    async def client_loop():
+        nonlocal completed, failed
+        async with httpx.AsyncClient(timeout=30) as client:
+            while time.perf_counter() < deadline:
+                try:
+                    (await client.get(url)).raise_for_status()
+                    completed += 1
+                except httpx.HTTPError:
+                    failed += 1
+
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return completed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--apps", nargs="+", choices=list(APPS), default=list(APPS))
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--workers", type=int, help="WEB_CONCURRENCY of the production servers")
+    args = parser.parse_args()
+
+    for name in args.apps:
+        settings = APPS[name]
+        url = f"http://127.0.0.1:{settings['port']}{settings['path']}"
+        commands = {
+            "dev": settings["dev"],
+            "production": [
+                sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{settings['port']}"
+            ],
+        }
+        if args.workers:
+            commands["production"] += ["-w", str(args.workers)]
+        with tempfile.TemporaryDirectory() as directory:
+            app_dir = os.path.join(directory, "app")
+            shutil.copytree(
+                os.path.join(ROOT, settings["directory"]), app_dir,
+                ignore=shutil.ignore_patterns("__pycache__", ".jinja_cache", "jinja_cache", "static_build"),
+            )
+            if "setup" in settings:
+                subprocess.run(settings["setup"], cwd=app_dir, stdout=subprocess.DEVNULL, check=True)
+            for mode, command in commands.items():
+                server = start_server(command, app_dir, url)
+                try:
+                    for concurrency in args.concurrency:
+                        completed, failed = asyncio.run(run_clients(url, concurrency, args.duration))
+                        print(
+                            f"{name:<8} {mode:<11} {concurrency:>4} clients: "
+                            f"{completed / args.duration:8.1f} req/sec, {failed} failed"
+                        )
+                finally:
+                    stop_server(server)
+
+
+if __name__ == "__main__":
+    main()
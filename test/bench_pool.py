@@ -0,0 +1,157 @@
+"""
+Measures connection checkout cost and concurrent throughput per pool setting.
+
+For every setting of ``POOL_SETTINGS`` the benchmark times a single
+checkout and return of a connection, then runs threads that each check out
+a connection and look up a random row, reporting queries/sec and the p99
+time spent waiting for a connection. SQLite runs in a temporary file with
+the "production" profile; pass ``--url`` to measure another SQLite
+database, e.g. one on the disk the app is deployed to, where a table
+``bench_pool_rows`` is created and dropped again.
+
+    python test/bench_pool.py --threads 1 8 32 --duration 3
+    python test/bench_pool.py --url sqlite:////srv/library/bench.db
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "library_app_fastapi"))
+from database import engine_options  # noqa: E402
+from sqlite_profile import install_sqlite_profile  # noqa: E402
+
+POOL_SETTINGS = {
+    "queue": {"pool": "queue"},
+    "queue, pre-ping": {"pool": "queue", "pool_pre_ping": True},
+    "queue, size 2": {"pool": "queue", "pool_size": 2, "max_overflow": 0},
+    "null": {"pool": "null"},
+    "static": {"pool": "static"},
+}
+
+
+def make_engine(url, settings):
+    engine = create_engine(url, **engine_options(url, **settings))
+    install_sqlite_profile(engine, "production")
+    return engine
+
+
+def create_rows(url, rows):
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE bench_pool_rows (id INTEGER PRIMARY KEY, title VARCHAR(100))"))
+        conn.execute(
+            text("INSERT INTO bench_pool_rows (id, title) VALUES (:id, :title)"),
+            [{"id": i, "title": f"Book {i}"} for i in range(1, rows + 1)],
+        )
+    engine.dispose()
+
+
+def drop_rows(url):
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE bench_pool_rows"))
+    engine.dispose()
+
+
+def time_checkout(engine, number):
+    """
+    Times checking a connection out of the pool and returning it.
+
+    Args:
+        engine (Engine): The engine to measure.
+        number (int): How many checkouts to time.
+
+    Returns:
+        float: The mean time of one checkout in microseconds.
+    """
+    engine.connect().close()
+    start = time.perf_counter()
+    for _ in range(number):
+        engine.connect().close()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def run_threads(engine, rows, threads, duration):
+    """
+    Runs ``threads`` threads looking up random rows, one checkout per query.
+
+    Args:
+        engine (Engine): The engine to measure.
+        rows (int): The number of rows in the table.
+        threads (int): The number of concurrent threads.
+        duration (float): How long to run, in seconds.
+
+    Returns:
+        tuple: Queries per second, the p99 checkout wait in milliseconds
+        and the number of failed queries.
+    """
+    stop = threading.Event()
+    waits = []
+    failed = 0
+
+    def worker():
+        nonlocal failed
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    local.append(time.perf_counter() - start)
+                    conn.execute(
+                        text("SELECT title FROM bench_pool_rows WHERE id = :id"), {"id": random.randint(1, rows)}
+                    ).one()
+            except Exception:
+                failed += 1
+        waits.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    p99 = statistics.quantiles(waits, n=100)[98] * 1000 if len(waits) > 1 else 0.0
+    return len(waits) / elapsed, p99, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="SQLite database URL; a temporary file by default")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--number", type=int, default=2000, help="Checkouts to time per setting")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        create_rows(url, args.rows)
+        try:
+            print(f"{'pool':<16} {'checkout':>12}" + "".join(f" {f'{n} threads':>28}" for n in args.threads))
+            for name, settings in POOL_SETTINGS.items():
+                engine = make_engine(url, settings)
+                row = f"{name:<16} {time_checkout(engine, args.number):9.1f} us"
+                for threads in args.threads:
+                    qps, p99, failed = run_threads(engine, args.rows, threads, args.duration)
+                    row += f" {qps:8.0f} q/s, p99 wait {p99:6.2f} ms"
+                    if failed:
+                        row += f" ({failed} failed)"
+                engine.dispose()
+                print(row)
+        finally:
+            if args.url:
+                drop_rows(url)
+
+
+if __name__ == "__main__":
+    main()
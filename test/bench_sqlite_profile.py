@@ -0,0 +1,122 @@
+"""
+Compares read latency under concurrent writes for each SQLite profile.
+
+A writer thread commits small transactions in a loop while reader threads
+look up random books. With the rollback journal every commit locks readers
+out; with the "production" profile (WAL) reads should not stall.
+
+    python test/bench_sqlite_profile.py --duration 5 --readers 4
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "library_app_fastapi"))
+from sqlite_profile import SQLITE_PROFILES, install_sqlite_profile  # noqa: E402
+
+
+def make_engine(path, profile):
+    """
+    Creates an engine for a fresh database file with the given profile.
+
+    Args:
+        path (str): The path of the SQLite database file.
+        profile (str): The name of a profile in ``SQLITE_PROFILES``.
+
+    Returns:
+        Engine: The configured engine.
+    """
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    install_sqlite_profile(engine, profile)
+    return engine
+
+
+def run(profile, rows, readers, duration):
+    """
+    Runs the mixed read/write load against one profile.
+
+    Args:
+        profile (str): The name of a profile in ``SQLITE_PROFILES``.
+        rows (int): The number of books to seed.
+        readers (int): The number of reader threads.
+        duration (float): How long to run the load, in seconds.
+
+    Returns:
+        dict: Read latency percentiles in milliseconds and operation counts.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        engine = make_engine(os.path.join(directory, "bench.db"), profile)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, author TEXT)"))
+            conn.execute(
+                text("INSERT INTO books (title, author) VALUES (:title, :author)"),
+                [{"title": f"Book {i}", "author": f"Author {i % 100}"} for i in range(rows)],
+            )
+
+        stop = threading.Event()
+        latencies = []
+        writes = 0
+
+        def writer():
+            nonlocal writes
+            while not stop.is_set():
+                with engine.begin() as conn:
+                    conn.execute(
+                        text("INSERT INTO books (title, author) VALUES (:title, :author)"),
+                        [{"title": "New book", "author": "Writer"}] * 20,
+                    )
+                writes += 1
+
+        def reader():
+            local = []
+            while not stop.is_set():
+                start = time.perf_counter()
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT * FROM books WHERE id = :id"), {"id": random.randint(1, rows)}).all()
+                local.append(time.perf_counter() - start)
+            latencies.extend(local)
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "reads": len(latencies),
+        "writes": writes,
+        "p50_ms": quantiles[49] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for profile in SQLITE_PROFILES:
+        result = run(profile, args.rows, args.readers, args.duration)
+        print(
+            f"{profile:>10}: {result['reads']} reads, {result['writes']} write txns, "
+            f"read p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, max {result['max_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
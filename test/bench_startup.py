@@ -0,0 +1,190 @@
+"""
+Measures the cold start of each app: what importing it costs and how long a
+new server process takes to answer its first request.
+
+Every app is copied with its database to a temporary directory and its
+schema step (``python -m migrate``, ``flask migrate``, ``manage.py
+migrate``) is timed. Then, ``--repeat`` times each:
+
+- the app module is imported in a new interpreter, the median is reported
+  with the heaviest direct imports of the module by ``python -X importtime``;
+- a single-process server is started and the book list requested until it
+  answers, with the schema check at startup (MIGRATE_ON_STARTUP=1) and
+  without it, as workers of an already migrated deploy start.
+
+    python test/bench_startup.py --repeat 5 --top 8
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Directory, schema step, module to import, server command, port and page of each app
+APPS = {
+    "flask": {
+        "directory": "book_manager_flask",
+        "schema": [sys.executable, "-m", "flask", "--app", "app", "migrate"],
+        "module": "app",
+        "server": [sys.executable, "-m", "flask", "--app", "app", "run", "--port", "5030"],
+        "url": "http://127.0.0.1:5030/",
+    },
+    "django": {
+        "directory": os.path.join("book_project_django", "library_project"),
+        "schema": [sys.executable, "manage.py", "migrate", "--noinput"],
+        "module": "library_project.wsgi",
+        "server": [sys.executable, "manage.py", "runserver", "8030", "--noreload"],
+        "url": "http://127.0.0.1:8030/library/",
+    },
+    "fastapi": {
+        "directory": "library_app_fastapi",
+        "schema": [sys.executable, "-m", "migrate"],
+        "module": "main",
+        "server": [sys.executable, "-m", "uvicorn", "main:app", "--port", "8031", "--log-level", "warning"],
+        "url": "http://127.0.0.1:8031/",
+    },
+}
+
+# Schema check at startup or not; Django always migrates separately
+STARTUP_MODES = {
+    "schema check": {"MIGRATE_ON_STARTUP": "1"},
+    "migrated": {"MIGRATE_ON_STARTUP": "0"},
+}
+
+
+def run_timed(command, app_dir, env=None):
+    """
+    Runs a command to completion.
+
+    Args:
+        command (list[str]): The command.
+        app_dir (str): The directory to run it in.
+        env (dict | None): Extra environment variables.
+
+    Returns:
+        tuple: The wall time in seconds and the captured stderr.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        command, cwd=app_dir, env={**os.environ, **(env or {})}, stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE, text=True, check=True,
+    )
+    return time.perf_counter() - start, result.stderr
+
+
+def top_imports(importtime_output, module, top):
+    """
+    Picks the heaviest imports of a module from the output of
+    ``python -X importtime``.
+
+    Args:
+        importtime_output (str): What the interpreter wrote to stderr.
+        module (str): The imported module.
+        top (int): How many imports to return.
+
+    Returns:
+        tuple: The time importing ``module`` took in milliseconds, with
+        everything it imported, and its ``top`` heaviest direct imports as
+        (name, milliseconds) pairs.
+    """
+    total = 0
+    imports = []
+    # A module is listed after the modules it imported, which are indented
+    # one level deeper
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.removeprefix("import time:").split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            imports.append((name.strip(), int(cumulative_us) / 1000))
+        elif depth == 0:
+            if name.strip() == module:
+                total = int(cumulative_us) / 1000
+                break
+            imports = []
+    imports.sort(key=lambda item: item[1], reverse=True)
+    return total, imports[:top]
+
+
+def time_to_first_request(command, app_dir, url, env):
+    """
+    Starts a server and requests ``url`` until it answers.
+
+    Args:
+        command (list[str]): The command starting the server.
+        app_dir (str): The directory to run it in.
+        url (str): The page to request.
+        env (dict): Extra environment variables.
+
+    Returns:
+        float: Seconds from starting the process to the first successful response.
+    """
+    # One client for all attempts, creating one takes CPU time from the server
+    with httpx.Client() as client:
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            command, cwd=app_dir, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            while time.perf_counter() - start < 60:
+                try:
+                    client.get(url).raise_for_status()
+                    return time.perf_counter() - start
+                except httpx.HTTPError:
+                    time.sleep(0.01)
+            raise RuntimeError(f"{command} in {app_dir} did not answer")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--apps", nargs="+", choices=list(APPS), default=list(APPS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Top-level imports listed")
+    args = parser.parse_args()
+
+    for name in args.apps:
+        settings = APPS[name]
+        with tempfile.TemporaryDirectory() as directory:
+            app_dir = os.path.join(directory, "app")
+            shutil.copytree(
+                os.path.join(ROOT, settings["directory"]), app_dir,
+                ignore=shutil.ignore_patterns("__pycache__", ".jinja_cache", "jinja_cache", "static_build"),
+            )
+            seconds, _ = run_timed(settings["schema"], app_dir)
+            print(f"{name}: schema step {seconds * 1000:.0f} ms (first run, compiles the bytecode)")
+
+            # The database was migrated above, the import alone is measured
+            env = {"MIGRATE_ON_STARTUP": "0"}
+            import_command = [sys.executable, "-c", f"import {settings['module']}"]
+            seconds = statistics.median(run_timed(import_command, app_dir, env)[0] for _ in range(args.repeat))
+            _, output = run_timed([sys.executable, "-X", "importtime", *import_command[1:]], app_dir, env)
+            total, imports = top_imports(output, settings["module"], args.top)
+            print(
+                f"  import {settings['module']}: {seconds * 1000:.0f} ms with the interpreter, "
+                f"{total:.0f} ms for the module"
+            )
+            for module, milliseconds in imports:
+                print(f"    {module:<30} {milliseconds:8.1f} ms")
+
+            modes = STARTUP_MODES if name != "django" else {"migrated": {}}
+            for mode, env in modes.items():
+                seconds = statistics.median(
+                    time_to_first_request(settings["server"], app_dir, settings["url"], env)
+                    for _ in range(args.repeat)
+                )
+                print(f"  first request, {mode}: {seconds * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
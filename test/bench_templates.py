@@ -0,0 +1,101 @@
+"""
+Measures template compile and render times of the FastAPI app.
+
+Reports how long loading every template takes with an empty and with a
+filled bytecode cache (a cold start), then the render time per template,
+and for the static ones the time when served from the fragment cache.
+
+    python test/bench_templates.py --number 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import timeit
+from datetime import date
+from types import SimpleNamespace
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "library_app_fastapi")
+sys.path.insert(0, APP_DIR)
+from rendering import create_templates, precompile_templates  # noqa: E402
+
+TEMPLATE_DIR = os.path.join(APP_DIR, "templates")
+
+
+def sample_book(book_id):
+    return SimpleNamespace(
+        id=book_id, title=f"Book {book_id}", author_id=1, author="Jane Austen",
+        description="A novel of manners. " * 5, published_date=date(1813, 1, 28),
+    )
+
+
+# Template variables per template
+SAMPLES = {
+    "book_list.html": {
+        "books": [sample_book(i) for i in range(1, 51)],
+        "filters": SimpleNamespace(
+            title=None, author=None, year_from=None, year_to=None, sort="", query_string=lambda: ""
+        ),
+    },
+    "book_detail.html": {"book": sample_book(1)},
+    "author_detail.html": {
+        "author": SimpleNamespace(name="Jane Austen"), "books": [sample_book(i) for i in range(1, 21)]
+    },
+    "book_form.html": {"book": None},
+    "book_confirm_delete.html": {"book": sample_book(1)},
+    "book_import.html": {"report": None},
+    "search.html": {"q": "austen", "books": [sample_book(i) for i in range(1, 21)], "page": 1, "has_next": True},
+    "partials/library_header.html": {},
+}
+STATIC = {"book_form.html", "book_import.html", "partials/library_header.html"}
+
+
+def time_cold_start(cache_dir, repeat):
+    """
+    Times loading every template into a new environment.
+
+    Args:
+        cache_dir (str | None): The bytecode cache directory, or None.
+        repeat (int): How many fresh environments to time.
+
+    Returns:
+        float: The best time in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        templates, _ = create_templates(TEMPLATE_DIR, cache_dir)
+        start = time.perf_counter()
+        precompile_templates(templates.env)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="Renders per template")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        print(f"cold start, no bytecode cache: {time_cold_start(None, args.repeat):8.2f} ms")
+        time_cold_start(cache_dir, 1)
+        print(f"cold start, bytecode cache:    {time_cold_start(cache_dir, args.repeat):8.2f} ms")
+
+        templates, fragments = create_templates(TEMPLATE_DIR, cache_dir)
+        precompile_templates(templates.env)
+        print(f"\n{'template':<30} {'render':>12} {'fragment':>12}")
+        for name, context in SAMPLES.items():
+            template = templates.env.get_template(name)
+            render = min(timeit.repeat(lambda: template.render(**context), number=args.number, repeat=args.repeat))
+            row = f"{name:<30} {render / args.number * 1e6:9.1f} us"
+            if name in STATIC:
+                cached = min(timeit.repeat(
+                    lambda: fragments.render(name, **context), number=args.number, repeat=args.repeat
+                ))
+                row += f" {cached / args.number * 1e6:9.1f} us"
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
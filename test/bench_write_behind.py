@@ -0,0 +1,130 @@
+"""
+Measures book creations/sec of the FastAPI app with and without write-behind.
+
+For each mode the app is started with uvicorn on a fresh temporary
+database and ``--concurrency`` clients post the book form for
+``--duration`` seconds. Then the server is stopped gracefully, which
+flushes the write-behind queue, and the books in the database are counted:
+"acknowledged" is what the clients were told, "committed" what the
+database holds, including the time the final flush took.
+
+    python test/bench_write_behind.py --concurrency 1 16 64 --duration 5
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+MODES = {
+    "direct": {},
+    "write-behind": {"WRITE_BEHIND": "1"},
+}
+
+
+def start_server(app_dir, port, env):
+    """
+    Starts uvicorn serving ``main:app`` with extra environment variables.
+
+    Args:
+        app_dir (str): The directory containing the FastAPI ``main.py``.
+        port (int): The port to listen on.
+        env (dict): Environment variables of the server.
+
+    Returns:
+        subprocess.Popen: The running server process.
+    """
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir, env={**os.environ, **env},
+    )
+    url = f"http://127.0.0.1:{port}/book/import"
+    for _ in range(100):
+        try:
+            httpx.get(url)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f"Server in {app_dir} did not start")
+
+
+async def run_clients(url, concurrency, duration):
+    """
+    Posts new books from ``concurrency`` clients for ``duration`` seconds.
+
+    Args:
+        url (str): The URL of the book form.
+        concurrency (int): The number of concurrent clients.
+        duration (float): How long to keep posting, in seconds.
+
+    Returns:
+        tuple: Acknowledged creations and the number of failed requests.
+    """
+    completed = 0
+    failed = 0
+    numbers = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    async def client_loop():
+        nonlocal completed, failed
+        async with httpx.AsyncClient(timeout=30) as client:
+            while time.perf_counter() < deadline:
+                number = next(numbers)
+                form = {
+                    "title": f"Book {number}", "author": f"Author {number % 100}",
+                    "description": "", "published_date": "2000-01-01",
+                }
+                try:
+                    response = await client.post(url, data=form)
+                    if response.status_code != 303:
+                        response.raise_for_status()
+                    completed += 1
+                except httpx.HTTPError:
+                    failed += 1
+
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return completed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app-dir", default=os.path.join(os.path.dirname(__file__), "..", "library_app_fastapi"))
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    args = parser.parse_args()
+
+    app_dir = os.path.abspath(args.app_dir)
+    for concurrency in args.concurrency:
+        for mode, env in MODES.items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "bench.db")
+                server = start_server(app_dir, args.port, {**env, "DATABASE_URL": f"sqlite:///{path}"})
+                start = time.perf_counter()
+                try:
+                    acknowledged, failed = asyncio.run(
+                        run_clients(f"http://127.0.0.1:{args.port}/book/new", concurrency, args.duration)
+                    )
+                    elapsed = time.perf_counter() - start
+                finally:
+                    server.send_signal(signal.SIGINT)
+                    server.wait()
+                committed_elapsed = time.perf_counter() - start
+                with sqlite3.connect(path) as connection:
+                    committed = connection.execute("SELECT count(*) FROM books").fetchone()[0]
+            print(
+                f"{concurrency:>4} clients, {mode:<12}: {acknowledged / elapsed:8.1f} acknowledged/sec, "
+                f"{committed / committed_elapsed:8.1f} committed/sec, {failed} failed"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,88 @@
+from django.db import connection, transaction
 from django.http import JsonResponse
 import time
 from django.views.decorators.csrf import csrf_exempt
 from .models import Record  # Importing the Record model
 
 
+WRITE_MODES = ('orm', 'bulk', 'core')
+
+
+def row_batches(rows, batch):
+    """
+    Splits record numbers into the batches committed by ``write``.
+
+    Args:
+        rows (int): The total number of records.
+        batch (int): Records per transaction, 0 for a single transaction.
+
+    Returns:
+        list[range]: The record numbers of each transaction.
+    """
+    size = batch or rows
+    return [range(start, min(start + size, rows)) for start in range(0, rows, size)]
+
+
 @csrf_exempt
 def write(request):
     """
-    Adds 10,000 records to the database and measures the time taken.
+    Inserts records into the database and measures the time taken.
+
+    Query parameters (identical in the Flask, FastAPI and Django test apps):
+        rows (int): The number of records to insert (default 10,000).
+        mode (str): 'orm' saves one model instance at a time, 'bulk' uses
+            bulk_create, 'core' a single cursor.executemany per batch.
+        batch (int): Records per transaction; 0 (default) commits once.
 
     Args:
         request (HttpRequest): The HTTP request object.
 
     Returns:
-        JsonResponse: A JSON response containing the time taken to write the records.
+        JsonResponse: The parameters and the time taken to write the records.
     """
-    start_time = time.time()  # Start timing the operation
+    try:
+        rows = int(request.GET.get('rows', 10000))
+        batch = int(request.GET.get('batch', 0))
+    except ValueError:
+        rows = batch = -1
+    mode = request.GET.get('mode', 'orm')
+    if mode not in WRITE_MODES or not 1 <= rows <= 1_000_000 or batch < 0:
+        return JsonResponse({"error": "Invalid rows, mode or batch"}, status=400)
 
-    # Add 10,000 records to the database
-    records = [Record(name=f"Record {i + 1}") for i in range(10000)]
-    Record.objects.bulk_create(records)  # Use bulk_create for better performance
+    start_time = time.perf_counter()  # Start timing the operation
 
-    end_time = time.time()  # End timing the operation
+    for numbers in row_batches(rows, batch):
+        with transaction.atomic():
+            if mode == 'orm':
+                for i in numbers:
+                    Record(name=f"Record {i + 1}").save()
+            elif mode == 'bulk':
+                Record.objects.bulk_create([Record(name=f"Record {i + 1}") for i in numbers])
+            else:
+                with connection.cursor() as cursor:
+                    cursor.executemany(
+                        f"INSERT INTO {Record._meta.db_table} (name) VALUES (%s)",
+                        [(f"Record {i + 1}",) for i in numbers],
+                    )
+
+    seconds = time.perf_counter() - start_time  # End timing the operation
 
     # Return the time taken as a JSON response
-    return JsonResponse({"message": f"Django write of 10,000 records took {end_time - start_time:.2f} seconds"})
+    return JsonResponse({
+        "framework": "django", "rows": rows, "mode": mode, "batch": batch, "seconds": seconds,
+        "message": f"Django write of {rows} records took {seconds:.2f} seconds",
+    })
+
+
+def read(request):
+    """
+    Returns the 100 most recent records.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: The records as JSON objects with id and name.
+    """
+    records = Record.objects.order_by('-id')[:100]
+    return JsonResponse([{"id": record.id, "name": record.name} for record in records], safe=False)
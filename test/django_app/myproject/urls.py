@@ -6,4 +6,5 @@ from myapp import views
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('write/', views.write),
+    path('read/', views.read),
 ]
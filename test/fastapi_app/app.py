@@ -1,10 +1,22 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query
 import time
-from sqlalchemy import create_engine, Column, Integer, String
+from sqlalchemy import create_engine, insert, Column, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Creates the table when the server starts rather than when the module is
+    imported, so importing the app never touches the database.
+    """
+    Base.metadata.create_all(bind=engine)
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Database configuration
 SQLALCHEMY_DATABASE_URL = "sqlite:///./records.db"
@@ -23,38 +35,84 @@ class Record(Base):
         name (str): The name of the record.
     """
     __tablename__ = "records"
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+
+
+def row_batches(rows, batch):
+    """
+    Splits record numbers into the batches committed by ``write``.
+
+    Args:
+        rows (int): The total number of records.
+        batch (int): Records per transaction, 0 for a single transaction.
+
+    Returns:
+        list[range]: The record numbers of each transaction.
+    """
+    size = batch or rows
+    return [range(start, min(start + size, rows)) for start in range(0, rows, size)]
 
-# Create the table
-Base.metadata.create_all(bind=engine)
 
 @app.post("/write")
-def write():
+def write(
+    rows: int = Query(10000, ge=1, le=1_000_000),
+    mode: str = Query("orm", pattern="^(orm|bulk|core)$"),
+    batch: int = Query(0, ge=0),
+):
     """
-    Inserts 10,000 records into the database.
+    Inserts records into the database and measures the time taken.
 
-    Measures the time taken to add the records to the SQLite database and returns it.
+    Query parameters (identical in the Flask, FastAPI and Django test apps):
+        rows (int): The number of records to insert (default 10,000).
+        mode (str): "orm" adds and flushes one model instance at a time, one
+            INSERT per row like Django's save(), "bulk" uses the ORM bulk
+            insert, "core" a single executemany per batch.
+        batch (int): Records per transaction; 0 (default) commits once.
 
     Returns:
-        dict: A message containing the time taken to write records.
+        dict: The parameters and the time taken to write the records.
     """
-    start_time = time.time()  # Start timing the operation
+    start_time = time.perf_counter()  # Start timing the operation
 
     # Get a session for interacting with the database
     db = SessionLocal()
 
     try:
-        # Add 10,000 records to the database
-        for i in range(10000):
-            record = Record(name=f"Record {i + 1}")
-            db.add(record)
-
-        db.commit()  # Commit the transaction
+        for numbers in row_batches(rows, batch):
+            if mode == "orm":
+                for i in numbers:
+                    db.add(Record(name=f"Record {i + 1}"))
+                    # Without it the session batches the rows into multi-row INSERTs
+                    db.flush()
+            elif mode == "bulk":
+                db.bulk_insert_mappings(Record, [{"name": f"Record {i + 1}"} for i in numbers])
+            else:
+                db.execute(insert(Record), [{"name": f"Record {i + 1}"} for i in numbers])
+            db.commit()  # Commit the transaction
     finally:
         db.close()  # Ensure the session is closed
 
-    end_time = time.time()  # End timing the operation
+    seconds = time.perf_counter() - start_time  # End timing the operation
 
     # Return the time taken for the operation
-    return {"message": f"FastAPI write of 10,000 records took {end_time - start_time:.2f} seconds"}
+    return {
+        "framework": "fastapi", "rows": rows, "mode": mode, "batch": batch, "seconds": seconds,
+        "message": f"FastAPI write of {rows} records took {seconds:.2f} seconds",
+    }
+
+
+@app.get("/read")
+def read():
+    """
+    Returns the 100 most recent records.
+
+    Returns:
+        list: The records as JSON objects with id and name.
+    """
+    db = SessionLocal()
+    try:
+        records = db.query(Record).order_by(Record.id.desc()).limit(100).all()
+        return [{"id": record.id, "name": record.name} for record in records]
+    finally:
+        db.close()
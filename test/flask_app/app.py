@@ -1,4 +1,4 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_sqlalchemy import SQLAlchemy
 import time
 
@@ -21,7 +21,7 @@ class Record(db.Model):
         name (str): The name of the record.
     """
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(10000), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
 
     def __repr__(self):
         return f"<Record {self.name}>"
@@ -30,29 +30,80 @@ class Record(db.Model):
 with app.app_context():
     db.create_all()
 
+WRITE_MODES = ('orm', 'bulk', 'core')
+
+
+def row_batches(rows, batch):
+    """
+    Splits record numbers into the batches committed by ``write``.
+
+    Args:
+        rows (int): The total number of records.
+        batch (int): Records per transaction, 0 for a single transaction.
+
+    Returns:
+        list[range]: The record numbers of each transaction.
+    """
+    size = batch or rows
+    return [range(start, min(start + size, rows)) for start in range(0, rows, size)]
+
+
 @app.route('/write', methods=['POST'])
 def write():
     """
-    Inserts 100 records into the database.
+    Inserts records into the database and measures the time taken.
 
-    Measures the time taken to insert the records and returns it as a JSON response.
+    Query parameters (identical in the Flask, FastAPI and Django test apps):
+        rows (int): The number of records to insert (default 10,000).
+        mode (str): 'orm' adds and flushes one model instance at a time, one
+            INSERT per row like Django's save(), 'bulk' uses the ORM bulk
+            insert, 'core' a single executemany per batch.
+        batch (int): Records per transaction; 0 (default) commits once.
 
     Returns:
-        dict: A message containing the time taken to write records.
+        dict: The parameters and the time taken to write the records.
     """
-    start_time = time.time()  # Start timing the operation
+    try:
+        rows = int(request.args.get('rows', 10000))
+        batch = int(request.args.get('batch', 0))
+    except ValueError:
+        rows = batch = -1
+    mode = request.args.get('mode', 'orm')
+    if mode not in WRITE_MODES or not 1 <= rows <= 1_000_000 or batch < 0:
+        return jsonify({"error": "Invalid rows, mode or batch"}), 400
 
-    # Add 100 records to the database
-    for i in range(100):
-        record = Record(name=f"Record {i + 1}")
-        db.session.add(record)
+    start_time = time.perf_counter()  # Start timing the operation
 
-    db.session.commit()  # Commit the transaction
+    for numbers in row_batches(rows, batch):
+        if mode == 'orm':
+            for i in numbers:
+                db.session.add(Record(name=f"Record {i + 1}"))
+                # Without it the session batches the rows into multi-row INSERTs
+                db.session.flush()
+        elif mode == 'bulk':
+            db.session.bulk_insert_mappings(Record, [{"name": f"Record {i + 1}"} for i in numbers])
+        else:
+            db.session.execute(db.insert(Record), [{"name": f"Record {i + 1}"} for i in numbers])
+        db.session.commit()  # Commit the transaction
 
-    end_time = time.time()  # End timing the operation
+    seconds = time.perf_counter() - start_time  # End timing the operation
 
     # Return the time taken for the operation
-    return jsonify({"message": f"Flask write of 100 records took {end_time - start_time:.2f} seconds"})
+    return jsonify({
+        "framework": "flask", "rows": rows, "mode": mode, "batch": batch, "seconds": seconds,
+        "message": f"Flask write of {rows} records took {seconds:.2f} seconds",
+    })
+
+@app.route('/read', methods=['GET'])
+def read():
+    """
+    Returns the 100 most recent records.
+
+    Returns:
+        list: The records as JSON objects with id and name.
+    """
+    records = Record.query.order_by(Record.id.desc()).limit(100).all()
+    return jsonify([{"id": record.id, "name": record.name} for record in records])
 
 if __name__ == '__main__':
     # Run the Flask application in debug mode on port 5000
@@ -1,39 +1,272 @@
-import requests
+"""
+Load-tests the Flask, FastAPI and Django test apps.
+
+Each app is started locally, then driven by concurrent keep-alive HTTP
+clients for a fixed duration per scenario:
+
+    read   GET  /read   (the 100 most recent records)
+    write  POST /write  (query string from --write-params)
+    mixed  reads with a share of writes, see --write-ratio
+
+For every app and scenario the report gives requests/sec, errors and
+p50/p95/p99 latency, overall and per endpoint, and can be saved as JSON so
+runs can be compared over time:
+
+    python test/test_speed.py --concurrency 16 --duration 10 --output run.json
+    python test/test_speed.py --frameworks fastapi --scenarios read --no-boot
+    python test/test_speed.py --scenarios write --write-params "rows=1000&mode=bulk&batch=0"
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
 import time
+from datetime import datetime, timezone
 
+import httpx
 
-def measure_request_time(url, method="POST"):
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# How to start each test app and where its endpoints live
+FRAMEWORKS = {
+    "flask": {
+        "cwd": os.path.join(TEST_DIR, "flask_app"),
+        "command": [sys.executable, "-m", "flask", "--app", "app", "run", "--port", "5000"],
+        "url": "http://127.0.0.1:5000",
+        "paths": {"read": "/read", "write": "/write"},
+    },
+    "fastapi": {
+        "cwd": os.path.join(TEST_DIR, "fastapi_app"),
+        "command": [sys.executable, "-m", "uvicorn", "app:app", "--port", "8000", "--log-level", "warning"],
+        "url": "http://127.0.0.1:8000",
+        "paths": {"read": "/read", "write": "/write"},
+    },
+    "django": {
+        "cwd": os.path.join(TEST_DIR, "django_app"),
+        "command": [sys.executable, "manage.py", "runserver", "8001", "--noreload"],
+        "url": "http://127.0.0.1:8001",
+        "paths": {"read": "/read/", "write": "/write/"},
+    },
+}
+SCENARIOS = ("read", "write", "mixed")
+
+
+def start_server(framework, timeout=30):
     """
-    Measures the time taken to send a request to the specified URL.
+    Starts a test app and waits until it answers on its read endpoint.
 
     Args:
-        url (str): The URL to send the request to.
-        method (str): The HTTP method to use (default is "POST").
+        framework (str): A key of ``FRAMEWORKS``.
+        timeout (float): How long to wait for the app to come up, in seconds.
 
     Returns:
-        float: The time taken to complete the request in seconds.
-    """
-    start_time = time.time()
-    if method.upper() == "POST":
-        requests.post(url)
-    elif method.upper() == "GET":
-        requests.get(url)
-    else:
-        raise ValueError(f"Unsupported HTTP method: {method}")
-    return time.time() - start_time
-
-
-# URLs for the respective servers
-flask_url = "http://127.0.0.1:5000/write"
-fastapi_url = "http://127.0.0.1:8000/write"
-django_url = "http://127.0.0.1:8001/write/"
-
-# Measure request times
-flask_time = measure_request_time(flask_url)
-fastapi_time = measure_request_time(fastapi_url)
-django_time = measure_request_time(django_url)
-
-# Print results
-print(f"Flask: {flask_time:.2f} seconds")
-print(f"FastAPI: {fastapi_time:.2f} seconds")
-print(f"Django: {django_time:.2f} seconds")
+        subprocess.Popen: The running server process.
+    """
+    config = FRAMEWORKS[framework]
+    server = subprocess.Popen(
+        config["command"], cwd=config["cwd"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(config["url"] + config["paths"]["read"])
+            return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    stop_server(server)
+    raise RuntimeError(f"{framework} app did not start within {timeout} s")
+
+
+def stop_server(server):
+    """
+    Stops a server started by ``start_server``.
+
+    Args:
+        server (subprocess.Popen): The server process.
+    """
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+def pick_endpoint(scenario, write_ratio):
+    """
+    Chooses the endpoint of the next request.
+
+    Args:
+        scenario (str): "read", "write" or "mixed".
+        write_ratio (float): The share of writes in the mixed scenario.
+
+    Returns:
+        str: "read" or "write".
+    """
+    if scenario == "mixed":
+        return "write" if random.random() < write_ratio else "read"
+    return scenario
+
+
+async def drive(base_url, paths, scenario, concurrency, duration, warmup, write_ratio):
+    """
+    Runs one scenario against one app.
+
+    Every client owns a keep-alive connection and sends requests back to back
+    until the duration has passed. Requests finishing during the warm-up are
+    not recorded.
+
+    Args:
+        base_url (str): The app's base URL.
+        paths (dict): Endpoint paths by name ("read", "write").
+        scenario (str): "read", "write" or "mixed".
+        concurrency (int): The number of concurrent clients.
+        duration (float): The measured time, in seconds.
+        warmup (float): The unmeasured time before it, in seconds.
+        write_ratio (float): The share of writes in the mixed scenario.
+
+    Returns:
+        tuple: Latencies in seconds by endpoint, error counts by endpoint
+        and the measured wall time.
+    """
+    latencies = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    async def client_loop():
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            while True:
+                endpoint = pick_endpoint(scenario, write_ratio)
+                method = "POST" if endpoint == "write" else "GET"
+                sent = time.perf_counter()
+                if sent >= deadline:
+                    return
+                try:
+                    response = await client.request(method, paths[endpoint])
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                received = time.perf_counter()
+                if sent < measure_from:
+                    continue
+                if failed:
+                    errors[endpoint] += 1
+                else:
+                    latencies[endpoint].append(received - sent)
+
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - measure_from
+
+
+def summarize(latencies, errors, elapsed):
+    """
+    Computes throughput and latency percentiles.
+
+    Args:
+        latencies (list[float]): Latencies of successful requests, in seconds.
+        errors (int): The number of failed requests.
+        elapsed (float): The measured wall time, in seconds.
+
+    Returns:
+        dict: requests, errors, rps and p50/p95/p99/max latency in ms.
+    """
+    summary = {"requests": len(latencies), "errors": errors, "rps": len(latencies) / elapsed}
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        summary.update(
+            p50_ms=cuts[49] * 1000, p95_ms=cuts[94] * 1000, p99_ms=cuts[98] * 1000,
+            max_ms=max(latencies) * 1000,
+        )
+    return summary
+
+
+def run_scenario(framework, scenario, args):
+    """
+    Drives one app through one scenario and summarizes the result.
+
+    Args:
+        framework (str): A key of ``FRAMEWORKS``.
+        scenario (str): "read", "write" or "mixed".
+        args (argparse.Namespace): The command line options.
+
+    Returns:
+        dict: The overall summary plus an "endpoints" breakdown.
+    """
+    config = FRAMEWORKS[framework]
+    paths = dict(config["paths"])
+    if args.write_params:
+        paths["write"] += "?" + args.write_params
+    latencies, errors, elapsed = asyncio.run(drive(
+        config["url"], paths, scenario, args.concurrency, args.duration, args.warmup,
+        args.write_ratio,
+    ))
+    result = summarize(latencies["read"] + latencies["write"], sum(errors.values()), elapsed)
+    result["endpoints"] = {
+        endpoint: summarize(latencies[endpoint], errors[endpoint], elapsed)
+        for endpoint in latencies
+        if latencies[endpoint] or errors[endpoint]
+    }
+    return result
+
+
+def format_row(framework, scenario, result):
+    percentiles = "  ".join(
+        f"{name} {result[key]:8.1f}" for name, key in (("p50", "p50_ms"), ("p95", "p95_ms"), ("p99", "p99_ms"))
+        if key in result
+    )
+    row = f"{framework:<8} {scenario:<6} {result['rps']:9.1f} rps  {result['errors']:>5} errors"
+    return f"{row}  {percentiles} ms" if percentiles else row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frameworks", nargs="+", choices=FRAMEWORKS, default=list(FRAMEWORKS))
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="Share of writes in the mixed scenario")
+    parser.add_argument(
+        "--write-params", default="rows=100&mode=orm&batch=0",
+        help="Query string of the write endpoint: rows, mode (orm, bulk, core) and batch",
+    )
+    parser.add_argument("--no-boot", action="store_true", help="Use apps that are already running")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "cpus": os.cpu_count(),
+        "options": {
+            key: getattr(args, key)
+            for key in ("concurrency", "duration", "warmup", "write_ratio", "write_params")
+        },
+        "results": {},
+    }
+    for framework in args.frameworks:
+        server = None if args.no_boot else start_server(framework)
+        try:
+            report["results"][framework] = {}
+            for scenario in args.scenarios:
+                result = run_scenario(framework, scenario, args)
+                report["results"][framework][scenario] = result
+                print(format_row(framework, scenario, result))
+        finally:
+            if server is not None:
+                stop_server(server)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()